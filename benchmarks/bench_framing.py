@@ -0,0 +1,126 @@
+"""Codec benchmarks for the COBS and DLE framing of :py:mod:`com_interface.framing`.
+
+Every batch encodes or decodes as many frames as the backlog depth. Decoding a batch corresponds
+to a single read call which returned the given number of frames at once.
+"""
+
+from __future__ import annotations
+
+import functools
+
+from common import Case, Measurement, time_batches
+
+from com_interface.framing import (
+    SPEEDUPS_AVAILABLE,
+    CobsFrameParser,
+    CobsFramer,
+    DleFrameParser,
+    DleFramer,
+)
+
+FRAME_SIZES = (16, 256, 4096)
+BACKLOG_DEPTHS = (1, 16, 256)
+
+
+def _frames(frame_size: int, depth: int) -> list[bytes]:
+    # The frames contain every byte value so that the escape paths of both codecs are exercised.
+    pattern = bytes(range(256)) * (frame_size // 256 + 1)
+    return [pattern[idx % 256 : idx % 256 + frame_size] for idx in range(depth)]
+
+
+def _encode(
+    framer: CobsFramer | DleFramer, frame_size: int, depth: int, packets: int, record: bool
+) -> Measurement:
+    frames = _frames(frame_size, depth)
+    batches = max(1, packets // depth)
+    encoded = []
+
+    def batch() -> None:
+        encoded.append(framer.encode_many(frames))
+
+    duration, latencies = time_batches(batch, batches, depth)
+    return Measurement(
+        packets=batches * depth,
+        payload_bytes=batches * depth * frame_size,
+        duration=duration,
+        latencies_ns=latencies if record else [],
+        keep=encoded,
+    )
+
+
+def _decode(
+    parser: CobsFrameParser | DleFrameParser,
+    encoded: bytes,
+    frame_size: int,
+    depth: int,
+    packets: int,
+    record: bool,
+) -> Measurement:
+    batches = max(1, packets // depth)
+    decoded = []
+
+    def batch() -> None:
+        parser.feed(encoded)
+        decoded.extend(parser.parse())
+
+    duration, latencies = time_batches(batch, batches, depth)
+    if len(decoded) != batches * depth:
+        raise ValueError(f"decoded {len(decoded)} of {batches * depth} frames")
+    return Measurement(
+        packets=batches * depth,
+        payload_bytes=batches * depth * frame_size,
+        duration=duration,
+        latencies_ns=latencies if record else [],
+        keep=decoded,
+    )
+
+
+def _cobs_decode(
+    use_speedups: bool, frame_size: int, depth: int, packets: int, record: bool
+) -> Measurement:
+    encoded = bytes(CobsFramer().encode_many(_frames(frame_size, depth)))
+    parser = CobsFrameParser(use_speedups=use_speedups)
+    return _decode(parser, encoded, frame_size, depth, packets, record)
+
+
+def _dle_decode(
+    use_speedups: bool, frame_size: int, depth: int, packets: int, record: bool
+) -> Measurement:
+    encoded = bytes(DleFramer().encode_many(_frames(frame_size, depth)))
+    parser = DleFrameParser(use_speedups=use_speedups)
+    return _decode(parser, encoded, frame_size, depth, packets, record)
+
+
+def collect(packets: int) -> list[Case]:
+    """Create the codec benchmark cases.
+
+    :param packets: Approximate number of frames processed by every case.
+    """
+    implementations = ["python"]
+    if SPEEDUPS_AVAILABLE:
+        implementations.append("c")
+    cases = []
+    for frame_size in FRAME_SIZES:
+        # Keep the processed data volume of the large frames within reasonable limits.
+        num_packets = max(BACKLOG_DEPTHS[-1], packets * 64 // max(frame_size, 64))
+        for depth in BACKLOG_DEPTHS:
+            params = {"size": frame_size, "depth": depth}
+            for name, framer_cls in (("cobs_encode", CobsFramer), ("dle_encode", DleFramer)):
+                cases.append(
+                    Case(
+                        name,
+                        params,
+                        functools.partial(_encode, framer_cls(), frame_size, depth, num_packets),
+                    )
+                )
+            for impl in implementations:
+                impl_params = {**params, "impl": impl}
+                for name, decode in (("cobs_decode", _cobs_decode), ("dle_decode", _dle_decode)):
+                    cases.append(
+                        Case(
+                            name,
+                            impl_params,
+                            functools.partial(decode, impl == "c", frame_size, depth, num_packets),
+                        )
+                    )
+    return cases
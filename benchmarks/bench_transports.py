@@ -0,0 +1,353 @@
+"""Transport benchmarks over the loopback network interface, pseudo terminals and the in-memory
+loopback interfaces.
+
+All interfaces are driven by a :py:class:`com_interface.hub.ComHub`, which passes the received
+packets to a callback as soon as they were parsed. Every sent packet contains the send time, so
+the callback can determine the latency of each packet.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from common import Case, Measurement
+from spacepackets import PacketType
+from spacepackets.ccsds import PacketId
+
+from com_interface.framing import CobsFramer
+from com_interface.hub import ComHub
+from com_interface.ip_utils import EthAddr
+from com_interface.loopback import create_loopback_pair
+from com_interface.serial_base import SerialCfg
+from com_interface.serial_cobs import SerialCobsComIF
+from com_interface.shm import SharedMemoryBus, SharedMemoryReaderComIF
+from com_interface.tcp import TcpSpacepacketsClient
+from com_interface.udp import UdpClient
+
+if TYPE_CHECKING:
+    from com_interface.com_interface_base import ComInterface
+
+LOCALHOST = "127.0.0.1"
+TIMESTAMP = struct.Struct("!Q")
+SPACE_PACKET_HEADER = struct.Struct("!HHH")
+PACKET_ID = PacketId(ptype=PacketType.TM, sec_header_flag=False, apid=0x42)
+SPACE_PACKET_HEADER_LEN = SPACE_PACKET_HEADER.size
+#: Maximum time to wait for outstanding packets.
+RECEPTION_TIMEOUT = 5.0
+
+
+class LatencyCollector:
+    """Hub callback which determines the latency of every received packet from the timestamp at
+    the given offset."""
+
+    def __init__(self, timestamp_offset: int, record: bool):
+        self.timestamp_offset = timestamp_offset
+        self.record = record
+        self.packets: list[bytes] = []
+        self.latencies_ns: list[int] = []
+        self.last_reception_ns = 0
+        self.__cond = threading.Condition()
+
+    def __call__(self, com_if: ComInterface, packets: list[bytes]) -> None:
+        now = time.perf_counter_ns()
+        if self.record:
+            offset = self.timestamp_offset
+            self.latencies_ns.extend(
+                now - TIMESTAMP.unpack_from(packet, offset)[0] for packet in packets
+            )
+        with self.__cond:
+            self.packets.extend(packets)
+            self.last_reception_ns = now
+            self.__cond.notify_all()
+
+    def duration_since(self, start_ns: int) -> float:
+        """Time between the given start time and the last reception in seconds."""
+        if not self.packets:
+            raise TimeoutError("no packets were received")
+        return (self.last_reception_ns - start_ns) / 1e9
+
+    def wait_for(self, num_packets: int, timeout: float = RECEPTION_TIMEOUT) -> bool:
+        with self.__cond:
+            return self.__cond.wait_for(lambda: len(self.packets) >= num_packets, timeout)
+
+
+def _space_packet(seq_count: int, data: bytes) -> bytearray:
+    packet = bytearray(SPACE_PACKET_HEADER_LEN + TIMESTAMP.size + len(data))
+    SPACE_PACKET_HEADER.pack_into(
+        packet,
+        0,
+        PACKET_ID.raw(),
+        0xC000 | (seq_count & 0x3FFF),
+        len(packet) - SPACE_PACKET_HEADER_LEN - 1,
+    )
+    packet[SPACE_PACKET_HEADER_LEN + TIMESTAMP.size :] = data
+    return packet
+
+
+def tcp_reassembly(packet_size: int, segment_size: int, packets: int, record: bool) -> Measurement:
+    """A TCP server sends space packets in segments of a fixed size, so most packets are split
+    across several segments and most segments contain parts of several packets."""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind((LOCALHOST, 0))
+    server.listen()
+    collector = LatencyCollector(SPACE_PACKET_HEADER_LEN, record)
+    hub = ComHub(collector)
+    client = TcpSpacepacketsClient(
+        "bench_tcp",
+        space_packet_ids=[PACKET_ID],
+        inner_thread_delay=0.1,
+        target_address=EthAddr.from_tuple(server.getsockname()),
+    )
+    data = bytes(packet_size - SPACE_PACKET_HEADER_LEN - TIMESTAMP.size)
+    try:
+        hub.start()
+        hub.add(client)
+        conn, _ = server.accept()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        pending = bytearray()
+        start = time.perf_counter_ns()
+        for seq_count in range(packets):
+            packet = _space_packet(seq_count, data)
+            TIMESTAMP.pack_into(packet, SPACE_PACKET_HEADER_LEN, time.perf_counter_ns())
+            pending.extend(packet)
+            while len(pending) >= segment_size:
+                conn.sendall(pending[:segment_size])
+                del pending[:segment_size]
+        conn.sendall(pending)
+        collector.wait_for(packets)
+        duration = collector.duration_since(start)
+        conn.close()
+    finally:
+        hub.close()
+        server.close()
+    return Measurement(
+        packets=len(collector.packets),
+        payload_bytes=len(collector.packets) * packet_size,
+        duration=duration,
+        latencies_ns=collector.latencies_ns,
+        keep=collector.packets,
+        lost_packets=packets - len(collector.packets),
+    )
+
+
+def udp_burst(packet_size: int, burst: int, packets: int, record: bool) -> Measurement:
+    """A UDP socket sends bursts of datagrams as fast as possible. The next burst is sent after
+    the previous burst was received or lost."""
+    collector = LatencyCollector(0, record)
+    hub = ComHub(collector)
+    client = UdpClient(
+        "bench_udp",
+        send_address=EthAddr(LOCALHOST, 0),
+        recv_addr=EthAddr(LOCALHOST, 0),
+        recv_buf_size=4 * 1024 * 1024,
+    )
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    datagram = bytearray(packet_size)
+    bursts = max(1, packets // burst)
+    try:
+        hub.start()
+        hub.add(client)
+        assert client.udp_socket is not None
+        target = client.udp_socket.getsockname()
+        start = time.perf_counter_ns()
+        for burst_idx in range(bursts):
+            for _ in range(burst):
+                TIMESTAMP.pack_into(datagram, 0, time.perf_counter_ns())
+                sender.sendto(datagram, target)
+            # Lost datagrams are detected by the timeout.
+            collector.wait_for((burst_idx + 1) * burst, 0.5)
+        duration = collector.duration_since(start)
+    finally:
+        hub.close()
+        sender.close()
+    return Measurement(
+        packets=len(collector.packets),
+        payload_bytes=len(collector.packets) * packet_size,
+        duration=duration,
+        latencies_ns=collector.latencies_ns,
+        keep=collector.packets,
+        lost_packets=bursts * burst - len(collector.packets),
+    )
+
+
+def _echo_task(fd: int, stop: threading.Event) -> None:
+    while not stop.is_set():
+        readable, _, _ = select.select([fd], [], [], 0.1)
+        if not readable:
+            continue
+        try:
+            data = os.read(fd, 4096)
+        except OSError:
+            return
+        view = memoryview(data)
+        while len(view) > 0:
+            view = view[os.write(fd, view) :]
+
+
+def serial_round_trip(packet_size: int, packets: int, record: bool) -> Measurement:
+    """Send COBS frames over a pseudo terminal pair. The other side echoes the frames and the next
+    frame is sent after the echo was received."""
+    import pty
+
+    master, slave = pty.openpty()
+    collector = LatencyCollector(0, record)
+    hub = ComHub(collector)
+    ser_cfg = SerialCfg(com_if_id="bench_ser_cobs", serial_port=os.ttyname(slave), baud_rate=921600)
+    com_if = SerialCobsComIF(ser_cfg)
+    stop = threading.Event()
+    echo_thread = threading.Thread(target=_echo_task, args=(master, stop), daemon=True)
+    packet = bytearray(packet_size)
+    try:
+        hub.start()
+        hub.add(com_if)
+        echo_thread.start()
+        start = time.perf_counter_ns()
+        for idx in range(packets):
+            TIMESTAMP.pack_into(packet, 0, time.perf_counter_ns())
+            com_if.send(packet)
+            if not collector.wait_for(idx + 1):
+                break
+        duration = collector.duration_since(start)
+    finally:
+        stop.set()
+        hub.close()
+        if echo_thread.is_alive():
+            echo_thread.join()
+        os.close(master)
+        os.close(slave)
+    return Measurement(
+        packets=len(collector.packets),
+        payload_bytes=len(collector.packets) * packet_size,
+        duration=duration,
+        latencies_ns=collector.latencies_ns,
+        keep=collector.packets,
+        lost_packets=packets - len(collector.packets),
+    )
+
+
+def loopback_pair(
+    packet_size: int, batch: int, framed: bool, packets: int, record: bool
+) -> Measurement:
+    """Send batches of packets between two in-memory loopback interfaces, optionally with COBS
+    framing. This measures the overhead of the interface layer without any system calls."""
+    sender, receiver = create_loopback_pair(framer_factory=CobsFramer if framed else None)
+    collector = LatencyCollector(0, record)
+    batch_packets = [bytearray(packet_size) for _ in range(batch)]
+    batches = max(1, packets // batch)
+    sender.open()
+    receiver.open()
+    start = time.perf_counter_ns()
+    for _ in range(batches):
+        for packet in batch_packets:
+            TIMESTAMP.pack_into(packet, 0, time.perf_counter_ns())
+        sender.send_many(batch_packets)
+        collector(receiver, receiver.receive())
+    duration = collector.duration_since(start)
+    return Measurement(
+        packets=len(collector.packets),
+        payload_bytes=len(collector.packets) * packet_size,
+        duration=duration,
+        latencies_ns=collector.latencies_ns,
+        keep=collector.packets,
+        lost_packets=batches * batch - len(collector.packets),
+    )
+
+
+def shm_fan_out(
+    packet_size: int, batch: int, readers: int, packets: int, record: bool
+) -> Measurement:
+    """Publish batches of packets on a shared memory bus and receive them with several readers
+    inside the same process. This measures the cost of the rings without the process scheduling.
+    The latency is recorded for the last reader."""
+    sender, receiver = create_loopback_pair()
+    bus = SharedMemoryBus(receiver, slot_count=4 * batch, max_packet_size=packet_size)
+    collector = LatencyCollector(0, record)
+    batch_packets = [bytearray(packet_size) for _ in range(batch)]
+    batches = max(1, packets // batch)
+    sender.open()
+    bus.open()
+    shm_readers = [SharedMemoryReaderComIF(bus.name) for _ in range(readers)]
+    for reader in shm_readers:
+        reader.open()
+    try:
+        start = time.perf_counter_ns()
+        for _ in range(batches):
+            for packet in batch_packets:
+                TIMESTAMP.pack_into(packet, 0, time.perf_counter_ns())
+            sender.send_many(batch_packets)
+            bus.run_once()
+            for reader in shm_readers[:-1]:
+                reader.receive()
+            collector(shm_readers[-1], shm_readers[-1].receive())
+        duration = collector.duration_since(start)
+    finally:
+        for reader in shm_readers:
+            reader.close()
+        bus.close()
+    return Measurement(
+        packets=len(collector.packets),
+        payload_bytes=len(collector.packets) * packet_size,
+        duration=duration,
+        latencies_ns=collector.latencies_ns,
+        keep=collector.packets,
+        lost_packets=batches * batch - len(collector.packets),
+    )
+
+
+def collect(packets: int) -> list[Case]:
+    """Create the transport benchmark cases.
+
+    :param packets: Approximate number of packets transferred by every case.
+    """
+    cases = []
+    for packet_size, segment_size in ((64, 7), (64, 1400), (1024, 1400), (1024, 65536)):
+        cases.append(
+            Case(
+                "tcp_reassembly",
+                {"size": packet_size, "segment": segment_size},
+                functools.partial(tcp_reassembly, packet_size, segment_size, packets),
+            )
+        )
+    for packet_size, burst in ((64, 64), (64, 1024), (1024, 256)):
+        cases.append(
+            Case(
+                "udp_burst",
+                {"size": packet_size, "burst": burst},
+                functools.partial(udp_burst, packet_size, burst, packets),
+            )
+        )
+    for packet_size, batch, framed in ((64, 1, False), (64, 256, False), (64, 256, True)):
+        cases.append(
+            Case(
+                "loopback_pair",
+                {"size": packet_size, "batch": batch, "framed": framed},
+                functools.partial(loopback_pair, packet_size, batch, framed, packets),
+            )
+        )
+    for packet_size, readers in ((64, 1), (64, 4), (1024, 4)):
+        cases.append(
+            Case(
+                "shm_fan_out",
+                {"size": packet_size, "readers": readers},
+                functools.partial(shm_fan_out, packet_size, 256, readers, packets),
+            )
+        )
+    if not sys.platform.startswith("win"):
+        # Round trips are much slower than one-way transfers.
+        cases.extend(
+            Case(
+                "serial_round_trip",
+                {"size": packet_size},
+                functools.partial(serial_round_trip, packet_size, max(1, packets // 10)),
+            )
+            for packet_size in (16, 256)
+        )
+    return cases
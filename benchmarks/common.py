@@ -0,0 +1,208 @@
+"""Shared result types and measurement helpers for the benchmark suite."""
+
+from __future__ import annotations
+
+import dataclasses
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable
+
+
+@dataclasses.dataclass
+class Measurement:
+    """Raw outcome of a single benchmark run.
+
+    :param packets: Number of processed packets.
+    :param payload_bytes: Number of processed payload bytes, without any framing overhead.
+    :param duration: Duration of the measured section in seconds.
+    :param latencies_ns: Per packet latencies in nanoseconds. Empty if the latency was not
+        recorded.
+    :param keep: Objects produced by the run, usually the received packets. They are kept alive
+        while the retained memory blocks are counted.
+    :param lost_packets: Number of sent packets which were not received.
+    """
+
+    packets: int
+    payload_bytes: int
+    duration: float
+    latencies_ns: list[int]
+    keep: Any = None
+    lost_packets: int = 0
+
+
+@dataclasses.dataclass
+class Case:
+    """A single benchmark with a fixed set of parameters.
+
+    The run callable receives a flag which specifies whether the per packet latencies should be
+    recorded. The latencies are not recorded while the allocations are measured.
+    """
+
+    name: str
+    params: dict[str, Any]
+    run: Callable[[bool], Measurement]
+
+    @property
+    def key(self) -> str:
+        return result_key(self.name, self.params)
+
+
+@dataclasses.dataclass
+class BenchResult:
+    """Result of a single benchmark.
+
+    The latency is measured per packet. For codec benchmarks, it is the processing time of a
+    batch divided by the number of packets in the batch. For transport benchmarks, it is the time
+    between handing the packet to the sender and receiving it on the other side.
+
+    The allocation metrics are determined with :py:mod:`tracemalloc` in a separate run.
+    ``alloc_blocks_per_packet`` is the number of memory blocks which are still allocated after the
+    run, divided by the number of packets. This includes the delivered packets themselves.
+    ``peak_alloc_per_packet`` is the peak of the traced memory during the run in bytes, divided by
+    the number of packets, and also covers temporary allocations.
+    """
+
+    name: str
+    params: dict[str, Any]
+    packets: int
+    payload_bytes: int
+    duration: float
+    p50_us: float
+    p99_us: float
+    lost_packets: int = 0
+    alloc_blocks_per_packet: float | None = None
+    peak_alloc_per_packet: float | None = None
+
+    @property
+    def key(self) -> str:
+        """Unique identifier of the benchmark and its parameters."""
+        return result_key(self.name, self.params)
+
+    @property
+    def packets_per_second(self) -> float:
+        return self.packets / self.duration
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.payload_bytes / self.duration / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        result = dataclasses.asdict(self)
+        result["key"] = self.key
+        result["packets_per_second"] = self.packets_per_second
+        result["megabytes_per_second"] = self.megabytes_per_second
+        return result
+
+
+def result_key(name: str, params: dict[str, Any]) -> str:
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def percentile(sorted_values: list[int], fraction: float) -> float:
+    """Nearest rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def run_case(case: Case, repetitions: int = 3, measure_allocs: bool = True) -> BenchResult:
+    """Run a benchmark case. The throughput and latency of the repetition with the shortest
+    duration are reported.
+
+    :param repetitions: Number of timed runs.
+    :param measure_allocs: Measure the allocations in an additional run with
+        :py:mod:`tracemalloc`. This run is not timed because tracing slows down the code
+        considerably.
+    """
+    best = None
+    for _ in range(repetitions):
+        measurement = case.run(True)
+        if best is None or measurement.duration < best.duration:
+            best = measurement
+    assert best is not None
+    latencies = sorted(best.latencies_ns)
+    result = BenchResult(
+        name=case.name,
+        params=case.params,
+        packets=best.packets,
+        payload_bytes=best.payload_bytes,
+        duration=best.duration,
+        p50_us=percentile(latencies, 0.5) / 1e3,
+        p99_us=percentile(latencies, 0.99) / 1e3,
+        lost_packets=best.lost_packets,
+    )
+    if measure_allocs:
+        result.alloc_blocks_per_packet, result.peak_alloc_per_packet = measure_allocations(case)
+    return result
+
+
+def measure_allocations(case: Case) -> tuple[float, float]:
+    """Run the benchmark case with tracemalloc enabled.
+
+    :return: Retained memory blocks per packet and peak traced memory per packet in bytes.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start_blocks = _traced_blocks()
+        start_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        measurement = case.run(False)
+        _, peak_size = tracemalloc.get_traced_memory()
+        keep = measurement.keep
+        packets = measurement.packets
+        del measurement
+        gc.collect()
+        end_blocks = _traced_blocks()
+        del keep
+    finally:
+        tracemalloc.stop()
+    if packets == 0:
+        return float("nan"), float("nan")
+    return (end_blocks - start_blocks) / packets, (peak_size - start_size) / packets
+
+
+def _traced_blocks() -> int:
+    return sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+
+def time_batches(func: Callable[[], Any], batches: int, batch_size: int) -> tuple[float, list[int]]:
+    """Call the function for every batch and time each call.
+
+    :return: Total duration in seconds and the per packet latencies in nanoseconds. Every packet
+        of a batch is assigned the batch duration divided by the batch size.
+    """
+    latencies = []
+    perf_counter_ns = time.perf_counter_ns
+    total = 0
+    for _ in range(batches):
+        start = perf_counter_ns()
+        func()
+        elapsed = perf_counter_ns() - start
+        total += elapsed
+        latencies.extend([elapsed // batch_size] * batch_size)
+    return total / 1e9, latencies
+
+
+def format_table(results: list[BenchResult]) -> str:
+    width = max([len("benchmark")] + [len(result.key) for result in results])
+    lines = [
+        f"{'benchmark':<{width}} {'pkts/s':>11} {'MB/s':>9} {'p50 us':>9} {'p99 us':>9} "
+        f"{'lost':>6} {'blk/pkt':>8} {'peak B/pkt':>10}"
+    ]
+    lines.extend(
+        f"{result.key:<{width}} {result.packets_per_second:11.0f} "
+        f"{result.megabytes_per_second:9.2f} {result.p50_us:9.2f} {result.p99_us:9.2f} "
+        f"{result.lost_packets:6d} {_format_optional(result.alloc_blocks_per_packet, 8, 2)} "
+        f"{_format_optional(result.peak_alloc_per_packet, 10, 1)}"
+        for result in results
+    )
+    return "\n".join(lines)
+
+
+def _format_optional(value: float | None, width: int, precision: int) -> str:
+    if value is None:
+        return f"{'-':>{width}}"
+    return f"{value:{width}.{precision}f}"
@@ -0,0 +1,127 @@
+"""Benchmark suite for the framing codecs and the communication interfaces.
+
+The suite reports the packet rate, the payload data rate, the p50 and p99 packet latency and
+allocation metrics for every benchmark. The results can be written to a JSON file and compared
+against the JSON results of a previous run to detect performance regressions, for example before
+upgrading a dependency or the Python interpreter.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --json baseline.json
+    # After the change
+    python benchmarks/run_benchmarks.py --json current.json --compare baseline.json
+
+The comparison returns exit code 1 if the packet rate of any benchmark dropped by more than the
+allowed threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import platform
+import sys
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+import bench_framing
+import bench_transports
+from common import BenchResult, format_table, run_case
+
+from com_interface.framing import SPEEDUPS_AVAILABLE
+
+SUITES = {"framing": bench_framing, "transports": bench_transports}
+#: Approximate number of packets per benchmark for the default and the quick mode.
+PACKETS = {"framing": 20000, "transports": 5000}
+QUICK_PACKETS = {"framing": 2000, "transports": 500}
+
+
+def _metadata() -> dict[str, Any]:
+    return {
+        "timestamp": dt.datetime.now(tz=dt.timezone.utc).isoformat(),
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "com_interface": version("com-interface"),
+        "speedups": SPEEDUPS_AVAILABLE,
+    }
+
+
+def compare(
+    results: list[BenchResult], baseline: dict[str, Any], max_regression: float
+) -> list[str]:
+    """Compare the packet rates with a baseline result file.
+
+    :return: Descriptions of all benchmarks which are slower than the baseline by more than the
+        given fraction.
+    """
+    baseline_results = {result["key"]: result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        reference = baseline_results.get(result.key)
+        if reference is None:
+            continue
+        ratio = result.packets_per_second / reference["packets_per_second"]
+        if ratio < 1.0 - max_regression:
+            regressions.append(
+                f"{result.key}: {result.packets_per_second:.0f} pkts/s, baseline "
+                f"{reference['packets_per_second']:.0f} pkts/s ({(ratio - 1.0) * 100.0:+.1f} %)"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="com-interface benchmark suite")
+    parser.add_argument(
+        "--suite",
+        choices=sorted(SUITES),
+        action="append",
+        help="Run only the given suite. Can be specified multiple times",
+    )
+    parser.add_argument(
+        "-k", "--filter", default="", help="Only run benchmarks whose key contains this string"
+    )
+    parser.add_argument("--quick", action="store_true", help="Process fewer packets per benchmark")
+    parser.add_argument(
+        "--repetitions", type=int, default=3, help="Timed runs per benchmark, the best one counts"
+    )
+    parser.add_argument(
+        "--no-allocs", action="store_true", help="Skip the tracemalloc allocation measurement"
+    )
+    parser.add_argument("--json", type=Path, help="Write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="JSON results of a baseline run")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="Allowed packet rate drop relative to the baseline as a fraction",
+    )
+    args = parser.parse_args()
+    packets = QUICK_PACKETS if args.quick else PACKETS
+    results = []
+    for suite in args.suite or sorted(SUITES):
+        for case in SUITES[suite].collect(packets[suite]):
+            if args.filter not in case.key:
+                continue
+            result = run_case(case, args.repetitions, measure_allocs=not args.no_allocs)
+            print(f"{result.key}: {result.packets_per_second:.0f} pkts/s", file=sys.stderr)
+            results.append(result)
+    print(format_table(results))
+    if args.json is not None:
+        output = {"metadata": _metadata(), "results": [result.to_dict() for result in results]}
+        args.json.write_text(json.dumps(output, indent=2))
+    if args.compare is not None:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.max_regression)
+        if regressions:
+            print("\nPerformance regressions:")
+            print("\n".join(regressions))
+            return 1
+        print("\nNo performance regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Throughput benchmark for the :py:class:`com_interface.serial_cobs.SerialCobsComIF` over a
+pseudo terminal pair.
+
+The frame rate is measured once with single byte reads, which corresponds to the reception
+behaviour of older versions of the interface, and once with bulk reads. This benchmark only runs
+on POSIX systems.
+
+Usage::
+
+    python benchmarks/serial_cobs_throughput.py --frames 20000 --frame-size 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from cobs import cobs
+
+from com_interface.serial_base import SerialCfg
+from com_interface.serial_cobs import SerialCobsComIF
+
+
+def _build_stream(num_frames: int, frame_size: int) -> bytes:
+    stream = bytearray()
+    for idx in range(num_frames):
+        stream.append(0)
+        stream.extend(cobs.encode(bytes([idx % 256]) * frame_size))
+        stream.append(0)
+    return bytes(stream)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while len(view) > 0:
+        written = os.write(fd, view[:4096])
+        view = view[written:]
+
+
+def measure_frames_per_second(
+    num_frames: int, frame_size: int, read_chunk_size: int, timeout: float = 60.0
+) -> float:
+    """Send the given number of COBS frames through a pseudo terminal and measure how many frames
+    per second the interface delivers."""
+    import pty
+
+    master, slave = pty.openpty()
+    ser_cfg = SerialCfg(
+        com_if_id="bench_ser_cobs",
+        serial_port=os.ttyname(slave),
+        baud_rate=921600,
+        read_chunk_size=read_chunk_size,
+    )
+    com_if = SerialCobsComIF(ser_cfg)
+    com_if.open()
+    stream = _build_stream(num_frames, frame_size)
+    writer = threading.Thread(target=_write_all, args=(master, stream), daemon=True)
+    frames_received = 0
+    start = time.perf_counter()
+    writer.start()
+    try:
+        while frames_received < num_frames:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"only received {frames_received} of {num_frames} frames")
+            frames_received += len(com_if.receive())
+            time.sleep(0.001)
+        duration = time.perf_counter() - start
+    finally:
+        com_if.close()
+        os.close(master)
+        os.close(slave)
+    return frames_received / duration
+
+
+def main() -> None:
+    if sys.platform.startswith("win"):
+        print("This benchmark requires pseudo terminals, which are only available on POSIX")
+        return
+    parser = argparse.ArgumentParser(description="Serial COBS interface throughput benchmark")
+    parser.add_argument("--frames", type=int, default=20000, help="Number of frames to send")
+    parser.add_argument("--frame-size", type=int, default=64, help="Frame payload size in bytes")
+    args = parser.parse_args()
+    for label, chunk_size in (("single byte reads", 1), ("bulk reads", 4096)):
+        fps = measure_frames_per_second(args.frames, args.frame_size, chunk_size)
+        print(f"{label:<20}: {fps:10.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
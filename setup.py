@@ -0,0 +1,19 @@
+"""Build script for the optional C accelerator. All other project metadata is specified inside
+the pyproject.toml file."""
+
+import os
+
+from setuptools import Extension, setup
+
+ext_modules = []
+# The accelerator is optional. If it can not be compiled, the pure Python implementation is used.
+if not os.environ.get("COM_INTERFACE_PURE_PYTHON"):
+    ext_modules.append(
+        Extension(
+            "com_interface._speedups",
+            sources=["src/com_interface/_speedups.c"],
+            optional=True,
+        )
+    )
+
+setup(ext_modules=ext_modules)
@@ -3,8 +3,20 @@ concrete implementations."""
 
 from __future__ import annotations
 
+import io
+import logging
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+from com_interface.hooks import Hookable, HookEvent
+from com_interface.metrics import InterfaceMetrics
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from com_interface.hub import PacketCallback
+
+_LOGGER = logging.getLogger(__name__)
 
 
 class ReceptionDecodeError(Exception):
@@ -23,16 +35,34 @@ class SendError(Exception):
         self.custom_exception = custom_exception
 
 
-class ComInterface(ABC):
+class ComInterface(Hookable, ABC):
     """Generic form of a communication interface to separate communication logic from
     the underlying interface.
+
+    Tracing hooks can be registered with :py:meth:`add_hook`, see :py:mod:`com_interface.hooks`.
+
+    Received packets are either retrieved with :py:meth:`receive`, which can block until packets
+    arrive, or pushed to a callback registered with :py:meth:`on_packet`.
     """
 
+    # Concrete interfaces create their metrics in the constructor.
+    _metrics: InterfaceMetrics | None = None
+    # Registered with on_packet by interfaces which support packet callbacks.
+    _packet_callback: PacketCallback | None = None
+
     @property
     @abstractmethod
     def id(self) -> str:
         pass
 
+    @property
+    def metrics(self) -> InterfaceMetrics:
+        """Metrics of the interface, see :py:mod:`com_interface.metrics`. The counters of
+        interfaces which do not update the metrics stay at zero."""
+        if self._metrics is None:
+            self._metrics = InterfaceMetrics()
+        return self._metrics
+
     @abstractmethod
     def initialize(self, args: Any = 0) -> Any:
         """Perform initializations step which can not be done in constructor or which require
@@ -66,19 +96,76 @@ class ComInterface(ABC):
         :raises SendError: Sending failed for some reason.
         """
 
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Send multiple packets. The default implementation calls :py:meth:`send` for every
+        packet. Concrete implementations can override this to send all packets with fewer
+        system calls.
+
+        :raises SendError: Sending failed for some reason.
+        """
+        for packet in packets:
+            self.send(packet)
+
     @abstractmethod
-    def receive(self, parameters: Any = 0) -> list[bytes]:
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
         """Returns a list of received packets. The child class can use a separate thread to poll for
         the packets or use some other mechanism and container like a deque to store packets
         to be returned here.
 
         :param parameters:
+        :param max_packets: Maximum number of returned packets, which bounds the batch size.
+            The remaining packets are returned by the next calls. None to return all packets.
+        :param timeout: Maximum time in seconds to wait for packets if none are available.
+            0 to return immediately, None to wait indefinitely. The call returns as soon as
+            packets arrive or the interface is closed.
         :raises ReceptionDecodeError: If the underlying COM interface uses encoding and
             decoding and the decoding fails, this exception will be returned.
         :return:
         """
         return []
 
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        """Register a callback which is called by the reception thread of the interface with
+        every batch of received packets. These packets are not stored for :py:meth:`receive`.
+        Exceptions raised by the callback are logged. None unregisters the callback.
+
+        :raises io.UnsupportedOperation: The interface does not receive packets in a separate
+            thread.
+        """
+        raise io.UnsupportedOperation(f"{type(self).__name__} does not support packet callbacks")
+
+    def fileno(self) -> int:
+        """File descriptor which becomes readable when packets can be received or the interface
+        was closed. It allows waiting for several interfaces in an external event loop, and the
+        interface object itself can be registered with :py:mod:`select` or :py:mod:`selectors`.
+        A :py:meth:`receive` call resets the readiness unless packets are left.
+
+        The descriptor must not be read or closed by the caller.
+
+        :raises io.UnsupportedOperation: The interface does not provide a readiness descriptor.
+        """
+        raise io.UnsupportedOperation(f"{type(self).__name__} does not provide a file descriptor")
+
+    def _deliver_to_callback(self, packets: list[bytes]) -> bool:
+        """Pass received packets to the callback registered with :py:meth:`on_packet`. Called
+        by the reception thread of concrete interfaces.
+
+        :return: False if no callback is registered, so the packets need to be stored.
+        """
+        callback = self._packet_callback
+        if callback is None:
+            return False
+        self.metrics.packets_delivered(len(packets))
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packets)
+        try:
+            callback(self, packets)
+        except Exception:
+            _LOGGER.exception(f"Packet callback for {self.id} failed")
+        return True
+
     @abstractmethod
     def packets_available(self, parameters: Any = 0) -> int:
         """Poll whether packets are available.
@@ -0,0 +1,220 @@
+"""Small ctypes shim for the Linux ``recvmmsg`` and ``sendmmsg`` system calls, which receive or
+send multiple datagrams with a single system call. :py:func:`mmsg_available` can be used to check
+whether the shim can be used on the current platform."""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import socket
+import struct
+import sys
+
+MSG_DONTWAIT = 0x40
+# Maximum number of messages which can be passed to sendmmsg and recvmmsg (UIO_MAXIOV).
+MAX_MMSG_BATCH = 1024
+_SOCKADDR_STORAGE_SIZE = 128
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = (("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t))
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = (
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    )
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = (("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint))
+
+
+def _load_libc() -> ctypes.CDLL | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "recvmmsg") or not hasattr(libc, "sendmmsg"):
+        return None
+    libc.recvmmsg.argtypes = (
+        ctypes.c_int,
+        ctypes.POINTER(_MMsgHdr),
+        ctypes.c_uint,
+        ctypes.c_int,
+        ctypes.c_void_p,
+    )
+    libc.recvmmsg.restype = ctypes.c_int
+    libc.sendmmsg.argtypes = (ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int)
+    libc.sendmmsg.restype = ctypes.c_int
+    return libc
+
+
+_LIBC = _load_libc()
+
+
+def mmsg_available() -> bool:
+    return _LIBC is not None
+
+
+def parse_sockaddr(raw: bytes) -> tuple:
+    """Convert a raw IPv4 or IPv6 socket address into the address tuple used by the
+    :py:mod:`socket` module."""
+    family = struct.unpack_from("=H", raw)[0]
+    if family == socket.AF_INET:
+        port = struct.unpack_from("!H", raw, 2)[0]
+        return socket.inet_ntop(socket.AF_INET, raw[4:8]), port
+    if family == socket.AF_INET6:
+        port, flowinfo = struct.unpack_from("!HI", raw, 2)
+        scope_id = struct.unpack_from("=I", raw, 24)[0]
+        return socket.inet_ntop(socket.AF_INET6, raw[8:24]), port, flowinfo, scope_id
+    raise ValueError(f"unsupported address family {family}")
+
+
+def build_sockaddr(addr: tuple, family: int) -> bytes:
+    """Convert an IPv4 or IPv6 address tuple with a numeric host address into a raw socket
+    address."""
+    if family == socket.AF_INET:
+        return (
+            struct.pack("=H", family)
+            + struct.pack("!H", addr[1])
+            + socket.inet_pton(socket.AF_INET, addr[0])
+            + bytes(8)
+        )
+    if family == socket.AF_INET6:
+        flowinfo = addr[2] if len(addr) > 2 else 0
+        scope_id = addr[3] if len(addr) > 3 else 0
+        return (
+            struct.pack("=H", family)
+            + struct.pack("!HI", addr[1], flowinfo)
+            + socket.inet_pton(socket.AF_INET6, addr[0])
+            + struct.pack("=I", scope_id)
+        )
+    raise ValueError(f"unsupported address family {family}")
+
+
+def _buffer_address(data: bytes | bytearray, keep_alive: list) -> int:
+    if isinstance(data, bytearray):
+        buf = (ctypes.c_char * len(data)).from_buffer(data) if len(data) > 0 else None
+    else:
+        buf = ctypes.c_char_p(bytes(data))
+    keep_alive.append(buf)
+    return ctypes.cast(buf, ctypes.c_void_p).value if buf is not None else 0
+
+
+def sendmmsg(sock: socket.socket, packets: list[bytes | bytearray], addr: tuple) -> None:
+    """Send all packets as separate datagrams to the given address using as few ``sendmmsg``
+    calls as possible. The packets are not copied.
+
+    :param addr: Address tuple with a numeric host address.
+    """
+    sendmmsg_to(sock, [(packet, addr) for packet in packets])
+
+
+def sendmmsg_to(sock: socket.socket, messages: list[tuple[bytes | bytearray, tuple]]) -> None:
+    """Send every packet as a separate datagram to its own address using as few ``sendmmsg``
+    calls as possible. The packets are not copied.
+
+    :param messages: Packets together with address tuples with a numeric host address.
+    """
+    if _LIBC is None:
+        raise OSError("sendmmsg is not available on this platform")
+    raw_addrs: dict[tuple, ctypes.Array] = {}
+    for _, addr in messages:
+        if addr not in raw_addrs:
+            sockaddr = build_sockaddr(addr, sock.family)
+            raw_addrs[addr] = ctypes.create_string_buffer(sockaddr, len(sockaddr))
+    for batch_start in range(0, len(messages), MAX_MMSG_BATCH):
+        batch = messages[batch_start : batch_start + MAX_MMSG_BATCH]
+        keep_alive = []
+        iovecs = (_IoVec * len(batch))()
+        hdrs = (_MMsgHdr * len(batch))()
+        for idx, (packet, addr) in enumerate(batch):
+            iovecs[idx].iov_base = _buffer_address(packet, keep_alive)
+            iovecs[idx].iov_len = len(packet)
+            raw_addr = raw_addrs[addr]
+            hdr = hdrs[idx].msg_hdr
+            hdr.msg_name = ctypes.addressof(raw_addr)
+            hdr.msg_namelen = len(raw_addr)
+            hdr.msg_iov = ctypes.pointer(iovecs[idx])
+            hdr.msg_iovlen = 1
+        sent = 0
+        while sent < len(batch):
+            count = _LIBC.sendmmsg(sock.fileno(), ctypes.byref(hdrs[sent]), len(batch) - sent, 0)
+            if count < 0:
+                err = ctypes.get_errno()
+                if err not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise OSError(err, os.strerror(err))
+                # Non-blocking socket with a full send buffer.
+                select.select([], [sock], [])
+                continue
+            sent += count
+
+
+class MmsgReceiver:
+    """Receives up to ``batch_size`` datagrams with one ``recvmmsg`` call. All datagrams are
+    received into one preallocated buffer which is reused for every call."""
+
+    def __init__(self, batch_size: int, max_recv_size: int, with_addresses: bool = False):
+        if _LIBC is None:
+            raise OSError("recvmmsg is not available on this platform")
+        self.batch_size = batch_size
+        self.max_recv_size = max_recv_size
+        self.with_addresses = with_addresses
+        self._data = ctypes.create_string_buffer(batch_size * max_recv_size)
+        self._names = ctypes.create_string_buffer(batch_size * _SOCKADDR_STORAGE_SIZE)
+        self._iovecs = (_IoVec * batch_size)()
+        self._hdrs = (_MMsgHdr * batch_size)()
+        data_addr = ctypes.addressof(self._data)
+        names_addr = ctypes.addressof(self._names)
+        for idx in range(batch_size):
+            self._iovecs[idx].iov_base = data_addr + idx * max_recv_size
+            self._iovecs[idx].iov_len = max_recv_size
+            hdr = self._hdrs[idx].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iovecs[idx])
+            hdr.msg_iovlen = 1
+            if with_addresses:
+                hdr.msg_name = names_addr + idx * _SOCKADDR_STORAGE_SIZE
+
+    def receive(
+        self, sock: socket.socket, max_count: int | None = None
+    ) -> list[tuple[bytearray, tuple | None]]:
+        """Receive all datagrams which are available, up to the batch size, without blocking.
+
+        :param max_count: Receive at most this many datagrams if it is below the batch size.
+        :return: List of datagrams and sender addresses. The addresses are None if the receiver
+            was created without address support.
+        """
+        vlen = self.batch_size if max_count is None else min(max_count, self.batch_size)
+        if self.with_addresses:
+            for idx in range(vlen):
+                self._hdrs[idx].msg_hdr.msg_namelen = _SOCKADDR_STORAGE_SIZE
+        count = _LIBC.recvmmsg(sock.fileno(), self._hdrs, vlen, MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return []
+            raise OSError(err, os.strerror(err))
+        raw = memoryview(self._data)
+        names = memoryview(self._names)
+        packets = []
+        for idx in range(count):
+            start = idx * self.max_recv_size
+            packet = bytearray(raw[start : start + self._hdrs[idx].msg_len])
+            addr = None
+            if self.with_addresses:
+                name_start = idx * _SOCKADDR_STORAGE_SIZE
+                addr = parse_sockaddr(bytes(names[name_start : name_start + 28]))
+            packets.append((packet, addr))
+        return packets
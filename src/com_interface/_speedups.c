@@ -0,0 +1,305 @@
+/*
+ * Optional accelerator for the frame parsers of the com_interface.framing module.
+ *
+ * Every function processes a whole parse buffer in one call and mirrors the pure Python
+ * implementation of the corresponding parser exactly, including the error accounting. The
+ * Python parsers keep ownership of their buffers and only delegate the scan and decode loops.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+#define STX_CHAR 0x02
+#define ETX_CHAR 0x03
+#define DLE_CHAR 0x10
+#define ESCAPE_JUMP 0x40
+#define ESCAPED_STX 0x42
+#define ESCAPED_ETX 0x43
+#define ESCAPED_CR 0x4D
+
+/* Index of the first occurrence of the byte in buf[start:end], or -1. */
+static Py_ssize_t find_byte(const unsigned char *buf, Py_ssize_t start, Py_ssize_t end,
+                            unsigned char byte) {
+    const unsigned char *found;
+    if (start >= end) {
+        return -1;
+    }
+    found = memchr(buf + start, byte, (size_t)(end - start));
+    return found == NULL ? -1 : (Py_ssize_t)(found - buf);
+}
+
+/*
+ * Decode one COBS block sequence without delimiters. Returns the decoded length, or -1 if the
+ * data is not valid COBS. The output must provide at least len bytes.
+ */
+static Py_ssize_t cobs_decode_block(const unsigned char *in, Py_ssize_t len, unsigned char *out) {
+    Py_ssize_t idx = 0;
+    Py_ssize_t out_len = 0;
+    while (idx < len) {
+        unsigned char code = in[idx];
+        Py_ssize_t block_end;
+        if (code == 0) {
+            return -1;
+        }
+        idx++;
+        block_end = idx + code - 1;
+        if (block_end > len || find_byte(in, idx, block_end, 0) >= 0) {
+            return -1;
+        }
+        memcpy(out + out_len, in + idx, (size_t)(block_end - idx));
+        out_len += block_end - idx;
+        idx = block_end;
+        if (idx < len && code < 0xFF) {
+            out[out_len++] = 0;
+        }
+    }
+    return out_len;
+}
+
+PyDoc_STRVAR(cobs_parse_doc,
+             "cobs_parse(buf, start, idx) -> (frames, start, error_count)\n\n"
+             "Decode all complete COBS frames which follow the delimiter at index start.\n"
+             "The delimiter search begins at index idx. Returns the decoded non-empty frames,\n"
+             "the index of the last delimiter and the number of frames which could not be\n"
+             "decoded.");
+
+static PyObject *cobs_parse(PyObject *self, PyObject *args) {
+    Py_buffer view;
+    Py_ssize_t start;
+    Py_ssize_t idx;
+    Py_ssize_t error_count = 0;
+    PyObject *frames;
+    PyObject *result = NULL;
+    const unsigned char *buf;
+
+    if (!PyArg_ParseTuple(args, "y*nn", &view, &start, &idx)) {
+        return NULL;
+    }
+    buf = (const unsigned char *)view.buf;
+    frames = PyList_New(0);
+    if (frames == NULL) {
+        goto out;
+    }
+    while (1) {
+        Py_ssize_t end = find_byte(buf, idx, view.len, 0);
+        if (end < 0) {
+            break;
+        }
+        if (end > start + 1) {
+            Py_ssize_t encoded_len = end - start - 1;
+            Py_ssize_t decoded_len;
+            PyObject *frame = PyBytes_FromStringAndSize(NULL, encoded_len);
+            if (frame == NULL) {
+                goto error;
+            }
+            decoded_len = cobs_decode_block(buf + start + 1, encoded_len,
+                                            (unsigned char *)PyBytes_AS_STRING(frame));
+            if (decoded_len < 0) {
+                error_count++;
+                Py_DECREF(frame);
+            } else if (decoded_len == 0) {
+                Py_DECREF(frame);
+            } else {
+                if (decoded_len != encoded_len && _PyBytes_Resize(&frame, decoded_len) < 0) {
+                    goto error;
+                }
+                if (PyList_Append(frames, frame) < 0) {
+                    Py_DECREF(frame);
+                    goto error;
+                }
+                Py_DECREF(frame);
+            }
+        }
+        start = end;
+        idx = end + 1;
+    }
+    result = Py_BuildValue("Nnn", frames, start, error_count);
+    goto out;
+error:
+    Py_DECREF(frames);
+out:
+    PyBuffer_Release(&view);
+    return result;
+}
+
+PyDoc_STRVAR(cobs_decode_into_doc,
+             "cobs_decode_into(buf, start, end, out, offset) -> decoded_len\n\n"
+             "Decode the COBS data in buf[start:end], which must not contain delimiters,\n"
+             "directly into the writable buffer out, starting at index offset. Returns the\n"
+             "number of decoded bytes, or -1 if the data is not valid COBS.");
+
+static PyObject *cobs_decode_into(PyObject *self, PyObject *args) {
+    Py_buffer view;
+    Py_buffer out;
+    Py_ssize_t start;
+    Py_ssize_t end;
+    Py_ssize_t offset;
+    PyObject *result = NULL;
+
+    if (!PyArg_ParseTuple(args, "y*nnw*n", &view, &start, &end, &out, &offset)) {
+        return NULL;
+    }
+    if (start < 0 || end < start || end > view.len || offset < 0 ||
+        out.len - offset < end - start) {
+        PyErr_SetString(PyExc_ValueError, "invalid range for the COBS data or output buffer");
+    } else {
+        result = PyLong_FromSsize_t(cobs_decode_block((const unsigned char *)view.buf + start,
+                                                      end - start,
+                                                      (unsigned char *)out.buf + offset));
+    }
+    PyBuffer_Release(&out);
+    PyBuffer_Release(&view);
+    return result;
+}
+
+/*
+ * Decode the escaped DLE frame contents in buf[start:end]. Returns a new bytearray, Py_None
+ * (new reference) for invalid escape sequences or NULL on errors.
+ */
+static PyObject *dle_decode_frame(const unsigned char *buf, Py_ssize_t start, Py_ssize_t end,
+                                  int escape_cr) {
+    Py_ssize_t idx = start;
+    Py_ssize_t out_len = 0;
+    unsigned char *out;
+    PyObject *frame = PyByteArray_FromStringAndSize(NULL, end - start);
+    if (frame == NULL) {
+        return NULL;
+    }
+    out = (unsigned char *)PyByteArray_AS_STRING(frame);
+    while (1) {
+        unsigned char next_byte;
+        Py_ssize_t dle_idx = find_byte(buf, idx, end, DLE_CHAR);
+        if (dle_idx < 0) {
+            memcpy(out + out_len, buf + idx, (size_t)(end - idx));
+            out_len += end - idx;
+            break;
+        }
+        memcpy(out + out_len, buf + idx, (size_t)(dle_idx - idx));
+        out_len += dle_idx - idx;
+        if (dle_idx + 1 >= end) {
+            Py_DECREF(frame);
+            Py_RETURN_NONE;
+        }
+        next_byte = buf[dle_idx + 1];
+        if (next_byte == DLE_CHAR) {
+            out[out_len++] = DLE_CHAR;
+        } else if (next_byte == ESCAPED_STX || next_byte == ESCAPED_ETX ||
+                   (escape_cr && next_byte == ESCAPED_CR)) {
+            out[out_len++] = next_byte - ESCAPE_JUMP;
+        } else {
+            Py_DECREF(frame);
+            Py_RETURN_NONE;
+        }
+        idx = dle_idx + 2;
+    }
+    if (PyByteArray_Resize(frame, out_len) < 0) {
+        Py_DECREF(frame);
+        return NULL;
+    }
+    return frame;
+}
+
+PyDoc_STRVAR(dle_parse_doc,
+             "dle_parse(buf, start, idx, escape_cr, max_frame) -> "
+             "(frames, start, idx, error_count, dropped_count)\n\n"
+             "Decode all complete escaped DLE frames. start is the index of the STX character\n"
+             "of the current frame or -1, and idx is the index at which the search resumes.\n"
+             "A negative max_frame disables the frame size check. A returned start of -1 means\n"
+             "that the whole buffer can be discarded.");
+
+static PyObject *dle_parse(PyObject *self, PyObject *args) {
+    Py_buffer view;
+    Py_ssize_t start;
+    Py_ssize_t idx;
+    int escape_cr;
+    Py_ssize_t max_frame;
+    Py_ssize_t error_count = 0;
+    Py_ssize_t dropped_count = 0;
+    PyObject *frames;
+    PyObject *result = NULL;
+    const unsigned char *buf;
+    Py_ssize_t len;
+
+    if (!PyArg_ParseTuple(args, "y*nnpn", &view, &start, &idx, &escape_cr, &max_frame)) {
+        return NULL;
+    }
+    buf = (const unsigned char *)view.buf;
+    len = view.len;
+    frames = PyList_New(0);
+    if (frames == NULL) {
+        goto out;
+    }
+    while (1) {
+        Py_ssize_t end;
+        Py_ssize_t next_start;
+        if (start < 0) {
+            start = find_byte(buf, idx, len, STX_CHAR);
+            if (start < 0) {
+                /* Discard everything which can not be part of a frame. */
+                idx = 0;
+                break;
+            }
+            idx = start + 1;
+        }
+        end = find_byte(buf, idx, len, ETX_CHAR);
+        next_start = find_byte(buf, idx, end >= 0 ? end : len, STX_CHAR);
+        if (next_start >= 0) {
+            /* Start marker without end marker. The frame was not terminated properly. */
+            dropped_count++;
+            start = next_start;
+            idx = start + 1;
+            continue;
+        }
+        if (end < 0) {
+            if (max_frame >= 0 && len - start - 1 >= max_frame) {
+                dropped_count++;
+                start = -1;
+                idx = 0;
+            } else {
+                idx = len;
+            }
+            break;
+        }
+        if (max_frame >= 0 && end - start > max_frame) {
+            dropped_count++;
+        } else {
+            PyObject *frame = dle_decode_frame(buf, start + 1, end, escape_cr);
+            if (frame == NULL) {
+                goto error;
+            }
+            if (frame == Py_None) {
+                error_count++;
+            } else if (PyList_Append(frames, frame) < 0) {
+                Py_DECREF(frame);
+                goto error;
+            }
+            Py_DECREF(frame);
+        }
+        start = -1;
+        idx = end + 1;
+    }
+    result = Py_BuildValue("Nnnnn", frames, start, idx, error_count, dropped_count);
+    goto out;
+error:
+    Py_DECREF(frames);
+out:
+    PyBuffer_Release(&view);
+    return result;
+}
+
+static PyMethodDef speedups_methods[] = {
+    {"cobs_parse", cobs_parse, METH_VARARGS, cobs_parse_doc},
+    {"cobs_decode_into", cobs_decode_into, METH_VARARGS, cobs_decode_into_doc},
+    {"dle_parse", dle_parse, METH_VARARGS, dle_parse_doc},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef speedups_module = {
+    PyModuleDef_HEAD_INIT,
+    "_speedups",
+    "Optional accelerator for the com_interface frame parsers.",
+    -1,
+    speedups_methods,
+};
+
+PyMODINIT_FUNC PyInit__speedups(void) { return PyModule_Create(&speedups_module); }
@@ -0,0 +1,168 @@
+"""asyncio based communication module. Provides the :py:class:`AsyncComInterface` abstraction,
+which mirrors :py:class:`com_interface.ComInterface` with coroutines, and native asyncio
+implementations for the TCP, UDP and serial transports.
+
+The implementations do not spawn any threads. All reception is driven by the running event loop,
+so many interfaces can share one thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from com_interface.hooks import Hookable
+from com_interface.metrics import InterfaceMetrics
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Iterable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncComInterface(Hookable, ABC):
+    """Generic form of an asyncio based communication interface.
+
+    In addition to the :py:meth:`receive` call, all received packets can be consumed with an
+    ``async for`` loop, which ends after the interface was closed:
+
+    .. code-block:: python
+
+        async for packet in com_if:
+            handle_packet(packet)
+
+    Tracing hooks can be registered with :py:meth:`add_hook`, see :py:mod:`com_interface.hooks`.
+    """
+
+    # Concrete interfaces create their metrics in the constructor.
+    _metrics: InterfaceMetrics | None = None
+
+    @property
+    @abstractmethod
+    def id(self) -> str:
+        pass
+
+    @property
+    def metrics(self) -> InterfaceMetrics:
+        """Metrics of the interface, see :py:mod:`com_interface.metrics`. The counters of
+        interfaces which do not update the metrics stay at zero."""
+        if self._metrics is None:
+            self._metrics = InterfaceMetrics()
+        return self._metrics
+
+    @abstractmethod
+    async def open(self, args: Any = None) -> None:
+        """Opens the communication interface to allow communication."""
+
+    @abstractmethod
+    def is_open(self) -> bool:
+        """Can be used to check whether the communication interface is open."""
+
+    @abstractmethod
+    async def close(self, args: Any = None) -> None:
+        """Closes the communication interface and releases any held resources."""
+
+    @abstractmethod
+    async def send(self, data: bytes | bytearray) -> None:
+        """Send raw data.
+
+        :raises SendError: Sending failed for some reason.
+        """
+
+    async def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Send multiple packets. The default implementation awaits :py:meth:`send` for every
+        packet.
+
+        :raises SendError: Sending failed for some reason.
+        """
+        for packet in packets:
+            await self.send(packet)
+
+    @abstractmethod
+    async def receive(self, parameters: Any = 0) -> list[bytes]:
+        """Returns a list of all packets received so far. This call does not wait for new
+        packets. Use :py:meth:`wait_packets` or the async iterator to wait for packets."""
+
+    @abstractmethod
+    def packets_available(self, parameters: Any = 0) -> int:
+        """Returns the number of packets which can be retrieved with :py:meth:`receive`."""
+
+    @abstractmethod
+    async def wait_packets(self, timeout: float | None = None) -> int:
+        """Wait until packets are available, the interface was closed or the timeout expired.
+
+        :return: Number of packets available.
+        """
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iter_packets()
+
+    async def _iter_packets(self) -> AsyncIterator[bytes]:
+        # Without a timeout, waiting only returns without packets once the interface was closed
+        # and all packets were consumed.
+        while await self.wait_packets() > 0:
+            for packet in await self.receive():
+                yield packet
+
+
+class AsyncPacketQueue:
+    """Packet storage which can be awaited. Used by the asyncio interface implementations to
+    hand packets from the protocol callbacks to the consumer.
+
+    The queue has to be bound to the running event loop with :py:meth:`bind` before it can be
+    awaited.
+    """
+
+    def __init__(self, maxlen: int | None = None, metrics: InterfaceMetrics | None = None):
+        """
+        :param maxlen: Oldest packets will be overwritten if more packets are stored.
+        :param metrics: Metrics which count the received, dropped and delivered packets.
+        """
+        self._packets: deque[bytes] = deque(maxlen=maxlen)
+        self._metrics = metrics
+        self._event: asyncio.Event | None = None
+        self._closed = True
+
+    def bind(self) -> None:
+        """Create the internal event. Needs to be called from within the running event loop."""
+        self._event = asyncio.Event()
+        self._closed = False
+
+    def put(self, packet: bytes) -> None:
+        if self._metrics is not None:
+            self._metrics.packets_received(1)
+        if self._packets.maxlen is not None and len(self._packets) == self._packets.maxlen:
+            _LOGGER.warning("Number of packets in queue too large. Overwriting old packets..")
+            if self._metrics is not None:
+                self._metrics.dropped_packets += 1
+        self._packets.append(packet)
+        if self._event is not None:
+            self._event.set()
+
+    def pop_all(self) -> list[bytes]:
+        packets = list(self._packets)
+        self._packets.clear()
+        if self._event is not None:
+            self._event.clear()
+        if self._metrics is not None:
+            self._metrics.packets_delivered(len(packets))
+        return packets
+
+    def close(self) -> None:
+        """Wake up all waiting consumers because no further packets will arrive."""
+        self._closed = True
+        if self._event is not None:
+            self._event.set()
+
+    async def wait(self, timeout: float | None = None) -> int:
+        if not self._packets and not self._closed and self._event is not None:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._event.wait(), timeout)
+        return len(self._packets)
+
+    def __len__(self) -> int:
+        return len(self._packets)
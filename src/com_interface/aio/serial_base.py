@@ -0,0 +1,153 @@
+"""Common base for the asyncio based serial communication interfaces.
+
+The serial port file descriptor is registered with :py:meth:`asyncio.loop.add_reader`, so these
+interfaces require an event loop with file descriptor support and are only available on POSIX
+systems.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from abc import abstractmethod
+from typing import TYPE_CHECKING, Any
+
+import serial
+
+from com_interface import SendError
+from com_interface.aio import AsyncComInterface, AsyncPacketQueue
+from com_interface.hooks import HookEvent
+from com_interface.metrics import InterfaceMetrics
+from com_interface.serial_base import SerialCfg, SerialComBase, SerialCommunicationType
+
+if TYPE_CHECKING:
+    import logging
+    from collections.abc import Iterable
+
+
+class AsyncSerialComBase(SerialComBase, AsyncComInterface):
+    """Base class for asyncio based serial interfaces. Child classes only need to implement the
+    frame encoding and the handling of received raw data."""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        ser_cfg: SerialCfg,
+        ser_com_type: SerialCommunicationType,
+        max_packets_stored: int | None = None,
+    ):
+        super().__init__(logger, ser_cfg=ser_cfg, ser_com_type=ser_com_type)
+        self._metrics = InterfaceMetrics(self._metric_gauges)
+        self._packets = AsyncPacketQueue(max_packets_stored, self._metrics)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._write_lock: asyncio.Lock | None = None
+
+    @property
+    def id(self) -> str:
+        return self.ser_cfg.com_if_id
+
+    @abstractmethod
+    def encode_data(self, data: bytes | bytearray) -> bytes | bytearray:
+        """Encode a packet into a frame which can be written to the serial port."""
+
+    @abstractmethod
+    def _handle_received_bytes(self, data: bytes) -> None:
+        """Parse received raw data and put decoded packets into the packet queue."""
+
+    async def open(self, args: Any = None) -> None:
+        if self.is_open():
+            return
+        self.open_port()
+        assert self.serial is not None
+        # The port is only read when the file descriptor is readable, so reads never block.
+        self.serial.timeout = 0
+        self._loop = asyncio.get_running_loop()
+        self._write_lock = asyncio.Lock()
+        self._packets.bind()
+        self._loop.add_reader(self.serial.fileno(), self._on_readable)
+
+    def is_open(self) -> bool:
+        return self.is_port_open()
+
+    async def close(self, args: Any = None) -> None:
+        if self.serial is None:
+            return
+        assert self._loop is not None
+        self._loop.remove_reader(self.serial.fileno())
+        self.close_port()
+        self._packets.close()
+
+    async def send(self, data: bytes | bytearray) -> None:
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        await self._write(self.encode_data(data), 1)
+
+    async def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Encode all packets into one buffer which is then written to the serial port."""
+        if self._hooks is not None:
+            packets = list(packets)
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        frames = [self.encode_data(packet) for packet in packets]
+        await self._write(b"".join(frames), len(frames))
+
+    async def _write(self, frames: bytes | bytearray, num_packets: int) -> None:
+        if self.serial is None:
+            raise SendError("serial port is not open", None)
+        assert self._write_lock is not None
+        remaining = memoryview(frames)
+        fd = self.serial.fileno()
+        # The lock ensures that frames of concurrent senders are not interleaved.
+        async with self._write_lock:
+            while len(remaining) > 0:
+                written = self._write_some(fd, remaining)
+                if written == 0:
+                    await self._wait_writable(fd)
+                remaining = remaining[written:]
+        self._metrics.packets_sent(num_packets, len(frames))
+
+    async def receive(self, parameters: Any = 0) -> list[bytes]:
+        packets = self._packets.pop_all()
+        if self._hooks is not None and packets:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packets)
+        return packets
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        return len(self._packets)
+
+    async def wait_packets(self, timeout: float | None = None) -> int:
+        return await self._packets.wait(timeout)
+
+    def _metric_gauges(self) -> dict[str, int]:
+        return {"rx_queue_depth": len(self._packets)}
+
+    @staticmethod
+    def _write_some(fd: int, data: memoryview) -> int:
+        try:
+            return os.write(fd, data)
+        except BlockingIOError:
+            return 0
+        except OSError as e:
+            raise SendError(f"serial write failed: {e}", e) from e
+
+    async def _wait_writable(self, fd: int) -> None:
+        assert self._loop is not None
+        writable = self._loop.create_future()
+        self._loop.add_writer(fd, lambda: writable.done() or writable.set_result(None))
+        try:
+            await writable
+        finally:
+            self._loop.remove_writer(fd)
+
+    def _on_readable(self) -> None:
+        assert self.serial is not None
+        try:
+            # With a timeout of 0, this only returns the bytes which are already available.
+            data = self.serial.read(self.ser_cfg.read_chunk_size)
+        except serial.SerialException:
+            self.logger.exception("Serial port read failure")
+            return
+        if len(data) > 0:
+            self._metrics.bytes_received(len(data))
+            if self._hooks is not None:
+                self._hooks.emit(self, HookEvent.BYTES_RECEIVED, data)
+            self._handle_received_bytes(data)
@@ -0,0 +1,45 @@
+"""asyncio based serial COBS communication interface"""
+
+from __future__ import annotations
+
+import logging
+
+from com_interface.aio.serial_base import AsyncSerialComBase
+from com_interface.framing import CobsFrameParser
+from com_interface.hooks import HookEvent
+from com_interface.serial_base import SerialCfg, SerialCommunicationType
+from com_interface.serial_cobs import SerialCobsComIF
+
+
+class AsyncSerialCobsComIF(AsyncSerialComBase):
+    """asyncio counterpart of :py:class:`com_interface.serial_cobs.SerialCobsComIF`. Received
+    frames are decoded inside the event loop as soon as the serial port becomes readable."""
+
+    def __init__(self, ser_cfg: SerialCfg, max_packets_stored: int | None = None):
+        super().__init__(
+            logging.getLogger(__name__),
+            ser_cfg=ser_cfg,
+            ser_com_type=SerialCommunicationType.COBS,
+            max_packets_stored=max_packets_stored,
+        )
+        self._parser = CobsFrameParser()
+
+    @property
+    def parsing_error_count(self) -> int:
+        """Number of received frames which could not be decoded."""
+        return self._parser.parsing_error_count
+
+    def _metric_gauges(self) -> dict[str, int]:
+        return {**super()._metric_gauges(), "decode_errors": self.parsing_error_count}
+
+    @staticmethod
+    def encode_data(data: bytes | bytearray) -> bytearray:
+        return SerialCobsComIF.encode_data(data)
+
+    def _handle_received_bytes(self, data: bytes) -> None:
+        self._parser.feed(data)
+        packets = self._parser.parse()
+        if self._hooks is not None and packets:
+            self._hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        for packet in packets:
+            self._packets.put(packet)
@@ -0,0 +1,62 @@
+"""asyncio based serial DLE communication interface"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from dle_encoder import DleEncoder
+
+from com_interface.aio.serial_base import AsyncSerialComBase
+from com_interface.framing import DleFrameParser
+from com_interface.hooks import HookEvent
+from com_interface.serial_base import SerialCfg, SerialCommunicationType
+
+if TYPE_CHECKING:
+    from com_interface.serial_dle import DleCfg
+
+
+class AsyncSerialDleComIF(AsyncSerialComBase):
+    """asyncio counterpart of :py:class:`com_interface.serial_dle.SerialDleComIF`. Received
+    frames are decoded inside the event loop as soon as the serial port becomes readable."""
+
+    def __init__(self, ser_cfg: SerialCfg, dle_cfg: DleCfg | None):
+        super().__init__(
+            logging.getLogger(__name__),
+            ser_cfg=ser_cfg,
+            ser_com_type=SerialCommunicationType.DLE_ENCODING,
+            max_packets_stored=dle_cfg.dle_queue_len if dle_cfg else None,
+        )
+        self.dle_cfg = dle_cfg
+        self._encoder = DleEncoder()
+        self._parser = DleFrameParser(
+            escape_cr=self._encoder.escape_cr,
+            max_frame=dle_cfg.dle_max_frame if dle_cfg else None,
+        )
+
+    @property
+    def parsing_error_count(self) -> int:
+        """Number of received frames which could not be decoded."""
+        return self._parser.parsing_error_count
+
+    @property
+    def dropped_frame_count(self) -> int:
+        """Number of unterminated or oversized frames which were dropped."""
+        return self._parser.dropped_frame_count
+
+    def _metric_gauges(self) -> dict[str, int]:
+        return {
+            **super()._metric_gauges(),
+            "decode_errors": self.parsing_error_count + self.dropped_frame_count,
+        }
+
+    def encode_data(self, data: bytes | bytearray) -> bytearray:
+        return self._encoder.encode(source_packet=data, add_stx_etx=True)
+
+    def _handle_received_bytes(self, data: bytes) -> None:
+        self._parser.feed(data)
+        packets = self._parser.parse()
+        if self._hooks is not None and packets:
+            self._hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        for packet in packets:
+            self._packets.put(packet)
@@ -0,0 +1,173 @@
+"""asyncio based TCP communication interface"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import TYPE_CHECKING, Any
+
+from com_interface import SendError
+from com_interface.aio import AsyncComInterface, AsyncPacketQueue
+from com_interface.framing import SpacePacketFramer
+from com_interface.hooks import HookEvent
+from com_interface.metrics import InterfaceMetrics
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from spacepackets.ccsds.spacepacket import PacketId
+
+    from com_interface.framing import Framer
+    from com_interface.ip_utils import EthAddr
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AsyncTcpSpacepacketsClient(AsyncComInterface):
+    """asyncio counterpart of :py:class:`com_interface.tcp.TcpSpacepacketsClient`. This interface
+    expects raw space packets to be sent via TCP and uses a list of passed packet IDs to parse for
+    them. It uses :py:func:`asyncio.open_connection` and a reader task instead of a thread.
+    """
+
+    def __init__(
+        self,
+        com_if_id: str,
+        space_packet_ids: Sequence[PacketId],
+        target_address: EthAddr,
+        max_packets_stored: int | None = None,
+        max_recv_size: int = 4096,
+        framer: Framer | None = None,
+    ):
+        """Initialize a communication interface to send and receive TMTC via TCP.
+
+        :param com_if_id:
+        :param space_packet_ids: Valid packet IDs for CCSDS space packets. Those will be used
+            to parse for space packets inside the TCP stream.
+        :param max_packets_stored: Oldest packets will be overwritten if more packets are stored.
+        :param max_recv_size: Maximum number of bytes read from the stream at once.
+        :param framer: Framer used instead of space packet parsing, see
+            :py:class:`com_interface.tcp.TcpSpacepacketsClient`.
+        """
+        self.com_if_id = com_if_id
+        self.space_packet_ids = space_packet_ids
+        self.framer = framer if framer is not None else SpacePacketFramer(space_packet_ids)
+        self.target_address = target_address
+        self.max_recv_size = max_recv_size
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
+        self._packets = AsyncPacketQueue(max_packets_stored, self._metrics)
+        self.__connection_count = 0
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+
+    @property
+    def id(self) -> str:
+        return self.com_if_id
+
+    async def open(self, args: Any = None) -> None:
+        if self.is_open():
+            return
+        self._reader, self._writer = await asyncio.open_connection(*self.target_address.to_tuple)
+        self.framer.clear()
+        if self.__connection_count > 0:
+            self._metrics.reconnects += 1
+        self.__connection_count += 1
+        self._packets.bind()
+        self._reader_task = asyncio.ensure_future(self._read_stream())
+
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def close(self, args: Any = None) -> None:
+        if self._writer is None:
+            return
+        writer = self._writer
+        self._writer = None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader_task
+            self._reader_task = None
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+        self._packets.close()
+
+    async def send(self, data: bytes | bytearray) -> None:
+        if self._writer is None:
+            raise SendError("TCP connection is not open", None)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        encoded_data = self.framer.encode(data)
+        try:
+            self._writer.write(encoded_data)
+            await self._writer.drain()
+        except ConnectionError as e:
+            raise SendError(f"{e}", e) from e
+        self._metrics.packets_sent(1, len(encoded_data))
+
+    async def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Write all packets to the stream and wait for the stream to be drained only once."""
+        if self._writer is None:
+            raise SendError("TCP connection is not open", None)
+        packets = list(packets)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        encoded_data = self.framer.encode_many(packets)
+        try:
+            self._writer.write(encoded_data)
+            await self._writer.drain()
+        except ConnectionError as e:
+            raise SendError(f"{e}", e) from e
+        self._metrics.packets_sent(len(packets), len(encoded_data))
+
+    async def receive(self, parameters: Any = 0) -> list[bytes]:
+        packets = self._packets.pop_all()
+        if self._hooks is not None and packets:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packets)
+        return packets
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        return len(self._packets)
+
+    async def wait_packets(self, timeout: float | None = None) -> int:
+        return await self._packets.wait(timeout)
+
+    def __metric_gauges(self) -> dict[str, int]:
+        return {
+            "rx_queue_depth": len(self._packets),
+            "decode_errors": self.framer.parsing_error_count,
+        }
+
+    async def _read_stream(self) -> None:
+        assert self._reader is not None
+        # TCP is stream based, so there might be broken packets or multiple packets in one read
+        # call. The framer buffers incomplete packets.
+        try:
+            while True:
+                data = await self._reader.read(self.max_recv_size)
+                if len(data) == 0:
+                    _LOGGER.info("TCP server has been closed")
+                    break
+                self._metrics.bytes_received(len(data))
+                hooks = self._hooks
+                if hooks is not None:
+                    hooks.emit(self, HookEvent.BYTES_RECEIVED, data)
+                packets = self.framer.feed(data)
+                if hooks is not None and packets:
+                    hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+                for packet in packets:
+                    self._packets.put(packet)
+        except ConnectionError:
+            _LOGGER.exception("TCP connection error")
+        # The peer closed the connection, so no further packets will arrive and the interface is
+        # closed. The stored packets can still be received.
+        writer = self._writer
+        self._writer = None
+        self._reader_task = None
+        self._packets.close()
+        if writer is not None:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
@@ -0,0 +1,112 @@
+"""asyncio based UDP communication interface"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import socket
+from typing import TYPE_CHECKING, Any
+
+from com_interface import SendError
+from com_interface.aio import AsyncComInterface, AsyncPacketQueue
+from com_interface.hooks import HookEvent
+from com_interface.metrics import InterfaceMetrics
+
+if TYPE_CHECKING:
+    from com_interface.ip_utils import EthAddr
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(
+        self, com_if: AsyncComInterface, packets: AsyncPacketQueue, metrics: InterfaceMetrics
+    ):
+        self.com_if = com_if
+        self.packets = packets
+        self.metrics = metrics
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self.metrics.bytes_received(len(data))
+        hooks = self.com_if._hooks
+        if hooks is not None:
+            # Every datagram contains exactly one packet.
+            hooks.emit(self.com_if, HookEvent.BYTES_RECEIVED, data)
+            hooks.emit(self.com_if, HookEvent.FRAMES_DECODED, [data])
+        self.packets.put(data)
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.warning(f"UDP error received: {exc}")
+
+
+class AsyncUdpClient(AsyncComInterface):
+    """asyncio counterpart of :py:class:`com_interface.udp.UdpClient`, which uses a
+    :py:class:`asyncio.DatagramProtocol` to receive datagrams."""
+
+    def __init__(
+        self,
+        com_if_id: str,
+        send_address: EthAddr,
+        recv_addr: EthAddr | None = None,
+        max_packets_stored: int | None = None,
+    ):
+        """Initialize a communication interface to send and receive UDP datagrams.
+
+        :param send_address:
+        :param recv_addr: Optional address the socket is bound to.
+        :param max_packets_stored: Oldest packets will be overwritten if more packets are stored.
+        """
+        self.com_if_id = com_if_id
+        self.send_address = send_address
+        self.recv_addr = recv_addr
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
+        self._packets = AsyncPacketQueue(max_packets_stored, self._metrics)
+        self._transport: asyncio.DatagramTransport | None = None
+
+    @property
+    def id(self) -> str:
+        return self.com_if_id
+
+    async def open(self, args: Any = None) -> None:
+        if self.is_open():
+            return
+        loop = asyncio.get_running_loop()
+        self._packets.bind()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpProtocol(self, self._packets, self._metrics),
+            local_addr=self.recv_addr.to_tuple if self.recv_addr is not None else None,
+            family=socket.AF_INET,
+        )
+
+    def is_open(self) -> bool:
+        return self._transport is not None
+
+    async def close(self, args: Any = None) -> None:
+        if self._transport is None:
+            return
+        self._transport.close()
+        self._transport = None
+        self._packets.close()
+
+    async def send(self, data: bytes | bytearray) -> None:
+        if self._transport is None:
+            raise SendError("UDP socket is not open", None)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        self._transport.sendto(data, self.send_address.to_tuple)
+        self._metrics.packets_sent(1, len(data))
+
+    async def receive(self, parameters: Any = 0) -> list[bytes]:
+        packets = self._packets.pop_all()
+        if self._hooks is not None and packets:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packets)
+        return packets
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        return len(self._packets)
+
+    async def wait_packets(self, timeout: float | None = None) -> int:
+        return await self._packets.wait(timeout)
+
+    def __metric_gauges(self) -> dict[str, int]:
+        return {"rx_queue_depth": len(self._packets)}
@@ -0,0 +1,501 @@
+"""Recording and replay of the traffic of communication interfaces.
+
+:py:class:`CaptureComIF` wraps any :py:class:`com_interface.ComInterface` and records every sent
+and received packet into a capture file. :py:class:`ReplayComIF` serves the received packets of
+such a file through the regular interface API, which allows to reproduce recorded sessions
+offline:
+
+.. code-block:: python
+
+    writer = CaptureWriter("session.cap")
+    com_if = CaptureComIF(TcpSpacepacketsClient(...), writer)
+    ...
+    writer.close()
+
+    replay = ReplayComIF("session.cap", speed=1.0)
+    replay.open()
+    packets = replay.receive()
+
+The capture file starts with the 8 byte file header ``b"COMCAP"`` followed by the little endian
+16 bit format version. It is followed by the records, each of which consists of
+
+- the wall clock timestamp in nanoseconds as a signed 64 bit integer
+- the :py:class:`CaptureDirection` as an unsigned 8 bit integer
+- the length of the UTF-8 encoded interface ID as an unsigned 8 bit integer
+- the length of the payload as an unsigned 32 bit integer
+- the interface ID and the payload
+
+All integers are little endian. Records are only appended, so a file can be extended by
+multiple sessions and is read with :py:mod:`mmap` without loading it into memory.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import enum
+import io
+import logging
+import mmap
+import struct
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from com_interface import ComInterface
+from com_interface.hooks import HookEvent
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import ReceptionSignal
+
+if TYPE_CHECKING:
+    import os
+    from collections.abc import Iterable, Iterator
+
+    from com_interface.hub import PacketCallback
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"COMCAP"
+CAPTURE_VERSION = 1
+_FILE_HEADER = struct.Struct("<6sH")
+_RECORD_HEADER = struct.Struct("<qBBI")
+
+
+class CaptureFormatError(Exception):
+    """The file is not a valid capture file."""
+
+
+class CaptureDirection(enum.IntEnum):
+    RX = 0
+    TX = 1
+
+
+@dataclasses.dataclass
+class CaptureRecord:
+    timestamp_ns: int
+    direction: CaptureDirection
+    com_if_id: str
+    payload: bytes
+
+
+class CaptureWriter:
+    """Appends records to a capture file.
+
+    The records are written into a user space buffer which is only flushed to the file once it
+    is full, when :py:meth:`flush` is called or when the writer is closed. The writer can be
+    shared by multiple interfaces and threads.
+    """
+
+    def __init__(self, path: str | os.PathLike, buffer_size: int = 1 << 20):
+        """
+        :param path: Capture file. A new file is created if it does not exist, otherwise the
+            records are appended.
+        :param buffer_size: Size of the write buffer in bytes.
+        :raises CaptureFormatError: The existing file is not a capture file.
+        """
+        self.path = path
+        self.__file = open(path, "ab", buffering=buffer_size)  # noqa: SIM115
+        if self.__file.tell() == 0:
+            self.__file.write(_FILE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION))
+        else:
+            with open(path, "rb") as existing_file:
+                _check_file_header(existing_file.read(_FILE_HEADER.size))
+        self.__encoded_ids: dict[str, bytes] = {}
+        self.__lock = threading.Lock()
+
+    def write(
+        self,
+        direction: CaptureDirection,
+        com_if_id: str,
+        payload: bytes | bytearray | memoryview,
+        timestamp_ns: int | None = None,
+    ) -> None:
+        """Append a record.
+
+        :param timestamp_ns: Wall clock timestamp of the record. The current time is used if
+            this is None.
+        :raises ValueError: The encoded interface ID is longer than 255 bytes.
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        encoded_id = self.__encoded_ids.get(com_if_id)
+        if encoded_id is None:
+            encoded_id = com_if_id.encode()
+            if len(encoded_id) > 0xFF:
+                raise ValueError(f"interface ID {com_if_id!r} is too long for a capture file")
+            self.__encoded_ids[com_if_id] = encoded_id
+        header = _RECORD_HEADER.pack(timestamp_ns, direction, len(encoded_id), len(payload))
+        with self.__lock:
+            self.__file.writelines((header, encoded_id, payload))
+
+    def flush(self) -> None:
+        with self.__lock:
+            self.__file.flush()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+
+class CaptureReader:
+    """Reads the records of a capture file, which is mapped into memory.
+
+    A truncated record at the end of the file, for example because the recording process was
+    killed, is ignored.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        """
+        :raises CaptureFormatError: The file is not a capture file.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            _check_file_header(file.read(_FILE_HEADER.size))
+            self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__decoded_ids: dict[bytes, str] = {}
+
+    def records(self) -> Iterator[CaptureRecord]:
+        data = self.__mmap
+        for payload_start, next_offset, timestamp_ns, direction, com_if_id in self.scan():
+            yield CaptureRecord(
+                timestamp_ns,
+                CaptureDirection(direction),
+                com_if_id,
+                data[payload_start:next_offset],
+            )
+
+    def scan(self, offset: int = _FILE_HEADER.size) -> Iterator[tuple[int, int, int, int, str]]:
+        """Iterate over the record headers without copying the payloads, starting at the given
+        file offset. The payloads can be read later with :py:meth:`read_payload`.
+
+        :param offset: File offset of a record. Defaults to the first record.
+        :return: Start and end offset of the payload, the timestamp, the direction and the
+            interface ID for every record. The end offset is the offset of the next record.
+        """
+        data = self.__mmap
+        unpack_header = _RECORD_HEADER.unpack_from
+        header_size = _RECORD_HEADER.size
+        decoded_ids = self.__decoded_ids
+        end = len(data)
+        while offset + header_size <= end:
+            timestamp_ns, direction, id_len, payload_len = unpack_header(data, offset)
+            id_start = offset + header_size
+            payload_start = id_start + id_len
+            next_offset = payload_start + payload_len
+            if next_offset > end:
+                _LOGGER.warning(f"ignoring truncated record at offset {offset} of {self.path}")
+                return
+            encoded_id = data[id_start:payload_start]
+            com_if_id = decoded_ids.get(encoded_id)
+            if com_if_id is None:
+                com_if_id = encoded_id.decode()
+                decoded_ids[encoded_id] = com_if_id
+            yield payload_start, next_offset, timestamp_ns, direction, com_if_id
+            offset = next_offset
+
+    def read_payload(self, start: int, end: int) -> bytes:
+        """Copy the payload of a record which was found with :py:meth:`scan`.
+
+        :param start: Start offset of the payload.
+        :param end: End offset of the payload.
+        """
+        return self.__mmap[start:end]
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return self.records()
+
+    def close(self) -> None:
+        self.__mmap.close()
+
+
+class CaptureComIF(ComInterface):
+    """Wraps a communication interface and records all sent and received packets.
+
+    The packets are recorded with a :py:mod:`com_interface.hooks` hook on the wrapped interface.
+    Received packets are therefore recorded with the time they were decoded, and also if they
+    are dropped because of a full reception queue. All calls are forwarded to the wrapped
+    interface, and the metrics are the metrics of the wrapped interface.
+    """
+
+    def __init__(self, com_if: ComInterface, writer: CaptureWriter):
+        """
+        :param com_if: Wrapped interface.
+        :param writer: Capture file writer, which can be shared by multiple interfaces. It is
+            not closed together with the interface.
+        """
+        self.com_if = com_if
+        self.writer = writer
+        com_if.add_hook(self.__record, (HookEvent.FRAMES_DECODED, HookEvent.PACKETS_SENT))
+
+    def detach(self) -> None:
+        """Stop recording the traffic of the wrapped interface."""
+        self.com_if.remove_hook(self.__record)
+
+    @property
+    def id(self) -> str:
+        return self.com_if.id
+
+    @property
+    def metrics(self) -> InterfaceMetrics:
+        return self.com_if.metrics
+
+    def initialize(self, args: Any = 0) -> Any:
+        return self.com_if.initialize(args)
+
+    def open(self, args: Any = 0) -> None:
+        self.com_if.open(args)
+
+    def is_open(self) -> bool:
+        return self.com_if.is_open()
+
+    def close(self, args: Any = 0) -> None:
+        self.com_if.close(args)
+        self.writer.flush()
+
+    def send(self, data: bytes | bytearray) -> None:
+        self.com_if.send(data)
+
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        self.com_if.send_many(packets)
+
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        return self.com_if.receive(parameters, max_packets, timeout)
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        return self.com_if.packets_available(parameters)
+
+    def fileno(self) -> int:
+        return self.com_if.fileno()
+
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        """The callback is called with this interface instead of the wrapped interface."""
+        if callback is None:
+            self.com_if.on_packet(None)
+        else:
+            self.com_if.on_packet(lambda _, packets: callback(self, packets))
+
+    def __record(
+        self, com_if: ComInterface, event: HookEvent, timestamp_ns: int, packets: list[bytes]
+    ) -> None:
+        direction = (
+            CaptureDirection.RX if event == HookEvent.FRAMES_DECODED else CaptureDirection.TX
+        )
+        write = self.writer.write
+        for packet in packets:
+            write(direction, com_if.id, packet, timestamp_ns)
+
+
+class ReplayComIF(ComInterface):
+    """Serves the received packets of a capture file with :py:meth:`receive`.
+
+    The packets are either returned as fast as possible or paced according to their recorded
+    timestamps. Sent packets are discarded.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        com_if_id: str = "replay",
+        source_id: str | None = None,
+        speed: float | None = None,
+        max_packets_per_receive: int = 4096,
+    ):
+        """
+        :param path: Capture file.
+        :param com_if_id: ID of the replay interface.
+        :param source_id: Only replay the packets received by the interface with this ID. All
+            received packets are replayed if this is None.
+        :param speed: None to replay the packets as fast as possible. Otherwise, the packets are
+            replayed at the recorded rate multiplied with this factor, for example 1.0 for real
+            time or 10.0 for ten times faster. The time starts when the interface is opened.
+        :param max_packets_per_receive: Maximum number of packets returned by a single
+            :py:meth:`receive` call, which limits the memory usage for large captures.
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("the replay speed must be positive")
+        self.path = path
+        self.com_if_id = com_if_id
+        self.source_id = source_id
+        self.speed = speed
+        self.max_packets_per_receive = max_packets_per_receive
+        self._metrics = InterfaceMetrics()
+        self.__reader: CaptureReader | None = None
+        self.__offset = 0
+        self.__finished = False
+        self.__first_timestamp_ns: int | None = None
+        self.__start_ns = 0
+        self.__reception_signal = ReceptionSignal()
+
+    @property
+    def id(self) -> str:
+        return self.com_if_id
+
+    def initialize(self, args: Any = 0) -> None:
+        pass
+
+    def open(self, args: Any = 0) -> None:
+        """Start the replay at the beginning of the capture file."""
+        self.close()
+        self.__reader = CaptureReader(self.path)
+        self.__offset = _FILE_HEADER.size
+        self.__finished = False
+        self.__first_timestamp_ns = None
+        self.__start_ns = time.monotonic_ns()
+        self.__reception_signal.notify()
+
+    def is_open(self) -> bool:
+        return self.__reader is not None
+
+    def close(self, args: Any = 0) -> None:
+        if self.__reader is None:
+            return
+        self.__reader.close()
+        self.__reader = None
+        self.__reception_signal.notify()
+
+    @property
+    def finished(self) -> bool:
+        """All packets of the capture file were returned."""
+        return self.__finished
+
+    def send(self, data: bytes | bytearray) -> None:
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        self._metrics.packets_sent(1, len(data))
+
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        """Return the packets which are due. A paced replay waits until the next packet is due
+        if a timeout is given.
+
+        :param max_packets: Maximum number of returned packets. The limit of the
+            ``max_packets_per_receive`` argument applies as well.
+        """
+        if self.__reader is None:
+            return []
+        self.__reception_signal.reset()
+        limit = self.max_packets_per_receive
+        if max_packets is not None:
+            limit = min(limit, max_packets)
+        packets = self.__take_due_packets(limit)
+        if not packets and timeout != 0:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not packets and self.__reader is not None:
+                delay = self.__next_release_delay()
+                if delay is None:
+                    break
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    delay = min(delay, remaining)
+                time.sleep(delay)
+                packets = self.__take_due_packets(limit)
+        if self.speed is None and not self.__finished:
+            self.__reception_signal.notify()
+        if packets:
+            metrics = self._metrics
+            metrics.bytes_received(sum(len(packet) for packet in packets))
+            metrics.packets_received(len(packets))
+            metrics.packets_delivered(len(packets))
+            if self._hooks is not None:
+                self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packets)
+        return packets
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        """Number of packets the next :py:meth:`receive` call returns if it is called now."""
+        if self.__reader is None:
+            return 0
+        return len(self.__due_packets(self.max_packets_per_receive)[0])
+
+    def fileno(self) -> int:
+        """The descriptor stays readable until all packets were returned.
+
+        :raises io.UnsupportedOperation: The replay is paced, so the release of a packet can
+            not be signalled.
+        """
+        if self.speed is not None:
+            raise io.UnsupportedOperation("a paced replay has no file descriptor")
+        return self.__reception_signal.fileno()
+
+    def __take_due_packets(self, limit: int) -> list[bytes]:
+        assert self.__reader is not None
+        read_payload = self.__reader.read_payload
+        spans, self.__offset, self.__first_timestamp_ns, finished = self.__due_packets(limit)
+        self.__finished = finished
+        return [read_payload(payload_start, payload_end) for payload_start, payload_end in spans]
+
+    def __next_release_delay(self) -> float | None:
+        """Time in seconds until the next replayed packet is due, None if there is none."""
+        assert self.__reader is not None
+        if self.__finished:
+            return None
+        for _, _, timestamp_ns, direction, com_if_id in self.__reader.scan(self.__offset):
+            if not self.__replayed(direction, com_if_id):
+                continue
+            release_ns = self.__release_timestamp(self.__first_timestamp_ns)
+            if release_ns is None or self.speed is None:
+                return 0.0
+            return max(0.0, (timestamp_ns - release_ns) / self.speed / 1e9)
+        return None
+
+    def __replayed(self, direction: int, com_if_id: str) -> bool:
+        return direction == CaptureDirection.RX and (
+            self.source_id is None or com_if_id == self.source_id
+        )
+
+    def __due_packets(self, limit: int) -> tuple[list[tuple[int, int]], int, int | None, bool]:
+        """Find the replayed packets which are due, starting at the current position. The
+        replay state is not changed, so this can also be used to peek at the due packets.
+
+        :return: Payload offset ranges of the due packets, the offset after the last consumed
+            record, the capture timestamp of the first replayed packet and whether the end of the
+            capture file was reached.
+        """
+        assert self.__reader is not None
+        offset = self.__offset
+        first_timestamp_ns = self.__first_timestamp_ns
+        spans: list[tuple[int, int]] = []
+        if self.__finished:
+            return spans, offset, first_timestamp_ns, True
+        release_ns = self.__release_timestamp(first_timestamp_ns)
+        for payload_start, next_offset, timestamp_ns, direction, com_if_id in self.__reader.scan(
+            offset
+        ):
+            if not self.__replayed(direction, com_if_id):
+                offset = next_offset
+                continue
+            if len(spans) >= limit:
+                return spans, offset, first_timestamp_ns, False
+            if first_timestamp_ns is None:
+                # The first packet is due immediately after opening the interface.
+                first_timestamp_ns = timestamp_ns
+                release_ns = self.__release_timestamp(first_timestamp_ns)
+            if release_ns is not None and timestamp_ns > release_ns:
+                return spans, offset, first_timestamp_ns, False
+            spans.append((payload_start, next_offset))
+            offset = next_offset
+        return spans, offset, first_timestamp_ns, True
+
+    def __release_timestamp(self, first_timestamp_ns: int | None) -> int | None:
+        """Latest capture timestamp which is due, or None if all packets are due."""
+        if self.speed is None or first_timestamp_ns is None:
+            return None
+        elapsed_ns = time.monotonic_ns() - self.__start_ns
+        return first_timestamp_ns + int(elapsed_ns * self.speed)
+
+
+def _check_file_header(header: bytes) -> None:
+    if len(header) < _FILE_HEADER.size:
+        raise CaptureFormatError("file is too short for a capture file")
+    magic, version = _FILE_HEADER.unpack(header)
+    if magic != CAPTURE_MAGIC:
+        raise CaptureFormatError("file is not a capture file")
+    if version != CAPTURE_VERSION:
+        raise CaptureFormatError(f"unsupported capture file version {version}")
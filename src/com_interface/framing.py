@@ -0,0 +1,637 @@
+"""Framing layer which splits byte streams into frames and encodes frames for byte stream
+transports. The :py:class:`Framer` implementations can be used with any stream based
+communication interface, for example the :py:class:`com_interface.tcp.TcpSpacepacketsClient` or
+the :py:class:`com_interface.serial_framed.SerialFramedComIF`."""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from cobs import cobs
+from dle_encoder import (
+    DLE_CHAR,
+    ESCAPE_JUMP,
+    ESCAPED_CR,
+    ESCAPED_ETX,
+    ESCAPED_STX,
+    ETX_CHAR,
+    STX_CHAR,
+    DleEncoder,
+)
+
+from com_interface.stream_buf import StreamBuffer
+
+try:
+    from spacepackets.ccsds.spacepacket import parse_space_packets
+except ImportError:
+    # The spacepackets package is only required for the space packet framer.
+    parse_space_packets = None
+
+# The optional C accelerator is built together with the package if a compiler is available.
+# Setting the COM_INTERFACE_PURE_PYTHON environment variable forces the pure Python parsers.
+try:
+    if os.environ.get("COM_INTERFACE_PURE_PYTHON"):
+        raise ImportError
+    from com_interface import _speedups
+except ImportError:
+    _speedups = None
+
+SPEEDUPS_AVAILABLE = _speedups is not None
+"""Whether the frame parsers use the C accelerator by default."""
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from spacepackets.ccsds.spacepacket import PacketId
+
+_LOGGER = logging.getLogger(__name__)
+
+_LENGTH_PREFIX_FORMATS = {1: "B", 2: "H", 4: "I"}
+
+
+class Framer(ABC):
+    """Generic form of a framing protocol for byte stream transports.
+
+    A framer is stateful because frames can be split across multiple :py:meth:`feed` calls, so
+    every stream requires its own framer instance.
+    """
+
+    #: Number of received frames which could not be decoded. Framers which can detect invalid
+    #: frames count them here.
+    parsing_error_count = 0
+
+    @abstractmethod
+    def feed(self, data: bytes | bytearray | memoryview) -> list[bytes]:
+        """Process received stream data.
+
+        :param data: Received stream data. The framer does not keep a reference to it, so the
+            caller can reuse the underlying buffer after the call.
+        :return: List of all frames which were completed by the data, in the order they were
+            received.
+        """
+
+    @abstractmethod
+    def encode(self, frame: bytes | bytearray) -> bytes | bytearray:
+        """Encode a frame so it can be written to the stream."""
+
+    def encode_many(self, frames: Iterable[bytes | bytearray]) -> bytes | bytearray:
+        """Encode multiple frames into one buffer which can be written with a single call."""
+        return b"".join(self.encode(frame) for frame in frames)
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Discard all buffered stream data."""
+
+
+# A COBS block can hold at most 254 data bytes, so every started block of that size adds one byte
+# of overhead.
+_COBS_MAX_BLOCK_LEN = 254
+
+
+def cobs_max_encoded_len(data_len: int) -> int:
+    """Upper bound for the size of a COBS frame generated by :py:func:`encode_into` for
+    ``data_len`` bytes of payload, including both 0 delimiters."""
+    return data_len + data_len // _COBS_MAX_BLOCK_LEN + 3
+
+
+def encode_into(data: bytes | bytearray, out: bytearray | memoryview, offset: int = 0) -> int:
+    """COBS encodes the data and writes the encoded frame, wrapped inside 0 delimiters, into a
+    preallocated buffer.
+
+    The encoding itself is done by :py:func:`cobs.cobs.encode`, whose result is a temporary
+    bytes object which is copied into the output buffer. Only the frame buffer can be reused.
+    The generated frame is identical to the frame generated by
+    :py:meth:`com_interface.serial_cobs.SerialCobsComIF.encode_data`.
+
+    :param data: Data to encode.
+    :param out: Output buffer. It must provide at least :py:func:`cobs_max_encoded_len` bytes
+        starting at ``offset``.
+    :param offset: Start index of the frame inside the output buffer.
+    :raises ValueError: Output buffer too small.
+    :return: Number of bytes written to the output buffer.
+    """
+    if len(out) - offset < cobs_max_encoded_len(len(data)):
+        raise ValueError(
+            f"output buffer with {len(out) - offset} free bytes too small to encode"
+            f" {len(data)} bytes"
+        )
+    encoded = cobs.encode(data)
+    encoded_len = len(encoded)
+    out[offset] = 0
+    out[offset + 1 : offset + 1 + encoded_len] = encoded
+    out[offset + 1 + encoded_len] = 0
+    return encoded_len + 2
+
+
+def decode_into(
+    data: bytes | bytearray,
+    out: bytearray | memoryview,
+    start: int = 0,
+    end: int | None = None,
+    offset: int = 0,
+    use_speedups: bool = True,
+) -> int:
+    """Decodes COBS encoded data directly into a preallocated buffer. This is the counterpart to
+    :py:func:`encode_into`, but the data to decode must not contain the 0 delimiters.
+
+    The encoded data is neither copied nor decoded into a temporary object. The C accelerator
+    decodes the whole frame in one call, the pure Python implementation copies one COBS block
+    at a time.
+
+    :param data: Buffer containing the COBS encoded data.
+    :param out: Output buffer. It must provide at least as many bytes as the encoded data
+        starting at ``offset``.
+    :param start: Start index of the encoded data inside ``data``.
+    :param end: End index of the encoded data inside ``data``. Defaults to the end of the buffer.
+    :param offset: Start index of the decoded data inside the output buffer.
+    :param use_speedups: Use the C accelerator if it is available.
+    :raises ValueError: Output buffer too small.
+    :raises cobs.DecodeError: Invalid COBS data.
+    :return: Number of decoded bytes written to the output buffer.
+    """
+    if end is None:
+        end = len(data)
+    if len(out) - offset < end - start:
+        raise ValueError(
+            f"output buffer with {len(out) - offset} free bytes too small to decode"
+            f" {end - start} bytes"
+        )
+    if use_speedups and SPEEDUPS_AVAILABLE:
+        decoded_len = _speedups.cobs_decode_into(data, start, end, out, offset)
+        if decoded_len < 0:
+            raise cobs.DecodeError("invalid COBS data")
+        return decoded_len
+    src = memoryview(data)
+    idx = start
+    out_idx = offset
+    while idx < end:
+        code = data[idx]
+        idx += 1
+        block_end = idx + code - 1
+        if code == 0 or block_end > end or data.find(0, idx, block_end) >= 0:
+            raise cobs.DecodeError("invalid COBS data")
+        out[out_idx : out_idx + code - 1] = src[idx:block_end]
+        out_idx += code - 1
+        idx = block_end
+        if idx < end and code < 0xFF:
+            out[out_idx] = 0
+            out_idx += 1
+    return out_idx - offset
+
+
+class CobsFrameParser:
+    """Incremental parser for COBS frames which are delimited by 0 bytes.
+
+    Every 0 byte is treated as a frame delimiter, so the end delimiter of one frame can also
+    serve as the start delimiter of the next one. The delimiter search is done with
+    :py:meth:`bytearray.find` and resumes where the previous call stopped, so every received
+    byte is only scanned once. Consumed bytes are removed in one step after all complete
+    frames were decoded, which keeps the runtime linear in the number of received bytes.
+
+    The scan and decode loop runs inside the C accelerator if it is available.
+    """
+
+    def __init__(self, use_speedups: bool = True):
+        """
+        :param use_speedups: Use the C accelerator if it is available.
+        """
+        self.use_speedups = use_speedups and SPEEDUPS_AVAILABLE
+        self._buf = bytearray()
+        # Index of the delimiter which opened the frame currently being received, or -1 if the
+        # parser has not synchronized to the stream yet.
+        self._frame_start = -1
+        # Index at which the next delimiter search resumes. Bytes before this index were
+        # already scanned by a previous parser run.
+        self._scan_idx = 0
+        self.parsing_error_count = 0
+
+    def feed(self, data: bytes | bytearray) -> None:
+        """Append received raw data to the parse buffer."""
+        self._buf.extend(data)
+
+    def parse(self) -> list[bytes]:
+        """Decode all complete frames inside the parse buffer.
+
+        :return: List of decoded frames, in the order they were received.
+        """
+        packets = []
+        buf = self._buf
+        start = self._frame_start
+        idx = self._scan_idx
+        if start < 0:
+            start = buf.find(0, idx)
+            if start < 0:
+                # No delimiter to synchronize to, the data can not be part of a valid frame.
+                buf.clear()
+                self._scan_idx = 0
+                return packets
+            idx = start + 1
+        if self.use_speedups:
+            packets, start, error_count = _speedups.cobs_parse(buf, start, idx)
+            self.parsing_error_count += error_count
+        else:
+            start = self._parse_frames(packets, start, idx)
+        # Deleting from the front of a bytearray does not move the remaining bytes.
+        del buf[:start]
+        self._frame_start = 0
+        self._scan_idx = len(buf)
+        return packets
+
+    def _parse_frames(self, packets: list[bytes], start: int, idx: int) -> int:
+        buf = self._buf
+        while True:
+            end = buf.find(0, idx)
+            if end < 0:
+                return start
+            if end > start + 1:
+                try:
+                    packet = cobs.decode(buf[start + 1 : end])
+                    if len(packet) > 0:
+                        packets.append(packet)
+                except cobs.DecodeError:
+                    self.parsing_error_count += 1
+            start = end
+            idx = end + 1
+
+    def clear(self) -> None:
+        self._buf.clear()
+        self._frame_start = -1
+        self._scan_idx = 0
+
+
+class CobsFramer(Framer):
+    """COBS framing where every frame is wrapped inside 0 delimiters."""
+
+    def __init__(self):
+        self._parser = CobsFrameParser()
+
+    @property
+    def parsing_error_count(self) -> int:
+        """Number of received frames which could not be decoded."""
+        return self._parser.parsing_error_count
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[bytes]:
+        self._parser.feed(data)
+        return self._parser.parse()
+
+    def encode(self, frame: bytes | bytearray) -> bytearray:
+        encoded = bytearray(cobs_max_encoded_len(len(frame)))
+        del encoded[encode_into(frame, encoded) :]
+        return encoded
+
+    def encode_many(self, frames: Iterable[bytes | bytearray]) -> bytearray:
+        frames = list(frames)
+        encoded = bytearray(sum(cobs_max_encoded_len(len(frame)) for frame in frames))
+        encoded_len = 0
+        for frame in frames:
+            encoded_len += encode_into(frame, encoded, encoded_len)
+        del encoded[encoded_len:]
+        return encoded
+
+    def clear(self) -> None:
+        self._parser.clear()
+
+
+class DleFrameParser:
+    """Incremental parser for frames encoded with the escaped DLE encoding.
+
+    In the escaped DLE mode, STX and ETX characters never appear inside an encoded frame, so
+    frame boundaries can be found with :py:meth:`bytearray.find` without inspecting every byte in
+    Python. The ETX search resumes where the previous call stopped, so frames can span multiple
+    :py:meth:`feed` calls.
+
+    Frames which can not be decoded increment the :py:attr:`parsing_error_count` counter.
+    Frames which were not terminated before the next start marker or which exceed the
+    maximum frame size increment the :py:attr:`dropped_frame_count` counter.
+
+    The scan and decode loop runs inside the C accelerator if it is available.
+    """
+
+    def __init__(
+        self, escape_cr: bool = False, max_frame: int | None = None, use_speedups: bool = True
+    ):
+        """
+        :param escape_cr: Whether escaped CR characters should be accepted.
+        :param max_frame: Maximum number of bytes following the STX character, including the ETX
+            character. Larger frames are dropped.
+        :param use_speedups: Use the C accelerator if it is available.
+        """
+        self.use_speedups = use_speedups and SPEEDUPS_AVAILABLE
+        self.escape_cr = escape_cr
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        # Index of the STX character of the frame currently being received, or -1 if the
+        # parser is still waiting for a start marker.
+        self._frame_start = -1
+        # Index at which the next search resumes.
+        self._scan_idx = 0
+        self.parsing_error_count = 0
+        self.dropped_frame_count = 0
+
+    def feed(self, data: bytes | bytearray) -> None:
+        """Append received raw data to the parse buffer."""
+        self._buf.extend(data)
+
+    def parse(self) -> list[bytearray]:
+        """Decode all complete frames inside the parse buffer.
+
+        :return: List of decoded frames, in the order they were received.
+        """
+        packets = []
+        if self.use_speedups:
+            packets, start, idx, error_count, dropped_count = _speedups.dle_parse(
+                self._buf,
+                self._frame_start,
+                self._scan_idx,
+                self.escape_cr,
+                -1 if self.max_frame is None else self.max_frame,
+            )
+            self.parsing_error_count += error_count
+            self.dropped_frame_count += dropped_count
+            for _ in range(error_count):
+                _LOGGER.warning("DLE decoder error!")
+        else:
+            start, idx = self._parse_frames(packets)
+        if start < 0:
+            # Discard everything which can not be part of a frame.
+            self._buf.clear()
+            idx = 0
+        elif start > 0:
+            del self._buf[:start]
+            idx -= start
+            start = 0
+        self._frame_start = start
+        self._scan_idx = idx
+        return packets
+
+    def _parse_frames(self, packets: list[bytearray]) -> tuple[int, int]:
+        """Returns the index of the STX character of the incomplete frame at the end of the
+        buffer, or -1 if the buffer can be discarded, and the index at which the next search
+        resumes."""
+        buf = self._buf
+        start = self._frame_start
+        idx = self._scan_idx
+        max_frame = self.max_frame
+        while True:
+            if start < 0:
+                start = buf.find(STX_CHAR, idx)
+                if start < 0:
+                    return -1, 0
+                idx = start + 1
+            end = buf.find(ETX_CHAR, idx)
+            next_start = buf.find(STX_CHAR, idx, end if end >= 0 else len(buf))
+            if next_start >= 0:
+                # Start marker without end marker. The frame was not terminated properly.
+                self.dropped_frame_count += 1
+                start = next_start
+                idx = start + 1
+                continue
+            if end < 0:
+                if max_frame is not None and len(buf) - start - 1 >= max_frame:
+                    self.dropped_frame_count += 1
+                    return -1, 0
+                return start, len(buf)
+            if max_frame is not None and end - start > max_frame:
+                self.dropped_frame_count += 1
+            else:
+                packet = self.decode_frame(buf, start + 1, end)
+                if packet is None:
+                    self.parsing_error_count += 1
+                    _LOGGER.warning("DLE decoder error!")
+                else:
+                    packets.append(packet)
+            start = -1
+            idx = end + 1
+
+    def decode_frame(self, buf: bytes | bytearray, start: int, end: int) -> bytearray | None:
+        """Decode the escaped DLE frame contents in the range from start to end, without the
+        STX and ETX characters. Returns None if the frame contains an invalid escape sequence."""
+        decoded = bytearray()
+        idx = start
+        while True:
+            dle_idx = buf.find(DLE_CHAR, idx, end)
+            if dle_idx < 0:
+                decoded.extend(buf[idx:end])
+                return decoded
+            decoded.extend(buf[idx:dle_idx])
+            if dle_idx + 1 >= end:
+                return None
+            next_byte = buf[dle_idx + 1]
+            if next_byte == DLE_CHAR:
+                decoded.append(DLE_CHAR)
+            elif next_byte in (ESCAPED_STX, ESCAPED_ETX) or (
+                self.escape_cr and next_byte == ESCAPED_CR
+            ):
+                decoded.append(next_byte - ESCAPE_JUMP)
+            else:
+                return None
+            idx = dle_idx + 2
+
+    def clear(self) -> None:
+        self._buf.clear()
+        self._frame_start = -1
+        self._scan_idx = 0
+
+
+class DleFramer(Framer):
+    """Escaped DLE framing where every frame is wrapped inside STX and ETX characters."""
+
+    def __init__(self, escape_cr: bool = False, max_frame: int | None = None):
+        """
+        :param escape_cr: Whether CR characters are escaped as well.
+        :param max_frame: Maximum number of bytes following the STX character, including the ETX
+            character. Larger frames are dropped.
+        """
+        self._encoder = DleEncoder(escape_cr=escape_cr)
+        self._parser = DleFrameParser(escape_cr=escape_cr, max_frame=max_frame)
+
+    @property
+    def parsing_error_count(self) -> int:
+        """Number of received frames which could not be decoded."""
+        return self._parser.parsing_error_count
+
+    @property
+    def dropped_frame_count(self) -> int:
+        """Number of unterminated or oversized frames which were dropped."""
+        return self._parser.dropped_frame_count
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[bytes]:
+        self._parser.feed(data)
+        return self._parser.parse()
+
+    def encode(self, frame: bytes | bytearray) -> bytearray:
+        return self._encoder.encode(source_packet=frame, add_stx_etx=True)
+
+    def clear(self) -> None:
+        self._parser.clear()
+
+
+class _ReassemblingFramer(Framer):
+    """Base class for framers which can determine the frame boundaries from the start of the
+    stream data. As long as no partial frame is buffered, the received data is parsed in place
+    and only the bytes of an incomplete frame at the end are copied into the reassembly buffer.
+    """
+
+    def __init__(self):
+        self._stream_buf = StreamBuffer(0)
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[bytes]:
+        if len(self._stream_buf) == 0:
+            with memoryview(data) as data_view:
+                frames, scanned_bytes = self._parse(data_view)
+                if scanned_bytes < len(data_view):
+                    self._stream_buf.write(data_view[scanned_bytes:])
+            return frames
+        self._stream_buf.write(data)
+        with self._stream_buf.view() as stream_view:
+            frames, scanned_bytes = self._parse(stream_view)
+        self._stream_buf.consume(scanned_bytes)
+        return frames
+
+    @abstractmethod
+    def _parse(self, data: memoryview) -> tuple[list[bytes], int]:
+        """Parse all complete frames at the start of the data.
+
+        :return: Tuple of the parsed frames and the number of bytes which do not have to be
+            buffered for the next call.
+        """
+
+    def clear(self) -> None:
+        self._stream_buf.clear()
+
+
+class SpacePacketFramer(_ReassemblingFramer):
+    """Framing for streams of CCSDS space packets, which are delimited by the length field of
+    their primary header. Bytes which do not belong to a packet with one of the given packet IDs
+    are skipped.
+    """
+
+    def __init__(self, space_packet_ids: Sequence[PacketId]):
+        """
+        :param space_packet_ids: Valid packet IDs which are used to find the start of packets.
+        :raises ImportError: The spacepackets package is not installed.
+        """
+        if parse_space_packets is None:
+            raise ImportError("the space packet framer requires the spacepackets package")
+        super().__init__()
+        self.space_packet_ids = space_packet_ids
+        self.skipped_byte_count = 0
+        # Every skipped range of bytes counts as one parsing error.
+        self.parsing_error_count = 0
+        self.__warned = False
+
+    def _parse(self, data: memoryview) -> tuple[list[bytes], int]:
+        result = parse_space_packets(data, self.space_packet_ids)
+        for skipped_range in result.skipped_ranges:
+            self.skipped_byte_count += len(skipped_range)
+            self.parsing_error_count += 1
+            # The hex dump is only formatted if debug logging is enabled. The skipped bytes can
+            # also be traced with the BYTES_RECEIVED hook event.
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(
+                    "skipped bytes in received datastream: "
+                    f"{data[skipped_range.start : skipped_range.stop].hex(sep=',')}"
+                )
+        if result.skipped_ranges and not self.__warned:
+            # I consider this a configuration error, and the user should be notified about it.
+            # The warning is only logged once per stream to keep it off the hot path, further
+            # skipped ranges are counted by parsing_error_count.
+            self.__warned = True
+            _LOGGER.warning(
+                "skipped bytes in received datastream, list of valid packet IDs might be incomplete"
+            )
+        return [bytes(packet) for packet in result.tm_list], result.scanned_bytes
+
+    def encode(self, frame: bytes | bytearray) -> bytes | bytearray:
+        """Space packets are self-delimiting, so they are sent as they are."""
+        return frame
+
+
+class LengthPrefixFramer(_ReassemblingFramer):
+    """Framing where every frame is preceded by an unsigned integer containing the frame length,
+    not including the length prefix itself."""
+
+    def __init__(self, prefix_size: int = 2, byte_order: str = "big", max_frame: int | None = None):
+        """
+        :param prefix_size: Size of the length prefix in bytes. Must be 1, 2 or 4.
+        :param byte_order: Byte order of the length prefix, either "big" or "little".
+        :param max_frame: Maximum frame length. A larger length prefix is considered a framing
+            error, and all buffered data is discarded because the stream can not be
+            resynchronized.
+        :raises ValueError: Invalid prefix size or byte order.
+        """
+        super().__init__()
+        if prefix_size not in _LENGTH_PREFIX_FORMATS:
+            raise ValueError(f"invalid length prefix size {prefix_size}")
+        if byte_order not in ("big", "little"):
+            raise ValueError(f"invalid byte order {byte_order}")
+        self.prefix_size = prefix_size
+        self.max_frame = max_frame
+        self._prefix = struct.Struct(
+            (">" if byte_order == "big" else "<") + _LENGTH_PREFIX_FORMATS[prefix_size]
+        )
+        self.parsing_error_count = 0
+
+    def _parse(self, data: memoryview) -> tuple[list[bytes], int]:
+        frames = []
+        idx = 0
+        prefix_size = self.prefix_size
+        while len(data) - idx >= prefix_size:
+            (frame_len,) = self._prefix.unpack_from(data, idx)
+            if self.max_frame is not None and frame_len > self.max_frame:
+                self.parsing_error_count += 1
+                _LOGGER.warning(f"length prefix {frame_len} exceeds maximum frame length")
+                return frames, len(data)
+            frame_end = idx + prefix_size + frame_len
+            if frame_end > len(data):
+                break
+            frames.append(bytes(data[idx + prefix_size : frame_end]))
+            idx = frame_end
+        return frames, idx
+
+    def encode(self, frame: bytes | bytearray) -> bytearray:
+        """
+        :raises ValueError: Frame too large for the length prefix.
+        """
+        encoded = bytearray(self._prefix.size + len(frame))
+        try:
+            self._prefix.pack_into(encoded, 0, len(frame))
+        except struct.error as e:
+            raise ValueError(f"frame with {len(frame)} bytes too large for length prefix") from e
+        encoded[self._prefix.size :] = frame
+        return encoded
+
+
+class FixedSizeFramer(_ReassemblingFramer):
+    """Framing where every frame has the same size, so the stream is simply split into chunks."""
+
+    def __init__(self, frame_size: int):
+        """
+        :raises ValueError: Frame size smaller than 1.
+        """
+        super().__init__()
+        if frame_size < 1:
+            raise ValueError(f"invalid frame size {frame_size}")
+        self.frame_size = frame_size
+
+    def _parse(self, data: memoryview) -> tuple[list[bytes], int]:
+        frame_size = self.frame_size
+        scanned_bytes = len(data) - len(data) % frame_size
+        frames = [
+            bytes(data[idx : idx + frame_size]) for idx in range(0, scanned_bytes, frame_size)
+        ]
+        return frames, scanned_bytes
+
+    def encode(self, frame: bytes | bytearray) -> bytes | bytearray:
+        """
+        :raises ValueError: Frame does not have the fixed frame size.
+        """
+        if len(frame) != self.frame_size:
+            raise ValueError(
+                f"frame with {len(frame)} bytes does not have the frame size {self.frame_size}"
+            )
+        return frame
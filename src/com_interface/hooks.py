@@ -0,0 +1,185 @@
+"""Tracing hooks for the send and reception paths of the communication interfaces.
+
+Hooks can be registered on every :py:class:`com_interface.ComInterface` and
+:py:class:`com_interface.aio.AsyncComInterface` with :py:meth:`Hookable.add_hook`. They are
+called with the interface, the :py:class:`HookEvent`, a wall clock timestamp in nanoseconds and
+the event data. This can be used for wiretapping, capturing the traffic or profiling:
+
+.. code-block:: python
+
+    def wiretap(com_if, event, timestamp_ns, data):
+        print(f"{com_if.id} {event.name}: {data}")
+
+    com_if.add_hook(wiretap, {HookEvent.BYTES_RECEIVED, HookEvent.PACKETS_SENT})
+
+Hooks are called from the thread which triggered the event, for example the reception thread of
+the interface. Slow hooks can be wrapped with a :py:class:`QueuedHook`, which calls them from a
+separate worker thread. If no hook is registered, every event only costs one attribute check.
+"""
+
+from __future__ import annotations
+
+import enum
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Union
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from com_interface import ComInterface
+    from com_interface.aio import AsyncComInterface
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HookEvent(enum.Enum):
+    """Events which are passed to the hooks, and the type of the passed data."""
+
+    #: Raw bytes received from the transport, including the framing. The data is a bytes object.
+    BYTES_RECEIVED = enum.auto()
+    #: Frames which were decoded from the received data. The data is a list of packets.
+    FRAMES_DECODED = enum.auto()
+    #: Packets which were returned by ``receive``. The data is a list of packets.
+    PACKETS_DELIVERED = enum.auto()
+    #: Packets which were passed to ``send`` or ``send_many``, before they are encoded. The data
+    #: is a list of packets.
+    PACKETS_SENT = enum.auto()
+
+
+Hook = Callable[[Union["ComInterface", "AsyncComInterface"], HookEvent, int, Any], None]
+
+
+class HookDispatcher:
+    """Calls all hooks which are registered for an event.
+
+    The registered hooks are stored in an immutable tuple which is replaced on every change, so
+    :py:meth:`emit` does not need a lock.
+    """
+
+    def __init__(self):
+        self.__hooks: tuple[tuple[Hook, frozenset[HookEvent]], ...] = ()
+        self.__lock = threading.Lock()
+
+    def add(self, hook: Hook, events: Iterable[HookEvent] | None = None) -> None:
+        with self.__lock:
+            self.__hooks = (
+                *self.__hooks,
+                (hook, frozenset(HookEvent if events is None else events)),
+            )
+
+    def remove(self, hook: Hook) -> bool:
+        """Remove all registrations of the given hook.
+
+        :return: True if the hook was registered.
+        """
+        with self.__lock:
+            hooks = tuple(entry for entry in self.__hooks if entry[0] != hook)
+            removed = len(hooks) != len(self.__hooks)
+            self.__hooks = hooks
+            return removed
+
+    def __len__(self) -> int:
+        return len(self.__hooks)
+
+    def emit(self, com_if: ComInterface | AsyncComInterface, event: HookEvent, data: Any) -> None:
+        """Call all hooks registered for the event. Exceptions of the hooks are logged and do not
+        affect the interface."""
+        timestamp_ns = time.time_ns()
+        for hook, events in self.__hooks:
+            if event in events:
+                try:
+                    hook(com_if, event, timestamp_ns, data)
+                except Exception:
+                    _LOGGER.exception(f"hook {hook!r} failed for event {event.name}")
+
+
+class Hookable:
+    """Mixin which provides the hook registration for the communication interfaces.
+
+    Interfaces emit events with the following pattern, which only costs one attribute check if
+    no hook is registered:
+
+    .. code-block:: python
+
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+    """
+
+    _hooks: HookDispatcher | None = None
+
+    def add_hook(self, hook: Hook, events: Iterable[HookEvent] | None = None) -> None:
+        """Register a hook.
+
+        :param hook: Called with the interface, the event, the wall clock time of the event in
+            nanoseconds and the event data, see :py:class:`HookEvent`.
+        :param events: Events the hook is called for. None for all events.
+        """
+        dispatcher = self._hooks
+        if dispatcher is None:
+            dispatcher = HookDispatcher()
+        dispatcher.add(hook, events)
+        self._hooks = dispatcher
+
+    def remove_hook(self, hook: Hook) -> bool:
+        """Remove a hook.
+
+        :return: True if the hook was registered.
+        """
+        dispatcher = self._hooks
+        if dispatcher is None:
+            return False
+        removed = dispatcher.remove(hook)
+        if len(dispatcher) == 0:
+            self._hooks = None
+        return removed
+
+
+class QueuedHook:
+    """Wraps a hook so that it is called from a separate worker thread instead of the thread
+    which triggered the event. A slow hook can therefore not stall the reception.
+
+    Events are discarded if the queue is full. They are counted by :py:attr:`dropped_count`.
+    The data is passed to the worker thread as it is, so a hook must not expect it to be
+    unchanged if the consumer of the interface modifies received packets in place.
+    """
+
+    def __init__(self, hook: Hook, maxsize: int = 10000):
+        """
+        :param hook: Hook which is called from the worker thread.
+        :param maxsize: Maximum number of queued events.
+        """
+        self.hook = hook
+        self.dropped_count = 0
+        self.__queue: queue.Queue[tuple[Any, HookEvent, int, Any] | None] = queue.Queue(maxsize)
+        self.__worker = threading.Thread(target=self.__run, daemon=True)
+        self.__worker.start()
+
+    def __call__(
+        self,
+        com_if: ComInterface | AsyncComInterface,
+        event: HookEvent,
+        timestamp_ns: int,
+        data: Any,
+    ) -> None:
+        try:
+            self.__queue.put_nowait((com_if, event, timestamp_ns, data))
+        except queue.Full:
+            self.dropped_count += 1
+
+    def close(self, timeout: float | None = None) -> None:
+        """Call the hook for all queued events and stop the worker thread."""
+        self.__queue.put(None)
+        self.__worker.join(timeout)
+
+    def __run(self) -> None:
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                return
+            try:
+                self.hook(*item)
+            except Exception:
+                _LOGGER.exception(f"queued hook {self.hook!r} failed")
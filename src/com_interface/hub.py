@@ -0,0 +1,258 @@
+"""Reactor which drives multiple communication interfaces from a single thread."""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import selectors
+import socket
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from com_interface import ComInterface
+
+_LOGGER = logging.getLogger(__name__)
+
+PacketCallback = Callable[["ComInterface", list[bytes]], None]
+"""Called with the communication interface and the list of packets it received."""
+
+
+class HubDriven(ABC):
+    """Interface for communication interfaces which can be driven by a :py:class:`ComHub`
+    instead of their own thread.
+
+    The hub attaches itself before opening the interface. An attached interface must not start
+    any threads when it is opened. Instead, the hub watches the file object returned by
+    :py:meth:`hub_fileobj` and calls the event handlers of the interface from its own thread.
+    """
+
+    @abstractmethod
+    def hub_attach(self, hub: ComHub | None) -> None:
+        """Attach the interface to a hub, or detach it if None is passed."""
+
+    @abstractmethod
+    def hub_fileobj(self) -> Any:
+        """File object or file descriptor which is watched for readability. This is only called
+        after the interface was opened."""
+
+    @abstractmethod
+    def hub_on_readable(self) -> None:
+        """Read and process all data which is available without blocking. The received packets
+        must be retrievable with :py:meth:`com_interface.ComInterface.receive` afterwards."""
+
+    def hub_wants_write(self) -> bool:
+        """Whether the hub should call :py:meth:`hub_on_writable` once the file object becomes
+        writable. Interfaces which send synchronously do not need to override this."""
+        return False
+
+    def hub_on_writable(self) -> None:
+        """Send queued data without blocking. This is also called after the interface requested
+        it with :py:meth:`ComHub.request_write`."""
+        return
+
+
+class _HubEntry:
+    def __init__(self, com_if: ComInterface, callback: PacketCallback | None, fileobj: Any):
+        self.com_if = com_if
+        self.callback = callback
+        self.fileobj = fileobj
+        self.events = selectors.EVENT_READ
+        self.registered = True
+
+
+class ComHub:
+    """Reactor which drives any number of :py:class:`HubDriven` communication interfaces with
+    one :py:mod:`selectors` loop instead of one thread per interface.
+
+    The hub can either run inside its own thread, which is started with :py:meth:`start`, or it
+    can be driven by the application with :py:meth:`run_once`. Interfaces can be added and
+    removed at any time, also while the hub is running.
+
+    Received packets are passed to the callback which was specified when adding the interface,
+    or to the callback of the hub if the interface does not have one. If no callback applies,
+    the packets are kept by the interface and can be retrieved with its
+    :py:meth:`com_interface.ComInterface.receive` method as usual.
+
+    Serial interfaces can only be driven by the hub on POSIX systems.
+
+    >>> hub = ComHub()
+    >>> hub.interfaces
+    []
+    >>> hub.close()
+    """
+
+    def __init__(self, callback: PacketCallback | None = None):
+        """
+        :param callback: Merged callback for all interfaces which were added without their own
+            callback.
+        """
+        self.callback = callback
+        self.__selector = selectors.DefaultSelector()
+        self.__entries: dict[int, _HubEntry] = {}
+        # Protects the entries and the selector registrations against concurrent modifications
+        # while events are dispatched. Re-entrant so callbacks can add and remove interfaces.
+        self.__lock = threading.RLock()
+        self.__write_requests: deque[ComInterface] = deque()
+        self.__wakeup_recv, self.__wakeup_send = socket.socketpair()
+        self.__wakeup_recv.setblocking(False)
+        self.__wakeup_send.setblocking(False)
+        self.__selector.register(self.__wakeup_recv, selectors.EVENT_READ)
+        self.__thread: threading.Thread | None = None
+        self.__stop_signal = threading.Event()
+
+    @property
+    def interfaces(self) -> list[ComInterface]:
+        """All interfaces which are currently driven by the hub."""
+        with self.__lock:
+            return [entry.com_if for entry in self.__entries.values()]
+
+    def add(self, com_if: ComInterface, callback: PacketCallback | None = None) -> None:
+        """Attach an interface to the hub and open it. The interface must implement
+        :py:class:`HubDriven` and must not be open yet.
+
+        :param com_if: Interface to add.
+        :param callback: Callback for the packets received by this interface. The callback of the
+            hub is used if this is None.
+        :raises TypeError: The interface can not be driven by the hub.
+        :raises ValueError: The interface is already open.
+        """
+        if not isinstance(com_if, HubDriven):
+            raise TypeError(f"{type(com_if).__name__} can not be driven by a hub")
+        if com_if.is_open():
+            raise ValueError(f"communication interface {com_if.id} is already open")
+        com_if.hub_attach(self)
+        try:
+            com_if.open()
+        except Exception:
+            com_if.hub_attach(None)
+            raise
+        with self.__lock:
+            entry = _HubEntry(com_if, callback, com_if.hub_fileobj())
+            self.__selector.register(entry.fileobj, entry.events, entry)
+            self.__entries[id(com_if)] = entry
+            # Send data which was queued before the interface was registered.
+            self.__update_write_interest(entry)
+        # A select based selector only watches new file objects after the next wakeup.
+        self.wake_up()
+
+    def remove(self, com_if: ComInterface) -> None:
+        """Stop driving an interface and close it. The interface is detached from the hub, so it
+        can be opened in standalone mode again. Closing an attached interface removes it from
+        the hub as well."""
+        with self.__lock:
+            entry = self.__entries.pop(id(com_if), None)
+            if entry is None:
+                return
+            entry.registered = False
+            self.__selector.unregister(entry.fileobj)
+        com_if.hub_attach(None)
+        com_if.close()
+
+    def request_write(self, com_if: ComInterface) -> None:
+        """Called by attached interfaces from any thread after they queued data to send. The hub
+        thread then calls :py:meth:`HubDriven.hub_on_writable`."""
+        self.__write_requests.append(com_if)
+        self.wake_up()
+
+    def wake_up(self) -> None:
+        """Wake up the hub if it is blocked inside :py:meth:`run_once`."""
+        # A full wakeup socket wakes up the hub anyway.
+        with contextlib.suppress(OSError):
+            self.__wakeup_send.send(b"\x00")
+
+    def run_once(self, timeout: float | None = None) -> None:
+        """Wait for events of the attached interfaces and handle them.
+
+        :param timeout: Maximum time to wait for events in seconds. None to wait until an event
+            occurs or the hub is woken up, 0 to only handle pending events.
+        """
+        events = self.__selector.select(timeout)
+        with self.__lock:
+            for key, mask in events:
+                if key.fileobj is self.__wakeup_recv:
+                    self.__drain_wakeup_socket()
+                    self.__handle_write_requests()
+                    continue
+                entry: _HubEntry = key.data
+                if entry.registered:
+                    self.__dispatch(entry, mask)
+
+    def start(self) -> None:
+        """Run the hub inside a separate daemon thread until :py:meth:`stop` is called."""
+        if self.__thread is not None:
+            return
+        self.__stop_signal.clear()
+        self.__thread = threading.Thread(target=self.__hub_task, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stop the hub thread. The attached interfaces stay open."""
+        if self.__thread is None:
+            return
+        self.__stop_signal.set()
+        self.wake_up()
+        self.__thread.join()
+        self.__thread = None
+
+    def close(self) -> None:
+        """Stop the hub thread, remove and close all interfaces and release the hub resources."""
+        self.stop()
+        for com_if in self.interfaces:
+            self.remove(com_if)
+        self.__selector.close()
+        self.__wakeup_recv.close()
+        self.__wakeup_send.close()
+
+    def __hub_task(self) -> None:
+        while not self.__stop_signal.is_set():
+            self.run_once()
+
+    def __drain_wakeup_socket(self) -> None:
+        with contextlib.suppress(BlockingIOError):
+            while self.__wakeup_recv.recv(4096):
+                pass
+
+    def __handle_write_requests(self) -> None:
+        while self.__write_requests:
+            entry = self.__entries.get(id(self.__write_requests.popleft()))
+            if entry is not None:
+                self.__dispatch(entry, selectors.EVENT_WRITE)
+
+    def __dispatch(self, entry: _HubEntry, mask: int) -> None:
+        com_if = entry.com_if
+        try:
+            if mask & selectors.EVENT_WRITE:
+                com_if.hub_on_writable()
+            if mask & selectors.EVENT_READ:
+                com_if.hub_on_readable()
+        except Exception:
+            _LOGGER.exception(f"Error handling events of {com_if.id}, removing it from the hub")
+            self.remove(com_if)
+            return
+        if not com_if.is_open():
+            _LOGGER.info(
+                f"Communication interface {com_if.id} was closed, removing it from the hub"
+            )
+            self.remove(com_if)
+            return
+        self.__update_write_interest(entry)
+        callback = entry.callback if entry.callback is not None else self.callback
+        if callback is None or not mask & selectors.EVENT_READ:
+            return
+        packets = com_if.receive()
+        if packets:
+            try:
+                callback(com_if, packets)
+            except Exception:
+                _LOGGER.exception(f"Packet callback for {com_if.id} failed")
+
+    def __update_write_interest(self, entry: _HubEntry) -> None:
+        events = selectors.EVENT_READ
+        if entry.com_if.hub_wants_write():
+            events |= selectors.EVENT_WRITE
+        if events != entry.events:
+            entry.events = events
+            self.__selector.modify(entry.fileobj, events, entry)
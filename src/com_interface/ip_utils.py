@@ -7,7 +7,7 @@ from enum import auto
 DEFAULT_MAX_RECV_SIZE = 1500
 
 
-@dataclass
+@dataclass(frozen=True)
 class EthAddr:
     ip_addr: str
     port: int
@@ -0,0 +1,323 @@
+"""In-memory communication interfaces which do not use any operating system resources.
+
+A :py:class:`LoopbackComIF` returns all sent packets with its own :py:meth:`LoopbackComIF.receive`
+method. :py:func:`create_loopback_pair` creates two interfaces where the packets sent by one
+interface are received by the other one. The interfaces can be used as a stand-in for a real
+interface in tests and load tests:
+
+.. code-block:: python
+
+    ground, satellite = create_loopback_pair("ground", "satellite", link=LinkProfile(latency=0.1))
+    ground.open()
+    satellite.open()
+    ground.send(telecommand)
+    ...
+    telecommands = satellite.receive()
+
+The optional :py:class:`LinkProfile` simulates the latency, jitter, loss and bandwidth of a
+degraded link. The random loss and jitter are reproducible with a fixed seed.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import io
+import random
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
+
+from com_interface import ComInterface, SendError
+from com_interface.hooks import HookEvent
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import ReceptionSignal, pop_packets
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from com_interface.framing import Framer
+
+
+@dataclasses.dataclass
+class LinkProfile:
+    """Properties of a simulated link. A profile applies to one direction of the link.
+
+    :param latency: Constant delay of every write in seconds.
+    :param jitter: Maximum additional random delay of every write in seconds. The order of the
+        packets is preserved.
+    :param loss: Probability between 0 and 1 that a write is lost.
+    :param bandwidth: Data rate of the link in bytes per second, or None for an unlimited data
+        rate. Writes are delayed until all previous writes were transmitted.
+    :param seed: Seed of the random number generator for the jitter and the loss.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    loss: float = 0.0
+    bandwidth: float | None = None
+    seed: int | None = None
+
+
+class LoopbackComIF(ComInterface):
+    """In-memory interface. Sent packets are returned by the :py:meth:`receive` method of the
+    interface itself or of the connected peer interface.
+
+    Every interface has a reception queue which may only be written by one sending thread and
+    read by one receiving thread. No locks are used, unless the receiving thread waits inside
+    :py:meth:`receive`. Without a :py:class:`LinkProfile` and
+    without a framer, sent packets are handed to the peer as they are.
+    """
+
+    def __init__(
+        self,
+        com_if_id: str = "loopback",
+        framer: Framer | None = None,
+        link: LinkProfile | None = None,
+        max_packets_stored: int | None = None,
+    ):
+        """
+        :param framer: Sent packets are encoded with this framer, and the received data is
+            decoded with it. Interfaces which are connected need to use the same kind of
+            framing.
+        :param link: Simulated link for the packets sent by this interface.
+        :param max_packets_stored: Oldest packets or writes are discarded if more are stored.
+        """
+        self.com_if_id = com_if_id
+        self.framer = framer
+        self.link = link
+        #: Number of writes which were lost because of the simulated loss.
+        self.lost_count = 0
+        self._peer: LoopbackComIF = self
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
+        self.__rx_queue: deque[Any] = deque(maxlen=max_packets_stored)
+        # Received packets which were not returned yet, only used by the receiving thread.
+        self.__packets: deque[bytes] = deque()
+        self.__reception_signal = ReceptionSignal()
+        # The generator only simulates the link, it does not need to be secure.
+        self.__random = random.Random(link.seed if link is not None else None)  # noqa: S311
+        self.__link_free_at = 0.0
+        self.__last_arrival = 0.0
+        self.__open = False
+
+    def connect(self, peer: LoopbackComIF) -> None:
+        """Connect this interface with another interface. Packets sent by this interface are
+        received by the peer, and vice versa."""
+        self._peer = peer
+        peer._peer = self
+
+    @property
+    def id(self) -> str:
+        return self.com_if_id
+
+    def initialize(self, args: Any = 0) -> None:
+        pass
+
+    def open(self, args: Any = 0) -> None:
+        self.__open = True
+
+    def is_open(self) -> bool:
+        return self.__open
+
+    def close(self, args: Any = 0) -> None:
+        """Close the interface. Packets which were not received yet are discarded."""
+        self.__open = False
+        self.__rx_queue.clear()
+        self.__packets.clear()
+        if self.framer is not None:
+            self.framer.clear()
+        self.__reception_signal.notify()
+
+    def send(self, data: bytes | bytearray) -> None:
+        """
+        :raises SendError: The interface is not open.
+        """
+        if not self.__open:
+            raise SendError("loopback interface is not open", None)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        if self.framer is not None:
+            data = self.framer.encode(data)
+        self._metrics.packets_sent(1, len(data))
+        self.__write(bytes(data))
+
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Hands all packets to the peer at once. With a framer, the packets are encoded into
+        a single write.
+
+        :raises SendError: The interface is not open.
+        """
+        if not self.__open:
+            raise SendError("loopback interface is not open", None)
+        packets = list(packets)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        if self.framer is not None:
+            data = self.framer.encode_many(packets)
+            self._metrics.packets_sent(len(packets), len(data))
+            self.__write(bytes(data))
+            return
+        self._metrics.packets_sent(len(packets), sum(len(packet) for packet in packets))
+        if self.link is None:
+            self._peer.__deliver([bytes(packet) for packet in packets])
+        else:
+            for packet in packets:
+                self.__write(bytes(packet))
+
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        """With a simulated link, a waiting call returns once the first packet has arrived."""
+        self.__reception_signal.reset()
+        self.__take_arrived()
+        if not self.__packets and timeout != 0:
+            self.__wait_for_packets(timeout)
+        packets = pop_packets(self.__packets, max_packets)
+        if self.__packets or self.__rx_queue:
+            self.__reception_signal.notify()
+        self._metrics.packets_delivered(len(packets))
+        if self._hooks is not None and packets:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packets)
+        return packets
+
+    def fileno(self) -> int:
+        """
+        :raises io.UnsupportedOperation: The peer simulates a link, so the arrival of a packet
+            can not be signalled.
+        """
+        if self._peer.link is not None:
+            raise io.UnsupportedOperation(
+                "loopback interfaces with a simulated link have no file descriptor"
+            )
+        return self.__reception_signal.fileno()
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        """Number of packets or, with a framer, written chunks which can be received now."""
+        if self._peer.link is None:
+            return len(self.__packets) + len(self.__rx_queue)
+        now = time.monotonic()
+        # Copy the queue, the sending thread might append to it.
+        return len(self.__packets) + sum(
+            1 for arrival, _ in list(self.__rx_queue) if arrival <= now
+        )
+
+    def __take_arrived(self) -> None:
+        """Move the arrived packets from the reception queue to the received packets."""
+        rx_queue = self.__rx_queue
+        received = []
+        if self._peer.link is None:
+            while rx_queue:
+                received.append(rx_queue.popleft())
+        else:
+            now = time.monotonic()
+            # The writes are ordered by their arrival time.
+            while rx_queue and rx_queue[0][0] <= now:
+                received.append(rx_queue.popleft()[1])
+        self.__packets.extend(self.__decode(received) if self.framer is not None else received)
+
+    def __wait_for_packets(self, timeout: float | None) -> None:
+        rx_queue = self.__rx_queue
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.__packets and self.__open:
+            wait = None
+            if rx_queue and self._peer.link is not None:
+                # Wait until the next write arrives over the simulated link.
+                wait = max(0.0, rx_queue[0][0] - time.monotonic())
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                wait = remaining if wait is None else min(wait, remaining)
+            queued = len(rx_queue)
+            self.__reception_signal.wait_for(
+                lambda queued=queued: len(rx_queue) != queued or not self.__open, wait
+            )
+            self.__take_arrived()
+
+    def __write(self, data: bytes) -> None:
+        """Hand one write to the peer, applying the simulated link."""
+        link = self.link
+        if link is None:
+            self._peer.__deliver([data])
+            return
+        if link.loss > 0 and self.__random.random() < link.loss:
+            self.lost_count += 1
+            return
+        now = time.monotonic()
+        # The write is transmitted once the link is free and arrives after the link latency.
+        transmitted = max(now, self.__link_free_at)
+        if link.bandwidth is not None:
+            transmitted += len(data) / link.bandwidth
+        self.__link_free_at = transmitted
+        arrival = transmitted + link.latency
+        if link.jitter > 0:
+            arrival += self.__random.uniform(0.0, link.jitter)
+        arrival = max(arrival, self.__last_arrival)
+        self.__last_arrival = arrival
+        self._peer.__deliver([data], arrival)
+
+    def __deliver(self, chunks: list[bytes], arrival: float | None = None) -> None:
+        """Called by the sending thread to put packets, or encoded data with a framer, into the
+        reception queue. With a simulated link, the arrival time is stored with the data."""
+        metrics = self._metrics
+        metrics.bytes_received(sum(len(chunk) for chunk in chunks))
+        hooks = self._hooks
+        if hooks is not None:
+            for chunk in chunks:
+                hooks.emit(self, HookEvent.BYTES_RECEIVED, chunk)
+        if self.framer is None:
+            # Without framing, every chunk is a packet. Framed data is counted once decoded.
+            metrics.packets_received(len(chunks))
+            if hooks is not None:
+                hooks.emit(self, HookEvent.FRAMES_DECODED, chunks)
+        rx_queue = self.__rx_queue
+        if rx_queue.maxlen is not None:
+            metrics.dropped_packets += max(0, len(rx_queue) + len(chunks) - rx_queue.maxlen)
+        if arrival is None:
+            rx_queue.extend(chunks)
+        else:
+            rx_queue.extend((arrival, chunk) for chunk in chunks)
+        self.__reception_signal.notify()
+
+    def __decode(self, chunks: list[bytes]) -> list[bytes]:
+        assert self.framer is not None
+        packets = []
+        for chunk in chunks:
+            packets.extend(self.framer.feed(chunk))
+        if packets:
+            self._metrics.packets_received(len(packets))
+            if self._hooks is not None:
+                self._hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        return packets
+
+    def __metric_gauges(self) -> dict[str, int]:
+        gauges = {"rx_queue_depth": len(self.__rx_queue) + len(self.__packets)}
+        if self.framer is not None:
+            gauges["decode_errors"] = self.framer.parsing_error_count
+        return gauges
+
+
+def create_loopback_pair(
+    first_id: str = "loopback_a",
+    second_id: str = "loopback_b",
+    framer_factory: Callable[[], Framer] | None = None,
+    link: LinkProfile | None = None,
+    max_packets_stored: int | None = None,
+) -> tuple[LoopbackComIF, LoopbackComIF]:
+    """Create two connected loopback interfaces.
+
+    :param framer_factory: Creates the framer of each interface, for example
+        :py:class:`com_interface.framing.CobsFramer`.
+    :param link: Simulated link which is used for both directions. The random number generators
+        of both directions are seeded with the same seed.
+    """
+    interfaces = tuple(
+        LoopbackComIF(
+            com_if_id,
+            framer_factory() if framer_factory is not None else None,
+            link,
+            max_packets_stored,
+        )
+        for com_if_id in (first_id, second_id)
+    )
+    interfaces[0].connect(interfaces[1])
+    return interfaces
@@ -0,0 +1,227 @@
+"""Low overhead metrics for the communication interfaces.
+
+Every :py:class:`com_interface.ComInterface` and :py:class:`com_interface.aio.AsyncComInterface`
+provides an :py:class:`InterfaceMetrics` instance with the ``metrics`` property. The metrics can
+be exported as a dictionary with :py:meth:`InterfaceMetrics.snapshot`:
+
+.. code-block:: python
+
+    snapshot = com_if.metrics.snapshot()
+    print(snapshot["rx_packets"], snapshot["rx_byte_rate"], snapshot["delivery_latency"]["p99_us"])
+"""
+
+from __future__ import annotations
+
+import math
+import time
+import types
+import weakref
+from collections import deque
+from typing import Any, Callable
+
+#: Every n-th received packet is timestamped to measure the delivery latency.
+DEFAULT_SAMPLE_INTERVAL = 16
+
+
+class LatencyHistogram:
+    """Latency histogram with power of two bucket bounds in microseconds.
+
+    Bucket 0 counts latencies below 1 us, bucket ``i`` counts latencies from ``2**(i - 1)`` us up
+    to ``2**i`` us and the last bucket counts all larger latencies. Recording a latency only
+    increments a list element, no lock is used.
+
+    >>> histogram = LatencyHistogram()
+    >>> for latency_us in (3, 5, 100):
+    ...     histogram.record(latency_us * 1000)
+    >>> histogram.count
+    3
+    >>> histogram.percentile(0.5)
+    8.0
+    """
+
+    NUM_BUCKETS = 32
+
+    def __init__(self):
+        self.buckets = [0] * self.NUM_BUCKETS
+
+    def record(self, latency_ns: int) -> None:
+        self.buckets[min((latency_ns // 1000).bit_length(), self.NUM_BUCKETS - 1)] += 1
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets)
+
+    @classmethod
+    def upper_bound_us(cls, bucket: int) -> float:
+        """Upper bound of the given bucket in microseconds."""
+        if bucket >= cls.NUM_BUCKETS - 1:
+            return math.inf
+        return float(2**bucket)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket which contains the given percentile in microseconds, or NaN
+        if no latencies were recorded.
+
+        :param fraction: Percentile as a fraction between 0 and 1.
+        """
+        buckets = list(self.buckets)
+        total = sum(buckets)
+        if total == 0:
+            return math.nan
+        rank = max(1, math.ceil(fraction * total))
+        cumulative = 0
+        for bucket, count in enumerate(buckets):
+            cumulative += count
+            if cumulative >= rank:
+                return self.upper_bound_us(bucket)
+        return math.inf
+
+    def reset(self) -> None:
+        self.buckets = [0] * self.NUM_BUCKETS
+
+    def snapshot(self) -> dict[str, Any]:
+        buckets = list(self.buckets)
+        last_used = max((idx for idx, count in enumerate(buckets) if count > 0), default=-1)
+        return {
+            "count": sum(buckets),
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+            # Trailing empty buckets are omitted.
+            "buckets": buckets[: last_used + 1],
+            "bucket_bounds_us": [self.upper_bound_us(idx) for idx in range(last_used + 1)],
+        }
+
+
+class InterfaceMetrics:
+    """Counters, gauges and the delivery latency of a communication interface.
+
+    The counters are plain integer attributes which are updated without any locks. The reception
+    counters are only updated by the thread which receives the data from the transport, and the
+    delivery counters only by the thread calling ``receive``. Concurrent send calls from multiple
+    threads may lose single increments of the transmission counters.
+
+    Values which the interface already tracks, like the queue depths or the decode errors of a
+    parser, are not counted on the hot path. They are read by the ``gauges`` callable when a
+    snapshot is taken.
+
+    The delivery latency is the time between the arrival of a packet in the reception thread and
+    its delivery by ``receive``. Only every n-th packet is timestamped. The latency is
+    approximated while packets are dropped because of a full queue.
+    """
+
+    def __init__(
+        self,
+        gauges: Callable[[], dict[str, int]] | None = None,
+        sample_interval: int = DEFAULT_SAMPLE_INTERVAL,
+    ):
+        """
+        :param gauges: Returns the current values of the gauges of the interface, for example
+            ``rx_queue_depth``, ``tx_queue_depth`` and ``decode_errors``. The returned values
+            are added to every snapshot. Bound methods are referenced weakly, so the metrics
+            do not keep the interface alive.
+        :param sample_interval: Every n-th received packet is timestamped to determine the
+            delivery latency. 0 disables the latency measurement.
+        """
+        self.__gauges: Callable[[], Any] | None = None
+        if isinstance(gauges, types.MethodType):
+            self.__gauges = weakref.WeakMethod(gauges)
+        elif gauges is not None:
+            self.__gauges = lambda: gauges
+        self.sample_interval = sample_interval
+        self.delivery_latency = LatencyHistogram()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset all counters and the latency histogram. The gauges are not affected."""
+        #: Number of packets received from the transport.
+        self.rx_packets = 0
+        #: Number of bytes received from the transport, including the framing overhead.
+        self.rx_bytes = 0
+        #: Number of packets returned by ``receive``.
+        self.delivered_packets = 0
+        #: Number of received packets which were discarded or overwritten because of a full
+        #: packet queue.
+        self.dropped_packets = 0
+        #: Number of packets handed to the transport.
+        self.tx_packets = 0
+        #: Number of bytes handed to the transport, including the framing overhead.
+        self.tx_bytes = 0
+        #: Number of connections which were established again after the first connection.
+        self.reconnects = 0
+        self.delivery_latency.reset()
+        self.__samples: deque[tuple[int, int]] = deque()
+        self.__next_sample = 0
+        self.__start = time.monotonic()
+        self.__last_snapshot = (self.__start, 0, 0, 0, 0)
+
+    def bytes_received(self, num_bytes: int) -> None:
+        self.rx_bytes += num_bytes
+
+    def packets_received(self, num_packets: int) -> None:
+        """Count packets which were received at the same time. Needs to be called by the
+        reception thread before the packets are put into the packet queue."""
+        seq = self.rx_packets
+        end = seq + num_packets
+        self.rx_packets = end
+        if self.sample_interval > 0 and self.__next_sample < end:
+            self.__samples.append((self.__next_sample, time.perf_counter_ns()))
+            # All packets of this batch share the same arrival time, so one sample is sufficient.
+            self.__next_sample += (
+                (end - 1 - self.__next_sample) // self.sample_interval + 1
+            ) * self.sample_interval
+
+    def packets_delivered(self, num_packets: int) -> None:
+        """Count packets which were returned by ``receive``."""
+        if num_packets == 0:
+            return
+        self.delivered_packets += num_packets
+        samples = self.__samples
+        if samples:
+            # Packets leave the queue in the order of arrival, either delivered or dropped.
+            departed = self.delivered_packets + self.dropped_packets
+            now = time.perf_counter_ns()
+            while samples and samples[0][0] < departed:
+                self.delivery_latency.record(now - samples.popleft()[1])
+
+    def packets_sent(self, num_packets: int, num_bytes: int) -> None:
+        self.tx_packets += num_packets
+        self.tx_bytes += num_bytes
+
+    def snapshot(self) -> dict[str, Any]:
+        """Export the metrics as a dictionary.
+
+        The rates are the average rates per second since the previous snapshot, or since the
+        creation or the last reset for the first snapshot.
+        """
+        now = time.monotonic()
+        counters = (self.rx_packets, self.rx_bytes, self.tx_packets, self.tx_bytes)
+        last_time, *last_counters = self.__last_snapshot
+        self.__last_snapshot = (now, *counters)
+        elapsed = now - last_time
+        rx_packet_rate, rx_byte_rate, tx_packet_rate, tx_byte_rate = (
+            (current - last) / elapsed if elapsed > 0 else 0.0
+            for current, last in zip(counters, last_counters)
+        )
+        snapshot = {
+            "uptime": now - self.__start,
+            "rx_packets": counters[0],
+            "rx_bytes": counters[1],
+            "tx_packets": counters[2],
+            "tx_bytes": counters[3],
+            "delivered_packets": self.delivered_packets,
+            "dropped_packets": self.dropped_packets,
+            "reconnects": self.reconnects,
+            "decode_errors": 0,
+            "rx_queue_depth": 0,
+            "tx_queue_depth": 0,
+            "rx_packet_rate": rx_packet_rate,
+            "rx_byte_rate": rx_byte_rate,
+            "tx_packet_rate": tx_packet_rate,
+            "tx_byte_rate": tx_byte_rate,
+        }
+        gauges = self.__gauges() if self.__gauges is not None else None
+        if gauges is not None:
+            snapshot.update(gauges())
+        snapshot["delivery_latency"] = self.delivery_latency.snapshot()
+        return snapshot
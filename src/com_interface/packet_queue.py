@@ -0,0 +1,264 @@
+"""Thread-safe bounded packet queue which is shared by the interfaces using a separate
+reception or transmission thread."""
+
+from __future__ import annotations
+
+import contextlib
+import enum
+import os
+import socket
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class OverflowPolicy(enum.Enum):
+    """Determines what happens if a packet is put into a full :py:class:`BoundedPacketQueue`."""
+
+    #: Remove the oldest packet to make room for the new packet.
+    DROP_OLDEST = enum.auto()
+    #: Discard the new packet.
+    DROP_NEWEST = enum.auto()
+    #: Block the producer until there is room for the new packet or the timeout expires.
+    BLOCK = enum.auto()
+
+
+class BoundedPacketQueue:
+    """FIFO packet queue with an optional maximum size.
+
+    The number of packets which were discarded because of the overflow policy is tracked by the
+    :py:attr:`dropped_count` counter.
+
+    >>> packet_queue = BoundedPacketQueue(2, OverflowPolicy.DROP_OLDEST)
+    >>> for packet in (b"\\x01", b"\\x02", b"\\x03"):
+    ...     _ = packet_queue.put(packet)
+    >>> packet_queue.pop_all()
+    [b'\\x02', b'\\x03']
+    >>> packet_queue.dropped_count
+    1
+    """
+
+    def __init__(
+        self,
+        maxsize: int | None = None,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        on_discard: Callable[[Any], None] | None = None,
+    ):
+        """
+        :param maxsize: Maximum number of stored packets. None for an unbounded queue.
+        :param overflow_policy: Policy which is applied if the queue is full.
+        :param on_discard: Called with every packet which is discarded because of the overflow
+            policy. It is called by the thread which put the new packet into the queue, after
+            the internal lock was released.
+        """
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.on_discard = on_discard
+        self.dropped_count = 0
+        self._packets: deque[bytes] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, packet: bytes, timeout: float | None = None) -> bool:
+        """Put a packet into the queue.
+
+        :param timeout: Only used for the :py:attr:`OverflowPolicy.BLOCK` policy. None to wait
+            indefinitely.
+        :return: True if the packet was stored, False if it was discarded or the queue was
+            closed.
+        """
+        discarded = None
+        stored = True
+        with self._cond:
+            if self._closed:
+                return False
+            if self.maxsize is not None and len(self._packets) >= self.maxsize:
+                if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+                    discarded = self._packets.popleft()
+                    self.dropped_count += 1
+                elif self.overflow_policy == OverflowPolicy.DROP_NEWEST or not self._cond.wait_for(
+                    lambda: len(self._packets) < self.maxsize or self._closed, timeout
+                ):
+                    discarded, stored = packet, False
+                    self.dropped_count += 1
+                elif self._closed:
+                    return False
+            if stored:
+                self._packets.append(packet)
+                self._cond.notify_all()
+        if discarded is not None and self.on_discard is not None:
+            self.on_discard(discarded)
+        return stored
+
+    def put_many(self, packets: Iterable[bytes], timeout: float | None = None) -> int:
+        """Put multiple packets into the queue.
+
+        :return: Number of stored packets.
+        """
+        return sum(self.put(packet, timeout) for packet in packets)
+
+    def pop_all(self, max_packets: int | None = None) -> list[bytes]:
+        """Remove and return the stored packets in FIFO order.
+
+        :param max_packets: Maximum number of returned packets. None to return all packets.
+        """
+        with self._cond:
+            if max_packets is None or max_packets >= len(self._packets):
+                packets = list(self._packets)
+                self._packets.clear()
+            else:
+                packets = [self._packets.popleft() for _ in range(max_packets)]
+            self._cond.notify_all()
+            return packets
+
+    def clear(self) -> None:
+        with self._cond:
+            self._packets.clear()
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Reject all further packets until :py:meth:`open` is called. Producers which are
+        blocked by the :py:attr:`OverflowPolicy.BLOCK` policy are woken up and their packets are
+        rejected as well. The stored packets are kept."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def open(self) -> None:
+        """Accept packets again after :py:meth:`close` was called."""
+        with self._cond:
+            self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return len(self._packets)
+
+
+class ReceptionSignal:
+    """Wakes up consumers which wait inside a ``receive`` call until a reception thread has
+    stored new packets. The reception thread only acquires the internal lock while a consumer is
+    waiting, so notifying is cheap otherwise.
+
+    The signal also provides a file descriptor for external event loops with :py:meth:`fileno`.
+    It is created on the first call, an ``eventfd`` on Linux and a socket pair on other
+    platforms. Without it, no system calls are made.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._waiters = 0
+        # Whether packets were stored since the last reset.
+        self._ready = False
+        self._fd: int | None = None
+        # Only used if eventfd is not available.
+        self._socket_pair: tuple[socket.socket, socket.socket] | None = None
+
+    def notify(self) -> None:
+        """Called after packets were stored or after the interface was closed."""
+        self._set_ready()
+        # The consumer increments the counter before it checks for packets, so a notification
+        # can not get lost.
+        if self._waiters:
+            with self._cond:
+                self._cond.notify_all()
+
+    def fileno(self) -> int:
+        """File descriptor which is readable after :py:meth:`notify` was called, until the next
+        :py:meth:`reset` call."""
+        with self._cond:
+            if self._fd is None:
+                if hasattr(os, "eventfd"):
+                    self._fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+                else:
+                    recv_socket, send_socket = socket.socketpair()
+                    recv_socket.setblocking(False)
+                    send_socket.setblocking(False)
+                    self._socket_pair = recv_socket, send_socket
+                    self._fd = recv_socket.fileno()
+                # Packets might already be waiting.
+                if self._ready:
+                    self._write_fd()
+            return self._fd
+
+    def reset(self) -> None:
+        """Called by the consumer before it takes packets. If packets are left afterwards, the
+        consumer needs to call :py:meth:`notify` again."""
+        if self._ready:
+            # The descriptor is drained before the state is cleared. A reception thread which
+            # stores packets in between does not write the descriptor, but these packets are
+            # taken by the consumer after this call. Clearing the state first would allow the
+            # write to be drained while the state stays set, so the descriptor would never
+            # become readable again.
+            if self._fd is not None:
+                self._read_fd()
+            self._ready = False
+
+    def take(self, packets: deque[bytes], max_packets: int | None = None) -> list[bytes]:
+        """Take packets with :py:func:`pop_packets` and update the readiness state."""
+        self.reset()
+        taken = pop_packets(packets, max_packets)
+        if packets:
+            self._set_ready()
+        return taken
+
+    def _set_ready(self) -> None:
+        if not self._ready:
+            # The consumer resets the state before it takes packets, so a notification can not
+            # get lost. Redundant writes only cause a spurious wakeup.
+            self._ready = True
+            if self._fd is not None:
+                self._write_fd()
+
+    def _write_fd(self) -> None:
+        # The descriptor might already be readable.
+        with contextlib.suppress(BlockingIOError):
+            if self._socket_pair is None:
+                os.eventfd_write(self._fd, 1)
+            else:
+                self._socket_pair[1].send(b"\x00")
+
+    def _read_fd(self) -> None:
+        with contextlib.suppress(BlockingIOError):
+            if self._socket_pair is None:
+                os.eventfd_read(self._fd)
+            else:
+                while self._socket_pair[0].recv(4096):
+                    pass
+
+    def __del__(self):
+        if self._socket_pair is not None:
+            for sock in self._socket_pair:
+                sock.close()
+        elif self._fd is not None:
+            os.close(self._fd)
+
+    def wait_for(self, predicate: Callable[[], bool], timeout: float | None) -> bool:
+        """Wait until the predicate is true.
+
+        :param timeout: Maximum time to wait in seconds. None to wait indefinitely.
+        :return: The last result of the predicate.
+        """
+        with self._cond:
+            self._waiters += 1
+            try:
+                return self._cond.wait_for(predicate, timeout)
+            finally:
+                self._waiters -= 1
+
+
+def pop_packets(packets: deque[bytes], max_packets: int | None = None) -> list[bytes]:
+    """Remove packets from the left side of a deque which is filled from the right side by a
+    reception thread.
+
+    :param max_packets: Maximum number of returned packets. None to return all packets.
+    """
+    count = len(packets)
+    if max_packets is not None:
+        count = min(count, max_packets)
+    return [packets.popleft() for _ in range(count)]
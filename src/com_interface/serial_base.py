@@ -22,11 +22,13 @@ class SerialCommunicationType(enum.Enum):
     Right now, two serial communication methods are supported. One uses frames with a fixed size
     containing PUS packets and the other uses a simple ASCII based transport layer called DLE.
     If DLE is used, it is expected that the sender side encoded the packets with the DLE
-    protocol. Any packets sent will also be encoded.
+    protocol. Any packets sent will also be encoded. The FRAMED type uses an arbitrary
+    :py:class:`com_interface.framing.Framer`.
     """
 
     COBS = 0
     DLE_ENCODING = 2
+    FRAMED = 3
 
 
 @dataclasses.dataclass
@@ -36,6 +38,8 @@ class SerialCfg:
     baud_rate: int
     # Used when polling the serial port, determines the delay between polling calls.
     polling_frequency: float = 0.1
+    # Maximum number of bytes read from the serial port in one read call.
+    read_chunk_size: int = 4096
 
 
 class SerialComBase:
@@ -3,22 +3,33 @@ from __future__ import annotations
 import collections
 import logging
 import threading
-import time
-from typing import Any
-
-from cobs import cobs
+from typing import TYPE_CHECKING, Any
 
 from com_interface import ComInterface
+from com_interface.framing import CobsFrameParser, cobs_max_encoded_len, encode_into
+from com_interface.hooks import HookEvent
+from com_interface.hub import HubDriven
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import ReceptionSignal
 from com_interface.serial_base import SerialCfg, SerialComBase, SerialCommunicationType
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import serial
+
+    from com_interface.hub import ComHub, PacketCallback
 
-class SerialCobsComIF(SerialComBase, ComInterface):
+
+class SerialCobsComIF(SerialComBase, ComInterface, HubDriven):
     """Serial communication interface which uses the
     `COBS protocol <https://pypi.org/project/cobs/>`_ to encode and decode packets.
 
     This class will spin up a receiver thread on the :meth:`open` call to poll
-    for COBS encoded packets. It decodes all received COBS frames using :py:func:`cobs.cobs.decode`.
-    This means that the :meth:`close` call might block until the receiver thread has shut down.
+    for COBS encoded packets. The receiver thread decodes all received COBS frames, so
+    :py:meth:`receive` only returns the already decoded packets. This means that the
+    :meth:`close` call might block until the receiver thread has shut down.
+    No thread is started if the interface is driven by a :py:class:`com_interface.hub.ComHub`.
     """
 
     def __init__(self, ser_cfg: SerialCfg):
@@ -29,21 +40,31 @@ class SerialCobsComIF(SerialComBase, ComInterface):
         )
         self.__polling_shutdown = threading.Event()
         self.__reception_thread: threading.Thread | None = None
-        self._packet_deque = collections.deque()
-        self._serial_ring_buf = collections.deque()
-        self._parse_buffer = bytearray()
-        self.parsing_error_count = 0
-
-    def encode_data(self, data: bytes | bytearray) -> bytearray:
+        # Decoded packets. deque is thread-safe for appends and pops from opposite sides.
+        self._packet_deque: collections.deque[bytes] = collections.deque()
+        self.__reception_signal = ReceptionSignal()
+        self._parser = CobsFrameParser()
+        # Reusable buffer for encoded frames, grown on demand by the send calls.
+        self._tx_buf = bytearray(cobs_max_encoded_len(1024))
+        self.__tx_lock = threading.Lock()
+        self.__hub: ComHub | None = None
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
+
+    @staticmethod
+    def encode_data(data: bytes | bytearray) -> bytearray:
         """Encodes the data using the COBS protocol.
         :param data: Data to encode.
-        :return: Encoded data.
+        :return: Encoded data, including the 0 delimiters.
         """
-        encoded = bytearray([0])
-        encoded.extend(cobs.encode(data))
-        encoded.append(0)
+        encoded = bytearray(cobs_max_encoded_len(len(data)))
+        del encoded[encode_into(data, encoded) :]
         return encoded
 
+    @property
+    def parsing_error_count(self) -> int:
+        """Number of received frames which could not be decoded."""
+        return self._parser.parsing_error_count
+
     @property
     def id(self) -> str:
         return self.ser_cfg.com_if_id
@@ -54,6 +75,11 @@ class SerialCobsComIF(SerialComBase, ComInterface):
     def open(self, args: Any = None) -> None:
         """Spins up a receiver thread to permanently check for new COBS encoded packets."""
         super().open_port()
+        if self.__hub is not None:
+            assert self.serial is not None
+            # The hub only reads when data is available.
+            self.serial.timeout = 0
+            return
         self.__polling_shutdown.clear()
         self.__reception_thread = threading.Thread(target=self._poll_cobs_packets, daemon=True)
         self.__reception_thread.start()
@@ -62,68 +88,122 @@ class SerialCobsComIF(SerialComBase, ComInterface):
         return self.serial is not None
 
     def close(self, args: Any = None) -> None:
-        if self.__reception_thread is None:
+        if self.__hub is not None:
+            self.__hub.remove(self)
             return
-        self.__polling_shutdown.set()
-        self.__reception_thread.join(0.4)
+        if self.serial is None:
+            return
+        if self.__reception_thread is not None:
+            self.__polling_shutdown.set()
+            # Wake up the reception thread if it is blocked inside a read call.
+            self.serial.cancel_read()
+            self.__reception_thread.join(0.4)
+            self.__reception_thread = None
         super().close_port()
+        self.__reception_signal.notify()
 
     def send(self, data: bytes | bytearray) -> None:
-        """This function encodes all data using the :py:func:`cobs.cobs.encode` function."""
-        assert self.serial is not None
-        self.serial.write(self.encode_data(data))
+        """This function encodes the data with :py:func:`encode_into` into a buffer owned by the
+        interface, which is reused for all send calls."""
+        self.send_many((data,))
 
-    def receive(self, parameters: Any = 0) -> list[bytes]:
-        packet_list = []
-        self._parse_for_packets()
-        while self._packet_deque:
-            packet_list.append(self._packet_deque.pop())
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Encodes all packets into one buffer which is then written with a single write call."""
+        assert self.serial is not None
+        if self._hooks is not None:
+            packets = list(packets)
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        with self.__tx_lock:
+            tx_len = 0
+            num_packets = 0
+            for packet in packets:
+                required_len = tx_len + cobs_max_encoded_len(len(packet))
+                if required_len > len(self._tx_buf):
+                    self._tx_buf.extend(bytes(required_len - len(self._tx_buf)))
+                tx_len += encode_into(packet, self._tx_buf, tx_len)
+                num_packets += 1
+            if tx_len > 0:
+                with memoryview(self._tx_buf) as tx_view:
+                    self.serial.write(tx_view[:tx_len])
+                self._metrics.packets_sent(num_packets, tx_len)
+
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        packet_deque = self._packet_deque
+        if not packet_deque and timeout != 0:
+            self.__reception_signal.wait_for(
+                lambda: bool(packet_deque) or not self.is_open(), timeout
+            )
+        packet_list = self.__reception_signal.take(packet_deque, max_packets)
+        self._metrics.packets_delivered(len(packet_list))
+        if self._hooks is not None and packet_list:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packet_list)
         return packet_list
 
+    def fileno(self) -> int:
+        return self.__reception_signal.fileno()
+
     def packets_available(self, parameters: Any = 0) -> int:
-        self._parse_for_packets()
         return self._packet_deque.__len__()
 
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        self._packet_callback = callback
+
     def clear(self) -> None:
         self._packet_deque.clear()
-        self._parse_buffer = bytearray()
-        self._serial_ring_buf.clear()
-
-    def _parse_for_packets(self) -> None:
-        available_fragments = self._serial_ring_buf.__len__()
-        while available_fragments > 0:
-            self._parse_buffer.extend(self._serial_ring_buf.pop())
-            available_fragments -= 1
-        self._parsing_algorithm()
-
-    def _parsing_algorithm(self) -> None:
-        start_found = False
-        start_idx = 0
-        for idx, byte in enumerate(self._parse_buffer):
-            if byte == 0:
-                if start_found:
-                    try:
-                        packet = cobs.decode(self._parse_buffer[start_idx + 1 : idx])
-                        if len(packet) > 0:
-                            self._packet_deque.appendleft(packet)
-                    except cobs.DecodeError:
-                        self.parsing_error_count += 1
-                    self._parse_buffer = self._parse_buffer[idx + 1 :]
-                    if len(self._parse_buffer) > 0:
-                        self._parsing_algorithm()
-                else:
-                    start_found = True
-                    start_idx = idx
+        self._parser.clear()
+
+    def hub_attach(self, hub: ComHub | None) -> None:
+        self.__hub = hub
+
+    def hub_fileobj(self) -> serial.Serial:
+        assert self.serial is not None
+        return self.serial
+
+    def hub_on_readable(self) -> None:
+        assert self.serial is not None
+        bytes_received = self.serial.read(self.ser_cfg.read_chunk_size)
+        if len(bytes_received) > 0:
+            self._handle_received_bytes(bytes_received)
+
+    def _handle_received_bytes(self, bytes_received: bytes) -> None:
+        """Decode the received bytes. Called by the reception thread or the hub."""
+        metrics = self._metrics
+        metrics.bytes_received(len(bytes_received))
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.emit(self, HookEvent.BYTES_RECEIVED, bytes_received)
+        self._parser.feed(bytes_received)
+        packets = self._parser.parse()
+        if not packets:
+            return
+        metrics.packets_received(len(packets))
+        if hooks is not None:
+            hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        if not self._deliver_to_callback(packets):
+            self._packet_deque.extend(packets)
+            self.__reception_signal.notify()
+
+    def __metric_gauges(self) -> dict[str, int]:
+        return {
+            "rx_queue_depth": len(self._packet_deque),
+            "decode_errors": self._parser.parsing_error_count,
+        }
 
     def _poll_cobs_packets(self) -> None:
         assert self.serial is not None
-        # Poll permanently, but it is possible to join this thread every 200 ms
-        # Timeout of 0, we poll and delay ourselves.
-        self.serial.timeout = 0
-        while True:
-            bytes_received = self.serial.read()
-            self._serial_ring_buf.appendleft(bytes_received)
-            if len(bytes_received) == 0:
-                time.sleep(self.ser_cfg.polling_frequency)
-            if self.__polling_shutdown.is_set():
-                break
+        # Block inside the OS until data arrives, but wake up periodically to check whether the
+        # thread should be shut down.
+        self.serial.timeout = self.ser_cfg.polling_frequency
+        chunk_size = self.ser_cfg.read_chunk_size
+        while not self.__polling_shutdown.is_set():
+            bytes_waiting = self.serial.in_waiting
+            # Drain all waiting bytes at once. If no bytes are waiting, perform a blocking read
+            # for the first byte of the next burst.
+            if bytes_waiting > 0:
+                bytes_received = self.serial.read(min(bytes_waiting, chunk_size))
+            else:
+                bytes_received = self.serial.read(1)
+            if len(bytes_received) > 0:
+                self._handle_received_bytes(bytes_received)
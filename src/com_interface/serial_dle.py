@@ -4,13 +4,25 @@ import dataclasses
 import logging
 import threading
 from collections import deque
+from typing import TYPE_CHECKING
 
-import serial
-from dle_encoder import ETX_CHAR, STX_CHAR, DleEncoder, DleErrorCodes
+from dle_encoder import DleEncoder
 
 from com_interface import ComInterface
+from com_interface.framing import DleFrameParser
+from com_interface.hooks import HookEvent
+from com_interface.hub import HubDriven
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import ReceptionSignal
 from com_interface.serial_base import SerialCfg, SerialComBase, SerialCommunicationType
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import serial
+
+    from com_interface.hub import ComHub, PacketCallback
+
 
 @dataclasses.dataclass
 class DleCfg:
@@ -19,13 +31,15 @@ class DleCfg:
     encode_cr: bool = True
 
 
-class SerialDleComIF(SerialComBase, ComInterface):
+class SerialDleComIF(SerialComBase, ComInterface, HubDriven):
     """Serial communication interface which uses the
     `DLE protocol <https://pypi.org/project/dle-encoder/>`_ to encode and decode packets.
 
     This class will spin up a receiver thread on the :meth:`open` call to poll for DLE encoded
-    packets. This means that the :meth:`close` call might block until the receiver thread has shut
-    down.
+    packets. The receiver thread reads the serial data in chunks and decodes the frames as they
+    arrive using a :py:class:`DleFrameParser`. This means that the :meth:`close` call might block
+    until the receiver thread has shut down. No thread is started if the interface is driven by a
+    :py:class:`com_interface.hub.ComHub`.
     """
 
     def __init__(self, ser_cfg: SerialCfg, dle_cfg: DleCfg | None):
@@ -38,7 +52,24 @@ class SerialDleComIF(SerialComBase, ComInterface):
         self.__encoder = DleEncoder()
         self.__reception_thread = None
         self.__reception_buffer = deque()
+        self.__reception_signal = ReceptionSignal()
         self.__polling_shutdown: None | threading.Event = threading.Event()
+        self._parser = DleFrameParser(
+            escape_cr=self.__encoder.escape_cr,
+            max_frame=dle_cfg.dle_max_frame if dle_cfg else None,
+        )
+        self.__hub: ComHub | None = None
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
+
+    @property
+    def parsing_error_count(self) -> int:
+        """Number of received frames which could not be decoded."""
+        return self._parser.parsing_error_count
+
+    @property
+    def dropped_frame_count(self) -> int:
+        """Number of unterminated or oversized frames which were dropped."""
+        return self._parser.dropped_frame_count
 
     @property
     def id(self) -> str:
@@ -51,57 +82,123 @@ class SerialDleComIF(SerialComBase, ComInterface):
     def open(self, args: any | None = None) -> None:
         """Spins up a receiver thread to permanently check for new DLE encoded packets."""
         super().open_port()
+        if self.__hub is not None:
+            # The hub only reads when data is available.
+            self.serial.timeout = 0
+            return
         self.__polling_shutdown.clear()
         self.__reception_thread = threading.Thread(target=self.__poll_dle_packets, daemon=True)
         self.__reception_thread.start()
 
     def __poll_dle_packets(self) -> None:
-        # Poll permanently, but it is possible to join this thread every 200 ms
-        self.serial.timeout = 0.2
-        data = bytearray()
-        while True:
-            byte = self.serial.read()
-            if len(byte) == 1:
-                if byte[0] == STX_CHAR:
-                    data.append(byte[0])
-                    self.serial.timeout = 0.1
-                    if self.dle_cfg and self.dle_cfg.dle_max_frame:
-                        bytes_rcvd = self.serial.read_until(
-                            serial.to_bytes([ETX_CHAR]), self.dle_cfg.dle_max_frame
-                        )
-                    else:
-                        bytes_rcvd = self.serial.read_until(serial.to_bytes([ETX_CHAR]))
-                    self.serial.timeout = 0.2
-                    if bytes_rcvd[len(bytes_rcvd) - 1] == ETX_CHAR:
-                        data.extend(bytes_rcvd)
-                        # deque is thread-safe for appends and pops from and to the opposite side
-                        self.__reception_buffer.appendleft(data)
-                data = bytearray()
-            elif self.__polling_shutdown.is_set():
-                break
+        # Block inside the OS until data arrives, but wake up periodically to check whether the
+        # thread should be shut down.
+        self.serial.timeout = self.ser_cfg.polling_frequency
+        chunk_size = self.ser_cfg.read_chunk_size
+        while not self.__polling_shutdown.is_set():
+            bytes_waiting = self.serial.in_waiting
+            if bytes_waiting > 0:
+                bytes_received = self.serial.read(min(bytes_waiting, chunk_size))
+            else:
+                bytes_received = self.serial.read(1)
+            if len(bytes_received) > 0:
+                self.__handle_received_bytes(bytes_received)
+
+    def __handle_received_bytes(self, bytes_received: bytes) -> None:
+        metrics = self._metrics
+        metrics.bytes_received(len(bytes_received))
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.emit(self, HookEvent.BYTES_RECEIVED, bytes_received)
+        self._parser.feed(bytes_received)
+        packets = self._parser.parse()
+        if not packets:
+            return
+        metrics.packets_received(len(packets))
+        if hooks is not None:
+            hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        if self._deliver_to_callback(packets):
+            return
+        reception_buffer = self.__reception_buffer
+        if reception_buffer.maxlen is not None:
+            metrics.dropped_packets += max(
+                0, len(reception_buffer) + len(packets) - reception_buffer.maxlen
+            )
+        # deque is thread-safe for appends and pops from and to the opposite side
+        reception_buffer.extend(packets)
+        self.__reception_signal.notify()
 
     def is_open(self) -> bool:
         return super().is_port_open()
 
     def close(self, args: any | None = None) -> None:
-        self.__polling_shutdown.set()
-        self.__reception_thread.join(0.4)
+        if self.__hub is not None:
+            self.__hub.remove(self)
+            return
+        if self.__reception_thread is not None:
+            self.__polling_shutdown.set()
+            # Wake up the reception thread if it is blocked inside a read call.
+            self.serial.cancel_read()
+            self.__reception_thread.join(0.4)
+            self.__reception_thread = None
         super().close_port()
+        self.__reception_signal.notify()
 
     def send(self, data: bytes | bytearray) -> None:
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
         encoded_data = self.__encoder.encode(source_packet=data, add_stx_etx=True)
         self.serial.write(encoded_data)
-
-    def receive(self, parameters: any = 0) -> list[bytes]:
-        packet_list = []
-        while self.__reception_buffer:
-            data = self.__reception_buffer.pop()
-            dle_retval, decoded_packet, read_len = self.__encoder.decode(source_packet=data)
-            if dle_retval == DleErrorCodes.OK:
-                packet_list.append(decoded_packet)
-            else:
-                self.logger.warning("DLE decoder error!")
+        self._metrics.packets_sent(1, len(encoded_data))
+
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Encodes all packets into one buffer which is then written with a single write call."""
+        if self._hooks is not None:
+            packets = list(packets)
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        frames = [
+            self.__encoder.encode(source_packet=packet, add_stx_etx=True) for packet in packets
+        ]
+        encoded_data = b"".join(frames)
+        self.serial.write(encoded_data)
+        self._metrics.packets_sent(len(frames), len(encoded_data))
+
+    def receive(
+        self, parameters: any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        reception_buffer = self.__reception_buffer
+        if not reception_buffer and timeout != 0:
+            self.__reception_signal.wait_for(
+                lambda: bool(reception_buffer) or not self.is_open(), timeout
+            )
+        packet_list = self.__reception_signal.take(reception_buffer, max_packets)
+        self._metrics.packets_delivered(len(packet_list))
+        if self._hooks is not None and packet_list:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packet_list)
         return packet_list
 
+    def fileno(self) -> int:
+        return self.__reception_signal.fileno()
+
     def packets_available(self, parameters: any = 0) -> int:
         return self.__reception_buffer.__len__()
+
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        self._packet_callback = callback
+
+    def hub_attach(self, hub: ComHub | None) -> None:
+        self.__hub = hub
+
+    def __metric_gauges(self) -> dict[str, int]:
+        return {
+            "rx_queue_depth": len(self.__reception_buffer),
+            "decode_errors": self._parser.parsing_error_count + self._parser.dropped_frame_count,
+        }
+
+    def hub_fileobj(self) -> serial.Serial:
+        return self.serial
+
+    def hub_on_readable(self) -> None:
+        bytes_received = self.serial.read(self.ser_cfg.read_chunk_size)
+        if len(bytes_received) > 0:
+            self.__handle_received_bytes(bytes_received)
@@ -0,0 +1,189 @@
+"""Serial communication interface with a pluggable framing protocol"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from com_interface import ComInterface
+from com_interface.hooks import HookEvent
+from com_interface.hub import HubDriven
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import ReceptionSignal
+from com_interface.serial_base import SerialCfg, SerialComBase, SerialCommunicationType
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import serial
+
+    from com_interface.framing import Framer
+    from com_interface.hub import ComHub, PacketCallback
+
+
+class SerialFramedComIF(SerialComBase, ComInterface, HubDriven):
+    """Serial communication interface which uses a :py:class:`com_interface.framing.Framer` to
+    split the serial data stream into packets and to encode the sent packets.
+
+    This class will spin up a receiver thread on the :meth:`open` call which reads the serial
+    data in chunks and passes it to the framer, unless the interface is driven by a
+    :py:class:`com_interface.hub.ComHub`. This means that the :meth:`close` call might block
+    until the receiver thread has shut down.
+    """
+
+    def __init__(self, ser_cfg: SerialCfg, framer: Framer, max_packets_stored: int | None = None):
+        """
+        :param ser_cfg: Serial configuration.
+        :param framer: Framer for the serial data stream.
+        :param max_packets_stored: Maximum number of stored packets. The oldest packets are
+            discarded if this number is exceeded. None for no limit.
+        """
+        super().__init__(
+            logging.getLogger(__name__),
+            ser_cfg=ser_cfg,
+            ser_com_type=SerialCommunicationType.FRAMED,
+        )
+        self.framer = framer
+        self.__reception_thread: threading.Thread | None = None
+        self.__polling_shutdown = threading.Event()
+        # deque is thread-safe for appends and pops from opposite sides.
+        self.__packet_deque: deque[bytes] = deque(maxlen=max_packets_stored)
+        self.__reception_signal = ReceptionSignal()
+        self.__hub: ComHub | None = None
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
+
+    @property
+    def id(self) -> str:
+        return self.ser_cfg.com_if_id
+
+    def initialize(self, args: Any = None) -> None:
+        pass
+
+    def open(self, args: Any = None) -> None:
+        super().open_port()
+        assert self.serial is not None
+        self.framer.clear()
+        if self.__hub is not None:
+            # The hub only reads when data is available.
+            self.serial.timeout = 0
+            return
+        self.__polling_shutdown.clear()
+        self.__reception_thread = threading.Thread(target=self.__poll_packets, daemon=True)
+        self.__reception_thread.start()
+
+    def is_open(self) -> bool:
+        return super().is_port_open()
+
+    def close(self, args: Any = None) -> None:
+        if self.__hub is not None:
+            self.__hub.remove(self)
+            return
+        if self.serial is None:
+            return
+        if self.__reception_thread is not None:
+            self.__polling_shutdown.set()
+            # Wake up the reception thread if it is blocked inside a read call.
+            self.serial.cancel_read()
+            self.__reception_thread.join(0.4)
+            self.__reception_thread = None
+        super().close_port()
+        self.__reception_signal.notify()
+
+    def send(self, data: bytes | bytearray) -> None:
+        assert self.serial is not None
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        encoded_data = self.framer.encode(data)
+        self.serial.write(encoded_data)
+        self._metrics.packets_sent(1, len(encoded_data))
+
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Encodes all packets into one buffer which is then written with a single write call."""
+        assert self.serial is not None
+        packets = list(packets)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        encoded_data = self.framer.encode_many(packets)
+        self.serial.write(encoded_data)
+        self._metrics.packets_sent(len(packets), len(encoded_data))
+
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        packet_deque = self.__packet_deque
+        if not packet_deque and timeout != 0:
+            self.__reception_signal.wait_for(
+                lambda: bool(packet_deque) or not self.is_open(), timeout
+            )
+        packet_list = self.__reception_signal.take(packet_deque, max_packets)
+        self._metrics.packets_delivered(len(packet_list))
+        if self._hooks is not None and packet_list:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packet_list)
+        return packet_list
+
+    def fileno(self) -> int:
+        return self.__reception_signal.fileno()
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        return len(self.__packet_deque)
+
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        self._packet_callback = callback
+
+    def hub_attach(self, hub: ComHub | None) -> None:
+        self.__hub = hub
+
+    def hub_fileobj(self) -> serial.Serial:
+        assert self.serial is not None
+        return self.serial
+
+    def hub_on_readable(self) -> None:
+        assert self.serial is not None
+        bytes_received = self.serial.read(self.ser_cfg.read_chunk_size)
+        if len(bytes_received) > 0:
+            self.__handle_received_bytes(bytes_received)
+
+    def __handle_received_bytes(self, bytes_received: bytes) -> None:
+        metrics = self._metrics
+        metrics.bytes_received(len(bytes_received))
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.emit(self, HookEvent.BYTES_RECEIVED, bytes_received)
+        packets = self.framer.feed(bytes_received)
+        if not packets:
+            return
+        metrics.packets_received(len(packets))
+        if hooks is not None:
+            hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        if self._deliver_to_callback(packets):
+            return
+        packet_deque = self.__packet_deque
+        if packet_deque.maxlen is not None:
+            metrics.dropped_packets += max(
+                0, len(packet_deque) + len(packets) - packet_deque.maxlen
+            )
+        packet_deque.extend(packets)
+        self.__reception_signal.notify()
+
+    def __metric_gauges(self) -> dict[str, int]:
+        return {
+            "rx_queue_depth": len(self.__packet_deque),
+            "decode_errors": self.framer.parsing_error_count,
+        }
+
+    def __poll_packets(self) -> None:
+        assert self.serial is not None
+        # Block inside the OS until data arrives, but wake up periodically to check whether the
+        # thread should be shut down.
+        self.serial.timeout = self.ser_cfg.polling_frequency
+        chunk_size = self.ser_cfg.read_chunk_size
+        while not self.__polling_shutdown.is_set():
+            bytes_waiting = self.serial.in_waiting
+            if bytes_waiting > 0:
+                bytes_received = self.serial.read(min(bytes_waiting, chunk_size))
+            else:
+                bytes_received = self.serial.read(1)
+            if len(bytes_received) > 0:
+                self.__handle_received_bytes(bytes_received)
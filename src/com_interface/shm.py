@@ -0,0 +1,507 @@
+"""Shared memory packet bus which fans out the packets of one interface to multiple processes.
+
+Only one process can own a serial port or a TCP connection. A :py:class:`SharedMemoryBus` runs
+any :py:class:`com_interface.ComInterface` inside this owner process and publishes the received
+packets into a ring buffer in :py:mod:`multiprocessing.shared_memory`. Any number of other
+processes attach to the ring with a :py:class:`SharedMemoryReaderComIF`, which implements the
+regular interface API. Packets are copied once out of the shared memory, without pickling or
+pipes, so decoding, archiving and display can run on separate cores:
+
+.. code-block:: python
+
+    # Owner process
+    bus = SharedMemoryBus(SerialCobsComIF(...), "tmtc", tc_channels=2)
+    bus.open()
+    bus.start()
+
+    # Reader processes
+    reader = SharedMemoryReaderComIF("tmtc", tc_channel=0)
+    reader.open()
+    packets = reader.receive(timeout=1.0)
+    reader.send(telecommand)
+
+The packet ring has a single writer and does not wait for the readers. Every packet has a
+sequence number, and every reader keeps its own cursor. A reader which falls behind by more than
+the ring size loses the overwritten packets, which are counted as dropped packets. Telecommands
+travel through separate reverse rings, one for each TC channel, which the owner forwards to the
+interface. Each TC channel may only be used by one reader at a time.
+
+The rings do not use locks. The writer publishes a slot by storing its sequence number after
+the packet data, and the readers validate the sequence number again after copying the data.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import TYPE_CHECKING, Any
+
+from com_interface import ComInterface, SendError
+from com_interface.hooks import HookEvent
+from com_interface.metrics import InterfaceMetrics
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+_LOGGER = logging.getLogger(__name__)
+
+_MAGIC = b"COMSHM\x00\x00"
+_VERSION = 1
+# Magic, version, number of TC channels, number of packet slots, maximum packet size, number of
+# TC slots per channel and flags.
+_BUS_HEADER = struct.Struct("<8sHHIIII")
+_BUS_HEADER_SIZE = 64
+# The sequence number of the next published packet follows the header fields.
+_WRITE_SEQ_OFFSET = 32
+_FLAG_CLOSED = 1
+_FLAGS_OFFSET = 24
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+# Sequence number plus one, which is 0 while the slot is written, and the packet length.
+_SLOT_HEADER = struct.Struct("<QI4x")
+# Sequence numbers of the next written and the next read TC.
+_TC_CHANNEL_HEADER = struct.Struct("<QQ")
+_TC_SLOT_HEADER = struct.Struct("<I4x")
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class _Layout:
+    """Offsets of the rings inside the shared memory segment."""
+
+    def __init__(self, slot_count: int, max_packet_size: int, tc_channels: int, tc_slots: int):
+        self.slot_count = slot_count
+        self.max_packet_size = max_packet_size
+        self.tc_channels = tc_channels
+        self.tc_slots = tc_slots
+        self.slot_size = _SLOT_HEADER.size + _aligned(max_packet_size)
+        self.tc_slot_size = _TC_SLOT_HEADER.size + _aligned(max_packet_size)
+        self.tc_channel_size = _TC_CHANNEL_HEADER.size + tc_slots * self.tc_slot_size
+        self.tc_offset = _BUS_HEADER_SIZE + slot_count * self.slot_size
+        self.size = self.tc_offset + tc_channels * self.tc_channel_size
+
+    def slot(self, seq: int) -> int:
+        return _BUS_HEADER_SIZE + (seq % self.slot_count) * self.slot_size
+
+    def tc_channel(self, channel: int) -> int:
+        return self.tc_offset + channel * self.tc_channel_size
+
+    def tc_slot(self, channel_offset: int, seq: int) -> int:
+        return channel_offset + _TC_CHANNEL_HEADER.size + (seq % self.tc_slots) * self.tc_slot_size
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without handing it to the resource tracker, which would
+    remove the segment once this process exits."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    segment = shared_memory.SharedMemory(name)
+    if os.name == "posix":
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _unlink_segment(segment: shared_memory.SharedMemory) -> None:
+    if sys.version_info < (3, 13) and os.name == "posix":
+        # Readers started with multiprocessing share the resource tracker of the owner, so
+        # attaching removed the registration of the owner.
+        resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+
+
+class SharedMemoryBus:
+    """Owner side of the shared memory bus. It receives the packets of a communication
+    interface, publishes them to all readers and forwards the telecommands of the readers to the
+    interface.
+
+    The bus can either run inside its own thread, which is started with :py:meth:`start`, or it
+    can be driven by the application with :py:meth:`run_once`.
+    """
+
+    def __init__(
+        self,
+        com_if: ComInterface,
+        name: str | None = None,
+        slot_count: int = 4096,
+        max_packet_size: int = 4096,
+        tc_channels: int = 1,
+        tc_slot_count: int = 256,
+        tc_poll_interval: float = 0.01,
+    ):
+        """
+        :param com_if: Interface whose packets are published.
+        :param name: Name of the shared memory segment, which the readers use to attach to the
+            bus. A unique name is generated if this is None.
+        :param slot_count: Number of packets the ring can hold. Readers which fall further
+            behind lose packets.
+        :param max_packet_size: Maximum size of a packet or TC. Larger packets are dropped.
+        :param tc_channels: Number of TC channels, so up to this many readers can send TCs.
+        :param tc_slot_count: Number of TCs each TC channel can hold.
+        :param tc_poll_interval: Maximum time in seconds before the TCs of the readers are
+            forwarded, while :py:meth:`start` drives the bus.
+        """
+        if slot_count <= 0 or tc_slot_count <= 0:
+            raise ValueError("the rings need at least one slot")
+        self.com_if = com_if
+        self.tc_poll_interval = tc_poll_interval
+        #: Number of packets which were dropped because they are larger than the slots.
+        self.dropped_count = 0
+        self.__requested_name = name
+        self.__layout = _Layout(slot_count, max_packet_size, tc_channels, tc_slot_count)
+        self.__segment: shared_memory.SharedMemory | None = None
+        self.__buf: memoryview | None = None
+        self.__write_seq = 0
+        self.__thread: threading.Thread | None = None
+        self.__stop_signal = threading.Event()
+
+    @property
+    def name(self) -> str | None:
+        """Name of the shared memory segment, or None if the bus is not open."""
+        if self.__segment is None:
+            return None
+        return self.__segment.name
+
+    @property
+    def published_count(self) -> int:
+        """Number of packets which were published since the bus was opened."""
+        return self.__write_seq
+
+    def open(self) -> None:
+        """Create the shared memory segment and open the interface if it is not open yet.
+
+        :raises FileExistsError: A segment with the requested name already exists.
+        """
+        if self.__segment is not None:
+            return
+        layout = self.__layout
+        segment = shared_memory.SharedMemory(self.__requested_name, create=True, size=layout.size)
+        buf = segment.buf
+        # A new segment is filled with zeros, so all slots are empty.
+        _BUS_HEADER.pack_into(
+            buf,
+            0,
+            _MAGIC,
+            _VERSION,
+            layout.tc_channels,
+            layout.slot_count,
+            layout.max_packet_size,
+            layout.tc_slots,
+            0,
+        )
+        self.__segment = segment
+        self.__buf = buf
+        self.__write_seq = 0
+        if not self.com_if.is_open():
+            self.com_if.open()
+
+    def is_open(self) -> bool:
+        return self.__segment is not None
+
+    def publish(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Publish packets to all readers. This is called by :py:meth:`run_once`, and may only be
+        called by one thread at a time."""
+        buf = self.__buf
+        if buf is None:
+            return
+        layout = self.__layout
+        seq = self.__write_seq
+        for packet in packets:
+            if len(packet) > layout.max_packet_size:
+                self.dropped_count += 1
+                _LOGGER.warning(
+                    f"Dropping packet of {len(packet)} bytes, the shared memory bus only "
+                    f"supports {layout.max_packet_size} bytes"
+                )
+                continue
+            offset = layout.slot(seq)
+            payload_start = offset + _SLOT_HEADER.size
+            # Invalidate the slot first, so readers detect that the old packet was overwritten.
+            _U64.pack_into(buf, offset, 0)
+            buf[payload_start : payload_start + len(packet)] = packet
+            _SLOT_HEADER.pack_into(buf, offset, seq + 1, len(packet))
+            seq += 1
+        # Readers detect slots which are overwritten before the sequence number is published.
+        _U64.pack_into(buf, _WRITE_SEQ_OFFSET, seq)
+        self.__write_seq = seq
+
+    def run_once(self, timeout: float | None = 0.0) -> None:
+        """Receive the packets of the interface and publish them, then forward the TCs of the
+        readers.
+
+        :param timeout: Maximum time to wait for packets in seconds.
+        """
+        if self.__buf is None:
+            return
+        self.publish(self.com_if.receive(timeout=timeout))
+        self.__forward_tcs()
+
+    def start(self) -> None:
+        """Run the bus inside a separate daemon thread until :py:meth:`stop` is called."""
+        if self.__thread is not None:
+            return
+        self.__stop_signal.clear()
+        self.__thread = threading.Thread(target=self.__bus_task, daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """Stop the bus thread. The interface and the segment stay open."""
+        if self.__thread is None:
+            return
+        self.__stop_signal.set()
+        self.__thread.join()
+        self.__thread = None
+
+    def close(self) -> None:
+        """Stop the bus thread, close the interface and remove the shared memory segment.
+        Attached readers keep their mapping and see that the bus was closed."""
+        self.stop()
+        self.com_if.close()
+        if self.__segment is None:
+            return
+        assert self.__buf is not None
+        _U32.pack_into(self.__buf, _FLAGS_OFFSET, _FLAG_CLOSED)
+        self.__buf = None
+        self.__segment.close()
+        _unlink_segment(self.__segment)
+        self.__segment = None
+
+    def __bus_task(self) -> None:
+        try:
+            while not self.__stop_signal.is_set():
+                self.run_once(self.tc_poll_interval)
+                if not self.com_if.is_open():
+                    # A closed interface does not wait for packets.
+                    self.__stop_signal.wait(self.tc_poll_interval)
+        except Exception:
+            _LOGGER.exception(
+                f"Error driving the shared memory bus of {self.com_if.id}, stopping it"
+            )
+
+    def __forward_tcs(self) -> None:
+        buf = self.__buf
+        assert buf is not None
+        layout = self.__layout
+        tcs = []
+        for channel in range(layout.tc_channels):
+            channel_offset = layout.tc_channel(channel)
+            write_seq, read_seq = _TC_CHANNEL_HEADER.unpack_from(buf, channel_offset)
+            for seq in range(read_seq, write_seq):
+                offset = layout.tc_slot(channel_offset, seq)
+                (length,) = _TC_SLOT_HEADER.unpack_from(buf, offset)
+                payload_start = offset + _TC_SLOT_HEADER.size
+                tcs.append(bytes(buf[payload_start : payload_start + length]))
+            # The TCs were copied, so the slots can be reused.
+            _U64.pack_into(buf, channel_offset + 8, write_seq)
+        if not tcs:
+            return
+        try:
+            self.com_if.send_many(tcs)
+        except Exception:
+            _LOGGER.exception(f"Forwarding TCs to {self.com_if.id} failed")
+
+
+class SharedMemoryReaderComIF(ComInterface):
+    """Reader side of a :py:class:`SharedMemoryBus`, usually inside another process.
+
+    :py:meth:`receive` returns the packets which were published after the interface was opened.
+    Since processes can not wake each other up without system calls, a waiting
+    :py:meth:`receive` call polls the ring. Packets which were overwritten before they were
+    received are counted as dropped packets in the :py:attr:`metrics`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        com_if_id: str = "shm_reader",
+        tc_channel: int | None = None,
+        poll_interval: float = 0.001,
+    ):
+        """
+        :param name: Name of the shared memory segment of the bus.
+        :param tc_channel: TC channel which is used by :py:meth:`send`. No other reader may use
+            the same channel. None if this reader does not send TCs.
+        :param poll_interval: Delay in seconds between the checks for new packets of a waiting
+            :py:meth:`receive` call.
+        """
+        self.name = name
+        self.com_if_id = com_if_id
+        self.tc_channel = tc_channel
+        self.poll_interval = poll_interval
+        self._metrics = InterfaceMetrics()
+        self.__segment: shared_memory.SharedMemory | None = None
+        self.__buf: memoryview | None = None
+        self.__layout: _Layout | None = None
+        self.__cursor = 0
+
+    @property
+    def id(self) -> str:
+        return self.com_if_id
+
+    def initialize(self, args: Any = 0) -> None:
+        pass
+
+    def open(self, args: Any = 0) -> None:
+        """Attach to the bus.
+
+        :raises FileNotFoundError: The bus does not exist.
+        :raises ValueError: The segment does not belong to a bus, or the TC channel does not
+            exist.
+        """
+        if self.__segment is not None:
+            return
+        segment = _attach_segment(self.name)
+        buf = segment.buf
+        magic, version, tc_channels, slot_count, max_packet_size, tc_slots, _ = (
+            _BUS_HEADER.unpack_from(buf, 0)
+        )
+        try:
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"shared memory segment {self.name} is not a packet bus")
+            if self.tc_channel is not None and not 0 <= self.tc_channel < tc_channels:
+                raise ValueError(f"the bus {self.name} only has {tc_channels} TC channels")
+        except ValueError:
+            segment.close()
+            raise
+        self.__layout = _Layout(slot_count, max_packet_size, tc_channels, tc_slots)
+        self.__segment = segment
+        self.__buf = buf
+        self.__cursor = _U64.unpack_from(buf, _WRITE_SEQ_OFFSET)[0]
+
+    def is_open(self) -> bool:
+        return self.__segment is not None
+
+    def close(self, args: Any = 0) -> None:
+        """Detach from the bus. The bus itself is not affected."""
+        if self.__segment is None:
+            return
+        self.__buf = None
+        self.__segment.close()
+        self.__segment = None
+
+    @property
+    def bus_closed(self) -> bool:
+        """The owner closed the bus, so no further packets are published."""
+        if self.__buf is None:
+            return False
+        return bool(_U32.unpack_from(self.__buf, _FLAGS_OFFSET)[0] & _FLAG_CLOSED)
+
+    def send(self, data: bytes | bytearray) -> None:
+        """Queue a TC in the TC channel of this reader. The owner forwards it to its interface.
+
+        :raises SendError: The interface is not open, no TC channel was configured, the TC is
+            too large or the TC channel is full.
+        """
+        buf = self.__buf
+        if buf is None:
+            raise SendError("shared memory reader is not open", None)
+        if self.tc_channel is None:
+            raise SendError("shared memory reader has no TC channel", None)
+        layout = self.__layout
+        assert layout is not None
+        if len(data) > layout.max_packet_size:
+            raise SendError(
+                f"TC of {len(data)} bytes exceeds the maximum size {layout.max_packet_size}",
+                None,
+            )
+        channel_offset = layout.tc_channel(self.tc_channel)
+        write_seq, read_seq = _TC_CHANNEL_HEADER.unpack_from(buf, channel_offset)
+        if write_seq - read_seq >= layout.tc_slots:
+            raise SendError(f"TC channel {self.tc_channel} of bus {self.name} is full", None)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        offset = layout.tc_slot(channel_offset, write_seq)
+        payload_start = offset + _TC_SLOT_HEADER.size
+        buf[payload_start : payload_start + len(data)] = data
+        _TC_SLOT_HEADER.pack_into(buf, offset, len(data))
+        # Publish the TC after its data was written.
+        _U64.pack_into(buf, channel_offset, write_seq + 1)
+        self._metrics.packets_sent(1, len(data))
+
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        """A waiting call also returns once the owner closed the bus."""
+        buf = self.__buf
+        if buf is None:
+            return []
+        if timeout != 0 and not self.__pending():
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.__pending() and not self.bus_closed:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    time.sleep(min(self.poll_interval, remaining))
+                else:
+                    time.sleep(self.poll_interval)
+        packets = self.__read_packets(buf, max_packets)
+        if packets:
+            metrics = self._metrics
+            metrics.bytes_received(sum(len(packet) for packet in packets))
+            metrics.packets_received(len(packets))
+            metrics.packets_delivered(len(packets))
+            if self._hooks is not None:
+                self._hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+                self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, packets)
+        return packets
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        """Number of published packets which were not received yet and are still stored. The
+        oldest slot does not count, the owner might overwrite it at any time."""
+        if self.__buf is None:
+            return 0
+        assert self.__layout is not None
+        return min(self.__pending(), self.__layout.slot_count - 1)
+
+    def __pending(self) -> int:
+        assert self.__buf is not None
+        return _U64.unpack_from(self.__buf, _WRITE_SEQ_OFFSET)[0] - self.__cursor
+
+    def __read_packets(self, buf: memoryview, max_packets: int | None) -> list[bytes]:
+        layout = self.__layout
+        assert layout is not None
+        slot_header = _SLOT_HEADER
+        slot_count, slot_size, max_size = (
+            layout.slot_count,
+            layout.slot_size,
+            layout.max_packet_size,
+        )
+        end = _U64.unpack_from(buf, _WRITE_SEQ_OFFSET)[0]
+        seq = self.__skip_overwritten(self.__cursor, end)
+        if max_packets is not None:
+            end = min(end, seq + max_packets)
+        packets = []
+        while seq < end:
+            offset = _BUS_HEADER_SIZE + (seq % slot_count) * slot_size
+            stored_seq, length = slot_header.unpack_from(buf, offset)
+            if stored_seq == seq + 1 and length <= max_size:
+                payload_start = offset + slot_header.size
+                packet = bytes(buf[payload_start : payload_start + length])
+                # The writer might have overwritten the slot while the packet was copied.
+                if _U64.unpack_from(buf, offset)[0] == seq + 1:
+                    packets.append(packet)
+                    seq += 1
+                    continue
+            # The writer has overtaken this reader.
+            self._metrics.dropped_packets += 1
+            seq = self.__skip_overwritten(seq + 1, _U64.unpack_from(buf, _WRITE_SEQ_OFFSET)[0])
+            end = max(end, seq)
+        self.__cursor = seq
+        return packets
+
+    def __skip_overwritten(self, seq: int, write_seq: int) -> int:
+        """Skip the packets which were overwritten, plus the oldest slot which the writer might
+        overwrite right now."""
+        assert self.__layout is not None
+        oldest_stored = write_seq - self.__layout.slot_count + 1
+        if seq >= oldest_stored:
+            return seq
+        self._metrics.dropped_packets += oldest_stored - seq
+        return oldest_stored
@@ -0,0 +1,95 @@
+"""Reception buffer for stream based transports like TCP"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import socket
+
+DEFAULT_STREAM_BUF_SIZE = 65536
+
+
+class StreamBuffer:
+    """Preallocated and growable reception buffer for the reassembly of packets from a byte
+    stream.
+
+    Data is received directly into the free space at the end of the buffer using
+    :py:meth:`socket.socket.recv_into`. The received data can be parsed using the zero-copy
+    :py:meth:`view`, and parsed bytes are released with :py:meth:`consume`. Unparsed bytes are only
+    moved to the start of the buffer when the free space at the end runs out, so leftover bytes
+    of partially received packets are not copied on every reception.
+
+    >>> buf = StreamBuffer(8)
+    >>> buf.write(b"\\x01\\x02\\x03")
+    >>> bytes(buf.view())
+    b'\\x01\\x02\\x03'
+    >>> buf.consume(2)
+    >>> bytes(buf.view())
+    b'\\x03'
+    """
+
+    def __init__(self, size: int = DEFAULT_STREAM_BUF_SIZE, min_free: int = 4096):
+        """
+        :param size: Initial buffer size.
+        :param min_free: Minimum free space which is ensured before each reception call.
+        """
+        self._buf = bytearray(max(size, min_free))
+        self._mem = memoryview(self._buf)
+        self._min_free = min_free
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    def view(self) -> memoryview:
+        """Zero-copy view on all unconsumed bytes. The view must not be used after the next call
+        to :py:meth:`recv_into`, :py:meth:`write` or :py:meth:`clear`."""
+        return self._mem[self._start : self._end]
+
+    def consume(self, num_bytes: int) -> None:
+        """Release the given number of bytes at the start of the buffer."""
+        self._start = min(self._start + num_bytes, self._end)
+        if self._start == self._end:
+            self._start = 0
+            self._end = 0
+
+    def recv_into(self, sock: socket.socket) -> int:
+        """Receive data from the given socket directly into the buffer.
+
+        :return: Number of received bytes. 0 if the peer has closed the connection.
+        """
+        self._reserve(self._min_free)
+        received = sock.recv_into(self._mem[self._end :])
+        self._end += received
+        return received
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        """Append data which was not received with :py:meth:`recv_into`."""
+        self._reserve(len(data))
+        self._mem[self._end : self._end + len(data)] = data
+        self._end += len(data)
+
+    def clear(self) -> None:
+        self._start = 0
+        self._end = 0
+
+    def _reserve(self, num_bytes: int) -> None:
+        if len(self._buf) - self._end >= num_bytes:
+            return
+        data_len = self._end - self._start
+        if len(self._buf) - data_len >= num_bytes:
+            # Move the unconsumed tail to the start of the buffer.
+            self._mem[:data_len] = self._mem[self._start : self._end]
+        else:
+            new_buf = bytearray(max(2 * len(self._buf), data_len + num_bytes))
+            new_buf[:data_len] = self._mem[self._start : self._end]
+            self._buf = new_buf
+            self._mem = memoryview(self._buf)
+        self._start = 0
+        self._end = data_len
@@ -2,43 +2,151 @@
 
 from __future__ import annotations
 
+import contextlib
+import dataclasses
 import enum
+import errno
 import logging
-import queue
-import select
+import os
+import random
+import selectors
 import socket
 import threading
 import time
 from collections import deque
+from concurrent.futures import Future, InvalidStateError
 from typing import TYPE_CHECKING, Any
 
-from spacepackets.ccsds.spacepacket import (
-    PacketId,
-    parse_space_packets_from_deque,
-)
-
 from com_interface import ComInterface, SendError
+from com_interface.framing import SpacePacketFramer
+from com_interface.hooks import HookEvent
+from com_interface.hub import HubDriven
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import (
+    BoundedPacketQueue,
+    OverflowPolicy,
+    ReceptionSignal,
+)
+from com_interface.stream_buf import DEFAULT_STREAM_BUF_SIZE
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
+    from collections.abc import Iterable, Sequence
 
+    from spacepackets.ccsds.spacepacket import PacketId
+
+    from com_interface.framing import Framer
+    from com_interface.hub import ComHub, PacketCallback
     from com_interface.ip_utils import EthAddr
 
 _LOGGER = logging.getLogger(__name__)
 
-TCP_RECV_WIRETAPPING_ENABLED = False
-TCP_SEND_WIRETAPPING_ENABLED = False
-
 
 class TcpCommunicationType(enum.Enum):
-    """Parse for space packets in the TCP stream, using the space packet header."""
+    """Determines how the TCP stream is split into packets."""
 
+    # Parse for space packets in the TCP stream, using the space packet header.
     SPACE_PACKETS = 0
+    # Split the TCP stream with a user supplied framer.
+    FRAMED = 1
+
+
+# Results of a non-blocking connect call which mean that the connection is being established.
+_CONNECT_IN_PROGRESS = frozenset(
+    (errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK))
+)
+
+
+@dataclasses.dataclass
+class ReconnectPolicy:
+    """Reconnect behaviour of a :py:class:`TcpSpacepacketsClient`. The delay before a
+    connection attempt grows exponentially with the number of failed attempts in a row.
+
+    :param initial_delay: Delay in seconds before the first attempt after a connection was lost.
+    :param max_delay: Upper limit of the delay in seconds.
+    :param multiplier: Factor by which the delay grows after every failed attempt.
+    :param jitter: Fraction of the delay which is randomized, so that many clients do not
+        reconnect at the same time. For example, 0.1 spreads the delay by up to 10 % in both
+        directions.
+    :param max_attempts: Number of failed attempts in a row after which the client gives up and
+        closes the interface. None to retry indefinitely.
+    """
+
+    initial_delay: float = 0.1
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.1
+    max_attempts: int | None = None
+
+    def delay(self, failed_attempts: int, rng: random.Random | None = None) -> float:
+        """Delay in seconds before the next connection attempt.
+
+        :param failed_attempts: Number of failed attempts in a row, starting at 0 for the first
+            attempt after a connection was lost.
+        """
+        # Limit the exponent, the delay is capped anyway.
+        delay = min(
+            self.max_delay, self.initial_delay * self.multiplier ** min(failed_attempts, 64)
+        )
+        if self.jitter > 0:
+            delay *= 1.0 + (rng or random).uniform(-self.jitter, self.jitter)
+        return max(0.0, delay)
+
+
+@dataclasses.dataclass
+class TcpConnectionCfg:
+    """Connection handling of a :py:class:`TcpSpacepacketsClient`.
+
+    :param reconnect: Reconnect with this policy after the connection was lost or could not be
+        established. None to close the interface instead, once all target addresses were tried.
+        Queued TCs are kept while reconnecting or failing over to another address. A TC which
+        was only partially written to the lost connection is sent again completely. TCs which
+        were completely written to the lost connection are not sent again, their futures
+        already completed successfully. Once the client gives up, the futures of the TCs which
+        were not sent fail with a :py:class:`SendError`, which is also raised by the next
+        :py:meth:`TcpSpacepacketsClient.send` or :py:meth:`TcpSpacepacketsClient.flush` call.
+    :param failover_addresses: Redundant target addresses which are used in the given order if
+        the connection to the previous address fails.
+    :param preconnect: Keep connections to all failover addresses open, so the client can switch
+        to another address without connecting first. Only the active connection is used for TCs
+        and TMs, data received on the standby connections is discarded.
+    :param connect_timeout: Maximum time in seconds for establishing a connection.
+    """
 
+    reconnect: ReconnectPolicy | None = None
+    failover_addresses: Sequence[EthAddr] = ()
+    preconnect: bool = False
+    connect_timeout: float = 2.0
 
-class TcpSpacepacketsClient(ComInterface):
+
+class _Connection:
+    """Connection to one target address. Only used by the TCP thread."""
+
+    def __init__(self, address: EthAddr):
+        self.address = address
+        self.socket: socket.socket | None = None
+        # The socket is still connecting until this is set.
+        self.established = False
+        # Monotonic time until which the connection must be established.
+        self.deadline = 0.0
+        # Monotonic time of the next connection attempt, None if no attempt is scheduled.
+        self.retry_at: float | None = None
+        self.failed_attempts = 0
+        # Selector events the socket is currently registered for.
+        self.events = 0
+
+
+class TcpSpacepacketsClient(ComInterface, HubDriven):
     """Communication interface for TCP communication. This particular interface expects
     raw space packets to be sent via TCP and uses a list of passed packet IDs to parse for them.
+
+    The interface spins up a TCP thread on the :meth:`open` call, unless it is driven by a
+    :py:class:`com_interface.hub.ComHub`. The TCP thread connects in the background, so
+    :py:meth:`open` does not block. TCs which are sent before the connection is established are
+    queued. Use :py:meth:`wait_connected` to wait for the connection.
+
+    With a :py:class:`ReconnectPolicy` in the :py:class:`TcpConnectionCfg`, the TCP thread
+    reconnects after the connection was lost and keeps the queued TCs. Additional failover
+    addresses are used if the current target address can not be reached.
     """
 
     def __init__(
@@ -48,30 +156,92 @@ class TcpSpacepacketsClient(ComInterface):
         inner_thread_delay: float,
         target_address: EthAddr,
         max_packets_stored: int | None = None,
+        framer: Framer | None = None,
+        max_tcs_queued: int | None = None,
+        tc_overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        send_timeout: float | None = None,
+        connection_cfg: TcpConnectionCfg | None = None,
     ):
         """Initialize a communication interface to send and receive TMTC via TCP.
 
         :param com_if_id:
         :param space_packet_ids: Valid packet IDs for CCSDS space packets. Those will be used
             to parse for space packets inside the TCP stream.
-        :param inner_thread_delay: Polling frequency of TCP thread in seconds.
+        :param inner_thread_delay: Timeout when joining the TCP thread in seconds. The TCP
+            thread itself does not poll, it is woken up by the socket or by :py:meth:`send`.
+        :param framer: Framer used to split the TCP stream into packets and to encode the sent
+            packets, for example a :py:class:`com_interface.framing.CobsFramer`. The space
+            packet IDs are ignored if a framer is specified.
+        :param max_tcs_queued: Maximum number of TCs which are queued for the TCP thread. None
+            for an unbounded queue. A bounded queue limits the memory usage if the connection
+            is slow or interrupted. The TCP thread takes at most the same number of TCs from
+            the queue at once.
+        :param tc_overflow_policy: Policy which is applied by the send calls if the TC queue is
+            full. With the default :py:attr:`OverflowPolicy.BLOCK` policy, the caller is blocked
+            until the TCP thread has taken TCs from the queue, which paces the sender to the
+            link rate.
+        :param send_timeout: Maximum time in seconds a send call blocks for the
+            :py:attr:`OverflowPolicy.BLOCK` policy. None to wait indefinitely.
+        :param connection_cfg: Reconnect and failover configuration. By default, the interface
+            is closed if the connection fails.
         """
         self.com_if_id = com_if_id
-        self.com_type = TcpCommunicationType.SPACE_PACKETS
         self.space_packet_ids = space_packet_ids
+        if framer is None:
+            self.com_type = TcpCommunicationType.SPACE_PACKETS
+            self.framer = SpacePacketFramer(space_packet_ids)
+        else:
+            self.com_type = TcpCommunicationType.FRAMED
+            self.framer = framer
         self.__inner_thread_delay = inner_thread_delay
         self.target_address = target_address
         self.max_packets_stored = max_packets_stored
         self.__conn_lock = threading.Lock()
         self.__connected = False
-        self.__tcp_socket = None
+        self.__tcp_socket: socket.socket | None = None
+        self.connection_cfg = connection_cfg if connection_cfg is not None else TcpConnectionCfg()
+        # Connections to all target addresses, only used by the TCP thread.
+        self.__connections: list[_Connection] = []
+        # Connection which is used for TMs and TCs.
+        self.__active: _Connection | None = None
+        # Index of the connection which is used next without preconnected standby connections.
+        self.__next_connection = 0
+        # Failed connection attempts in a row without preconnected standby connections.
+        self.__failed_attempts = 0
+        # Error of the last failed connection or connection attempt, only used by the TCP thread.
+        self.__connection_error: OSError | None = None
+        self.__random = random.Random()  # noqa: S311
+        self.__link_up = threading.Event()
         self.__thread_kill_signal = threading.Event()
         # Separate thread to request TM packets periodically if no TCs are being sent
         self.__tcp_thread = None
-        self.__tm_queue = queue.Queue()
-        self.__tc_queue = queue.Queue()
-        self.__analysis_queue = deque()
-        self._tm_packet_list = []
+        # Parsed TM packets. deque is thread-safe for appends and pops from opposite sides.
+        self.__tm_queue: deque[bytes] = deque(maxlen=max_packets_stored)
+        self.__reception_signal = ReceptionSignal()
+        # Reception buffer for the TCP stream, only used by the TCP thread. Incomplete packets are
+        # buffered by the framer.
+        self.__recv_buf = memoryview(bytearray(DEFAULT_STREAM_BUF_SIZE))
+        self.send_timeout = send_timeout
+        # Encoded TCs together with the future of the sender, if there is one.
+        self.__tc_queue = BoundedPacketQueue(max_tcs_queued, tc_overflow_policy, _discard_tc)
+        # The TC queue only accepts TCs while the interface is open, so senders which are blocked
+        # by a full queue are released once nothing drains the queue anymore.
+        self.__tc_queue.close()
+        # TCs which were taken from the TC queue but not sent completely yet. Only used by the
+        # TCP thread.
+        self.__tc_pending: deque[tuple[memoryview, Future | None]] = deque()
+        # Also stays below the IOV_MAX limit of the OS for the sendmsg call.
+        self.__tc_pending_limit = min(512, max_tcs_queued or 512)
+        # Notified by the TCP thread when all TCs were sent.
+        self.__tc_drained = threading.Condition()
+        # Error of the TCP thread which is raised by the next send or flush call.
+        self.__send_error: SendError | None = None
+        # Used by the send and close calls to wake up the TCP thread. The TCP thread owns the
+        # receiving side.
+        self.__wakeup_send: socket.socket | None = None
+        self.__hub: ComHub | None = None
+        self.__connection_count = 0
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
 
     @property
     def id(self) -> str:
@@ -87,150 +257,701 @@ class TcpSpacepacketsClient(ComInterface):
         pass
 
     def open(self, args: Any = None) -> None:
+        """Open the interface. Without a hub, the connection is established by the TCP thread
+        in the background. A hub driven interface connects to the target address before this
+        call returns and does not reconnect."""
         if self.is_open():
             return
         self.__thread_kill_signal.clear()
-        try:
-            self.__init_socket()
-            self.__connect_socket()
-        except OSError as e:
-            _LOGGER.exception("Issues setting up the TCP socket")
-            raise e
-        if self.__tcp_thread is None:
-            self.__tcp_thread = threading.Thread(target=self.__tcp_task)
-            self.__tcp_thread.start()
+        if self.__hub is not None:
+            try:
+                self.__init_socket()
+                self.__connect_socket()
+            except OSError as e:
+                _LOGGER.exception("Issues setting up the TCP socket")
+                raise e
+            self.__connection_established()
             with self.__conn_lock:
                 self.__connected = True
+            self.__tc_queue.open()
+            return
+        if self.__tcp_thread is not None:
+            # The TCP thread closed the interface after the connection was lost.
+            self.__tcp_thread.join(self.__inner_thread_delay)
+        self.__connections = [
+            _Connection(address)
+            for address in [self.target_address, *self.connection_cfg.failover_addresses]
+        ]
+        self.__next_connection = 0
+        self.__failed_attempts = 0
+        self.__connection_error = None
+        now = time.monotonic()
+        for connection in (
+            self.__connections if self.connection_cfg.preconnect else self.__connections[:1]
+        ):
+            connection.retry_at = now
+        wakeup_recv, wakeup_send = socket.socketpair()
+        wakeup_recv.setblocking(False)
+        wakeup_send.setblocking(False)
+        self.__wakeup_send = wakeup_send
+        self.__tcp_thread = threading.Thread(
+            target=self.__tcp_task, args=(wakeup_recv, wakeup_send), daemon=True
+        )
+        with self.__conn_lock:
+            self.__connected = True
+        self.__tc_queue.open()
+        self.__tcp_thread.start()
 
     def is_open(self) -> bool:
+        """Whether the interface is open. The interface stays open while the TCP thread
+        reconnects, see :py:meth:`is_connected`."""
         with self.__conn_lock:
             return self.__connected
 
+    def is_connected(self) -> bool:
+        """Whether a connection to one of the target addresses is established."""
+        return self.__link_up.is_set()
+
+    def wait_connected(self, timeout: float | None = None) -> bool:
+        """Wait until a connection to one of the target addresses is established.
+
+        :param timeout: Maximum time to wait in seconds. None to wait indefinitely.
+        :return: True if the connection is established.
+        """
+        return self.__link_up.wait(timeout)
+
+    @property
+    def connected_address(self) -> EthAddr | None:
+        """Target address of the established connection, None if there is no connection."""
+        if self.__hub is not None:
+            return self.target_address if self.is_connected() else None
+        active = self.__active
+        return active.address if active is not None else None
+
     def __init_socket(self) -> None:
         if self.__tcp_socket is None:
             self.__tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.__tcp_socket.settimeout(2.0)
+            self.__tcp_socket.settimeout(self.connection_cfg.connect_timeout)
 
     def __connect_socket(self) -> None:
         assert self.__tcp_socket is not None
         try:
             self.__tcp_socket.connect(self.target_address.to_tuple)
-        except socket.timeout as e:
-            _LOGGER.warning(f"Could not connect to socket with address {self.target_address}: {e}")
-        finally:
-            self.__tcp_socket.settimeout(None)
-
-    def close(self, args: Any = None) -> None:
+        except OSError:
+            # Also covers a connect timeout. No link was established, so the interface stays
+            # closed.
+            self.__tcp_socket.close()
+            self.__tcp_socket = None
+            raise
+        # The hub uses a selector, so all socket operations are non-blocking.
+        self.__tcp_socket.setblocking(False)
+
+    def close(self, args: Any = None, drain_timeout: float | None = 0.0) -> None:
+        """Close the connection. TCs which were not sent until then are discarded, and their
+        futures fail with a :py:class:`SendError`.
+
+        :param drain_timeout: Maximum time in seconds to wait until all queued TCs were sent
+            before the connection is closed, see :py:meth:`flush`. None to wait indefinitely.
+        """
+        if drain_timeout != 0 and self.is_open():
+            try:
+                if not self.flush(drain_timeout):
+                    _LOGGER.warning("Not all TCs were sent before closing the TCP connection")
+            except SendError:
+                _LOGGER.exception("Sending TCs failed before closing the TCP connection")
+        if self.__hub is not None:
+            self.__hub.remove(self)
+            return
+        self.__tc_queue.close()
         if not self.is_open():
+            self.__discard_unsent_tcs()
             return
         self.__thread_kill_signal.set()
+        self.__wake_up_tcp_thread()
         if self.__tcp_thread is not None:
             self.__tcp_thread.join(self.__inner_thread_delay)
-            with self.__conn_lock:
-                self.__connected = False
-        self.__tcp_socket = None
+            self.__tcp_thread = None
+        if self.__tcp_socket is not None:
+            # Socket of a hub driven connection.
+            self.__tcp_socket.close()
+            self.__tcp_socket = None
+            self.__link_up.clear()
+        with self.__conn_lock:
+            self.__connected = False
+        self.__reception_signal.notify()
+        self.__discard_unsent_tcs()
 
     def send(self, data: bytes | bytearray) -> None:
-        self.__tc_queue.put(data)
+        """Queue a TC for the TCP thread.
 
-    def receive(self, parameters: float = 0) -> list[bytes]:
-        self.__tm_queue_to_packet_list()
-        tm_packet_list = self._tm_packet_list
-        self._tm_packet_list = []
+        :raises SendError: The interface is not open or was closed while the call was blocked by
+            a full TC queue, the TC queue was full until the send timeout expired, or sending a
+            previous TC failed inside the TCP thread.
+        """
+        self.__raise_send_error()
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        try:
+            self.__put_tc(self.framer.encode(data), None)
+        finally:
+            self.__wake_up_tcp_thread()
+
+    def submit(self, data: bytes | bytearray) -> Future[None]:
+        """Queue a TC for the TCP thread and return a future which completes once the TC was
+        completely written to the socket. The TC is not sent if the future is cancelled before
+        the TCP thread takes it from the queue.
+
+        The future fails with a :py:class:`SendError` if the TC is discarded because of the
+        overflow policy, if the transmission fails or if the interface is not open or is closed
+        before the TC was sent.
+
+        :raises SendError: Sending a previous TC failed inside the TCP thread.
+        """
+        self.__raise_send_error()
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        future: Future[None] = Future()
+        self.__put_tc(self.framer.encode(data), future)
+        self.__wake_up_tcp_thread()
+        return future
+
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Queues all packets and wakes up the TCP thread once. The TCP thread sends all queued
+        packets with a single ``sendmsg`` call where possible.
+
+        :raises SendError: See :py:meth:`send`.
+        """
+        self.__raise_send_error()
+        if self._hooks is not None:
+            packets = list(packets)
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        try:
+            for packet in packets:
+                self.__put_tc(self.framer.encode(packet), None)
+        finally:
+            self.__wake_up_tcp_thread()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until all queued TCs were written to the socket.
+
+        :param timeout: Maximum time to wait in seconds. None to wait indefinitely.
+        :return: True if all TCs were sent, False if the timeout expired or the interface was
+            closed before.
+        :raises SendError: Sending a TC failed inside the TCP thread, or the TCP thread closed
+            the interface because the connection failed before all TCs were sent.
+        """
+        with self.__tc_drained:
+            self.__tc_drained.wait_for(
+                lambda: self.__tcs_sent() or self.__send_error is not None or not self.is_open(),
+                timeout,
+            )
+        self.__raise_send_error()
+        return self.__tcs_sent()
+
+    @property
+    def tx_queue_depth(self) -> int:
+        """Number of TCs which were not sent completely yet."""
+        return len(self.__tc_queue) + len(self.__tc_pending)
+
+    @property
+    def dropped_tc_count(self) -> int:
+        """Number of TCs which were discarded because of the TC overflow policy."""
+        return self.__tc_queue.dropped_count
+
+    def __put_tc(self, frame: bytes | bytearray, future: Future | None) -> None:
+        tc_queue = self.__tc_queue
+        stored = tc_queue.put((frame, future), self.send_timeout)
+        if not stored and tc_queue.closed:
+            error = SendError("TCP interface is not open", None)
+            if future is None:
+                raise error
+            _fail_future(future, error)
+        elif (
+            not stored
+            and future is None
+            and self.__tc_queue.overflow_policy == OverflowPolicy.BLOCK
+        ):
+            raise SendError("TC queue is full", None)
+
+    def __tcs_sent(self) -> bool:
+        return not self.__tc_pending and len(self.__tc_queue) == 0
+
+    def __raise_send_error(self) -> None:
+        error = self.__send_error
+        if error is not None:
+            self.__send_error = None
+            raise error
+
+    def __discard_unsent_tcs(self) -> None:
+        error = SendError("the interface was closed before the TC was sent", None)
+        for _, future in self.__tc_queue.pop_all():
+            _fail_future(future, error)
+        # The pending TCs belong to the TCP thread while it is running.
+        if self.__tcp_thread is None or not self.__tcp_thread.is_alive():
+            for _, future in self.__tc_pending:
+                _fail_future(future, error)
+            self.__tc_pending.clear()
+
+    def __wake_up_tcp_thread(self) -> None:
+        if self.__hub is not None:
+            self.__hub.request_write(self)
+            return
+        wakeup_send = self.__wakeup_send
+        if wakeup_send is None:
+            return
+        # The wakeup socket might be full, so the TCP thread will wake up anyway, or the
+        # TCP thread has already closed it.
+        with contextlib.suppress(OSError):
+            wakeup_send.send(b"\x00")
+
+    def receive(
+        self, parameters: float = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        tm_queue = self.__tm_queue
+        if not tm_queue and timeout != 0:
+            self.__reception_signal.wait_for(lambda: bool(tm_queue) or not self.is_open(), timeout)
+        tm_packet_list = self.__reception_signal.take(tm_queue, max_packets)
+        self._metrics.packets_delivered(len(tm_packet_list))
+        if self._hooks is not None and tm_packet_list:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, tm_packet_list)
         return tm_packet_list
 
-    def __tm_queue_to_packet_list(self) -> None:
-        while self.__tm_queue.qsize() > 0:
-            self.__analysis_queue.append(self.__tm_queue.get())
-        # TCP is stream based, so there might be broken packets or multiple packets in one recv
-        # call. We parse the space packets contained in the stream here
-        if self.com_type == TcpCommunicationType.SPACE_PACKETS and self.__analysis_queue:
-            result = parse_space_packets_from_deque(
-                analysis_queue=self.__analysis_queue,
-                packet_ids=self.space_packet_ids,
+    def fileno(self) -> int:
+        return self.__reception_signal.fileno()
+
+    def __tcp_task(self, wakeup_recv: socket.socket, wakeup_send: socket.socket) -> None:
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(wakeup_recv, selectors.EVENT_READ)
+                try:
+                    self.__tmtc_event_loop(selector)
+                except KeyboardInterrupt:
+                    _LOGGER.info("Keyboard interrupt, shutting down TCP task")
+                    self.__close_from_tcp_thread(
+                        SendError("TCP thread was interrupted before the TC was sent", None)
+                    )
+                finally:
+                    for connection in self.__connections:
+                        if connection.socket is not None:
+                            connection.socket.close()
+                            connection.socket = None
+                    self.__deactivate()
+        finally:
+            # The interface might have been opened again with a new wakeup socket pair if
+            # joining this thread timed out.
+            if self.__wakeup_send is wakeup_send:
+                self.__wakeup_send = None
+            wakeup_send.close()
+            wakeup_recv.close()
+
+    def __tmtc_event_loop(self, selector: selectors.BaseSelector) -> None:
+        while not self.__thread_kill_signal.is_set():
+            timeout = self.__maintain_connections(selector)
+            if not self.is_open():
+                return
+            events = selector.select(timeout)
+            if self.__thread_kill_signal.is_set():
+                return
+            for key, mask in events:
+                connection = key.data
+                if connection is None:
+                    _drain_wakeup_socket(key.fileobj)
+                    # The socket is usually writable, so try to send new TCs right away.
+                    self.__send_tcs(selector)
+                elif connection.socket is not None:
+                    self.__handle_connection_event(selector, connection, mask)
+            active = self.__active
+            if active is not None:
+                # Only wait for the socket to become writable if there are TCs to send.
+                # Otherwise, the selector would wake up permanently.
+                events = selectors.EVENT_READ
+                if self.__tc_pending or len(self.__tc_queue) > 0:
+                    events |= selectors.EVENT_WRITE
+                self.__register(selector, active, events)
+
+    def __maintain_connections(self, selector: selectors.BaseSelector) -> float | None:
+        """Start the scheduled connection attempts and abort the attempts which timed out.
+        Closes the interface if no connection is left.
+
+        :return: Time in seconds until the next connection attempt or timeout.
+        """
+        now = time.monotonic()
+        for connection in self.__connections:
+            if connection.socket is None:
+                if connection.retry_at is not None and connection.retry_at <= now:
+                    self.__connect(selector, connection, now)
+            elif not connection.established and connection.deadline <= now:
+                self.__connection_lost(
+                    selector, connection, socket.timeout("connection attempt timed out")
+                )
+        timeout = None
+        for connection in self.__connections:
+            if connection.socket is None:
+                wake_up_at = connection.retry_at
+            elif not connection.established:
+                wake_up_at = connection.deadline
+            else:
+                continue
+            if wake_up_at is not None:
+                remaining = max(0.0, wake_up_at - now)
+                timeout = remaining if timeout is None else min(timeout, remaining)
+        if (
+            timeout is None
+            and self.__active is None
+            and not any(connection.established for connection in self.__connections)
+        ):
+            _LOGGER.warning(f"Could not connect to {self.com_if_id}, closing the interface")
+            error = self.__connection_error
+            self.__close_from_tcp_thread(
+                SendError(f"TCP connection failed before the TC was sent: {error}", error)
             )
-            for packet in result.tm_list:
-                self._tm_packet_list.append(packet)
-            flattened = bytearray()
-            while self.__analysis_queue:
-                flattened.extend(self.__analysis_queue.popleft())
-            # Might be spammy, but I consider this a configuration error, and the user
-            # should be notified about it.
-            for skipped_range in result.skipped_ranges:
-                _LOGGER.warning("skipped bytes in received TCP datastream:")
-                print(flattened[skipped_range.start : skipped_range.stop])
-                _LOGGER.warning("list of valid packet IDs might be incomplete")
-            self.__analysis_queue.append(flattened[result.scanned_bytes :])
+        return timeout
+
+    def __connect(
+        self, selector: selectors.BaseSelector, connection: _Connection, now: float
+    ) -> None:
+        """Start a non-blocking connection attempt. The selector reports the socket as writable
+        once the attempt completed."""
+        connection.retry_at = None
+        tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        tcp_socket.setblocking(False)
+        try:
+            result = tcp_socket.connect_ex(connection.address.to_tuple)
+        except OSError as e:
+            result = e.errno or errno.EINVAL
+        if result != 0 and result not in _CONNECT_IN_PROGRESS:
+            tcp_socket.close()
+            self.__connection_failed(connection, OSError(result, os.strerror(result)))
+            return
+        connection.socket = tcp_socket
+        connection.established = False
+        connection.deadline = now + self.connection_cfg.connect_timeout
+        connection.events = selectors.EVENT_WRITE
+        selector.register(tcp_socket, selectors.EVENT_WRITE, connection)
+
+    def __handle_connection_event(
+        self, selector: selectors.BaseSelector, connection: _Connection, mask: int
+    ) -> None:
+        assert connection.socket is not None
+        try:
+            if not connection.established:
+                error = connection.socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error != 0:
+                    raise OSError(error, os.strerror(error))
+                self.__establish(selector, connection)
+                return
+            if connection is not self.__active:
+                # Standby connection. It only has to be checked for a closed connection.
+                if mask & selectors.EVENT_READ and not self.__discard_standby_data(connection):
+                    raise ConnectionResetError("connection closed by the peer")
+                return
+            if mask & selectors.EVENT_WRITE:
+                self.__tc_handling()
+            if mask & selectors.EVENT_READ and not self.__tm_handling():
+                raise ConnectionResetError("connection closed by the peer")
+        except OSError as e:
+            self.__connection_lost(selector, connection, e)
+
+    def __establish(self, selector: selectors.BaseSelector, connection: _Connection) -> None:
+        connection.established = True
+        connection.failed_attempts = 0
+        self.__failed_attempts = 0
+        self.__register(selector, connection, selectors.EVENT_READ)
+        if self.__active is None:
+            self.__activate(connection)
+        else:
+            _LOGGER.info(f"Standby connection to {connection.address} established")
+
+    def __activate(self, connection: _Connection) -> None:
+        self.__active = connection
+        self.__tcp_socket = connection.socket
+        self.__connection_established()
+        _LOGGER.info(f"Connected to {connection.address}")
+
+    def __connection_established(self) -> None:
+        # Discard incomplete packets of a previous connection.
+        self.framer.clear()
+        if self.__connection_count > 0:
+            self._metrics.reconnects += 1
+        self.__connection_count += 1
+        self.__link_up.set()
+
+    def __deactivate(self) -> None:
+        self.__active = None
+        self.__tcp_socket = None
+        self.__link_up.clear()
+        if self.__tc_pending:
+            # A partially sent TC is sent again completely over the next connection. TCs which
+            # were completely written to the lost connection can not be recovered.
+            frame, future = self.__tc_pending[0]
+            self.__tc_pending[0] = (memoryview(frame.obj), future)
+
+    def __connection_lost(
+        self, selector: selectors.BaseSelector, connection: _Connection, error: OSError
+    ) -> None:
+        assert connection.socket is not None
+        selector.unregister(connection.socket)
+        connection.socket.close()
+        connection.socket = None
+        was_established = connection.established
+        connection.established = False
+        if connection is self.__active:
+            _LOGGER.warning(f"Connection to {connection.address} lost: {error}")
+            self.__deactivate()
+            # Fail over to a standby connection.
+            for standby in self.__connections:
+                if standby.established:
+                    self.__activate(standby)
+                    break
+        elif was_established:
+            _LOGGER.warning(f"Standby connection to {connection.address} lost: {error}")
+        self.__connection_failed(connection, error)
+
+    def __connection_failed(self, connection: _Connection, error: OSError) -> None:
+        """Schedule the next connection attempt according to the reconnect policy."""
+        self.__connection_error = error
+        if not connection.established:
+            _LOGGER.debug(f"Connection attempt to {connection.address} failed: {error}")
+        if self.connection_cfg.preconnect:
+            # Every address is reconnected on its own.
+            connection.failed_attempts += 1
+            failed_attempts = connection.failed_attempts
+            max_attempts = 1
         else:
-            while self.__analysis_queue:
-                self._tm_packet_list.append(self.__analysis_queue.popleft())
+            # The addresses are tried one after another.
+            self.__failed_attempts += 1
+            failed_attempts = self.__failed_attempts
+            self.__next_connection = (self.__next_connection + 1) % len(self.__connections)
+            connection = self.__connections[self.__next_connection]
+            max_attempts = len(self.__connections)
+        policy = self.connection_cfg.reconnect
+        if policy is not None:
+            max_attempts = policy.max_attempts
+        if max_attempts is not None and failed_attempts >= max_attempts:
+            connection.retry_at = None
+            return
+        delay = policy.delay(failed_attempts - 1, self.__random) if policy is not None else 0.0
+        connection.retry_at = time.monotonic() + delay
 
-    def __tcp_task(self) -> None:
-        while True and not self.__thread_kill_signal.is_set():
-            try:
-                self.__tmtc_event_loop()
-            except ConnectionRefusedError:
-                _LOGGER.warning("TCP connection attempt failed..")
-            time.sleep(self.__inner_thread_delay)
+    def __discard_standby_data(self, connection: _Connection) -> bool:
+        assert connection.socket is not None
+        try:
+            return connection.socket.recv_into(self.__recv_buf) > 0
+        except BlockingIOError:
+            return True
+
+    @staticmethod
+    def __register(selector: selectors.BaseSelector, connection: _Connection, events: int) -> None:
+        if connection.events != events:
+            assert connection.socket is not None
+            selector.modify(connection.socket, events, connection)
+            connection.events = events
+
+    def __send_tcs(self, selector: selectors.BaseSelector) -> None:
+        active = self.__active
+        if active is None:
+            return
+        try:
+            self.__tc_handling()
+        except OSError as e:
+            self.__connection_lost(selector, active, e)
 
-    def __tmtc_event_loop(self) -> None:
-        assert self.__tcp_socket is not None
+    def __close_from_tcp_thread(self, error: SendError) -> None:
+        """Close the interface because the TCP thread gives up. The TCs which were not sent fail
+        with the given error, which is also raised by the next send or flush call."""
+        with self.__conn_lock:
+            self.__connected = False
+        self.__tc_queue.close()
+        unsent_tcs = self.__tc_queue.pop_all()
+        for _, future in unsent_tcs:
+            _fail_future(future, error)
+        if unsent_tcs or self.__tc_pending:
+            self.__tc_transmission_failed(error)
+        # Wake up callers of flush and receive, which wait for the connection.
+        with self.__tc_drained:
+            self.__tc_drained.notify_all()
+        self.__reception_signal.notify()
+
+    def __tc_handling(self) -> None:
+        """Send all queued TCs. The TCs are written with a single :py:meth:`socket.socket.sendmsg`
+        call if the platform supports it. Partially sent TCs are completed on the next writable
+        event.
+
+        :raises OSError: The connection failed.
+        """
+        tc_pending = self.__tc_pending
         try:
             while True:
-                outputs = []
-                queue_size = self.__tc_queue.qsize()
-                if queue_size > 0:
-                    outputs.append(self.__tcp_socket)
-                (readable, writable, _) = select.select(
-                    [self.__tcp_socket], outputs, [], self.__inner_thread_delay
-                )
-                if self.__thread_kill_signal.is_set():
-                    self.__tcp_socket.close()
+                self.__take_queued_tcs()
+                if not tc_pending:
                     break
-                if queue_size > 0 and writable and writable[0]:
-                    self.__tc_handling(queue_size)
-                if readable and readable[0]:
-                    self.__tm_handling()
-        except KeyboardInterrupt:
-            _LOGGER.info("Keyboard interrupt, shutting down TCP task")
-            self.__force_shutdown()
+                sent = self.__send_pending_tcs()
+                if sent == 0:
+                    return
+                self.__consume_pending_tcs(sent)
+        except BlockingIOError:
+            # Socket send buffer is full, wait for the next writable event.
+            return
+        if not tc_pending and len(self.__tc_queue) == 0:
+            with self.__tc_drained:
+                self.__tc_drained.notify_all()
+
+    def __take_queued_tcs(self) -> None:
+        """Move TCs from the queue to the pending TCs. The number of pending TCs is limited, so
+        a bounded TC queue also bounds the memory used by the TCP thread."""
+        tc_pending = self.__tc_pending
+        if len(tc_pending) >= self.__tc_pending_limit:
+            return
+        for frame, future in self.__tc_queue.pop_all(self.__tc_pending_limit - len(tc_pending)):
+            # Cancelled TCs are skipped. Afterwards, the TC can not be cancelled anymore.
+            if future is None or future.set_running_or_notify_cancel():
+                tc_pending.append((memoryview(frame), future))
+
+    def __send_pending_tcs(self) -> int:
+        assert self.__tcp_socket is not None
+        if hasattr(self.__tcp_socket, "sendmsg"):
+            return self.__tcp_socket.sendmsg([frame for frame, _ in self.__tc_pending])
+        return self.__tcp_socket.send(self.__tc_pending[0][0])
+
+    def __consume_pending_tcs(self, sent: int) -> None:
+        metrics = self._metrics
+        metrics.tx_bytes += sent
+        while sent > 0:
+            frame, future = self.__tc_pending[0]
+            if len(frame) <= sent:
+                sent -= len(frame)
+                self.__tc_pending.popleft()
+                metrics.tx_packets += 1
+                if future is not None:
+                    future.set_result(None)
+            else:
+                self.__tc_pending[0] = (frame[sent:], future)
+                sent = 0
+
+    def __tc_transmission_failed(self, error: SendError) -> None:
+        """Fail the TCs which were already taken from the queue. The error is raised by the next
+        send or flush call."""
+        for _, future in self.__tc_pending:
+            _fail_future(future, error)
+        self.__tc_pending.clear()
+        self.__send_error = error
+        with self.__tc_drained:
+            self.__tc_drained.notify_all()
+
+    def __tm_handling(self) -> bool:
+        """Receive and parse the available TM data.
+
+        :return: False if the connection was closed by the peer.
+        """
+        assert self.__tcp_socket is not None
+        try:
+            bytes_recvd = self.__tcp_socket.recv_into(self.__recv_buf)
+        except BlockingIOError:
+            return True
+        if bytes_recvd == 0:
+            _LOGGER.info("TCP server has been closed")
+            return False
+        metrics = self._metrics
+        metrics.bytes_received(bytes_recvd)
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.emit(self, HookEvent.BYTES_RECEIVED, bytes(self.__recv_buf[:bytes_recvd]))
+        # TCP is stream based, so there might be broken packets or multiple packets in one recv
+        # call. The framer only buffers the bytes of incomplete packets.
+        packets = self.framer.feed(self.__recv_buf[:bytes_recvd])
+        if not packets:
+            return True
+        metrics.packets_received(len(packets))
+        if hooks is not None:
+            hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        if self._deliver_to_callback(packets):
+            return True
+        for packet in packets:
+            if (
+                self.max_packets_stored is not None
+                and len(self.__tm_queue) >= self.max_packets_stored
+            ):
+                _LOGGER.warning(
+                    "Number of packets in TCP queue too large. Overwriting old packets.."
+                )
+                metrics.dropped_packets += 1
+            self.__tm_queue.append(packet)
+        self.__reception_signal.notify()
+        return True
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        return len(self.__tm_queue)
+
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        self._packet_callback = callback
+
+    def hub_attach(self, hub: ComHub | None) -> None:
+        self.__hub = hub
+
+    def __metric_gauges(self) -> dict[str, int]:
+        return {
+            "rx_queue_depth": len(self.__tm_queue),
+            "tx_queue_depth": self.tx_queue_depth,
+            "decode_errors": self.framer.parsing_error_count,
+        }
+
+    def hub_fileobj(self) -> socket.socket:
+        assert self.__tcp_socket is not None
+        return self.__tcp_socket
+
+    def hub_on_readable(self) -> None:
+        try:
+            if not self.__tm_handling():
+                self.__force_shutdown()
         except ConnectionResetError:
             self.__force_shutdown()
             _LOGGER.exception("ConnectionResetError. TCP server might not be up")
 
-    def __tc_handling(self, queue_size: int) -> None:
+    def hub_wants_write(self) -> bool:
+        return bool(self.__tc_pending) or len(self.__tc_queue) > 0
+
+    def hub_on_writable(self) -> None:
+        """Send the queued TCs. A hub driven interface does not reconnect, so the TCs which were
+        taken from the queue fail if the connection fails."""
         try:
-            self.__tcp_socket.sendto(self.__tc_queue.get(), self.target_address.to_tuple)
-            queue_size -= 1
+            self.__tc_handling()
         except BrokenPipeError as e:
-            raise SendError(f"{e}", e) from e
-        except (ConnectionRefusedError, OSError) as e:
-            self.__force_shutdown()
-            raise SendError(f"TCP connection attempt failed with exception: {e}", e) from e
-
-    def __tm_handling(self) -> None:
-        bytes_recvd = self.__tcp_socket.recv(4096)
-        if bytes_recvd == b"":
+            error = SendError(f"{e}", e)
+            self.__tc_transmission_failed(error)
+            raise error from e
+        except OSError as e:
             self.__force_shutdown()
-            _LOGGER.info("TCP server has been closed")
-            return
-        if (
-            self.max_packets_stored is not None
-            and self.__tm_queue.qsize() >= self.max_packets_stored
-        ):
-            _LOGGER.warning("Number of packets in TCP queue too large. Overwriting old packets..")
-            self.__tm_queue.get()
-            # TODO: If segments are received but the receiver is unable to parse packets
-            #       properly, it might make sense to have a timeout which then also
-            #       logs that there might be an issue reading packets
-        self.__tm_queue.put(bytes(bytes_recvd))
-
-    def packets_available(self, parameters: Any = 0) -> int:
-        self.__tm_queue_to_packet_list()
-        return len(self._tm_packet_list)
+            error = SendError(f"TCP connection attempt failed with exception: {e}", e)
+            self.__tc_transmission_failed(error)
+            raise error from e
 
     def __force_shutdown(self) -> None:
         assert self.__tcp_socket is not None
         self.__tcp_socket.close()
+        self.__tcp_socket = None
+        self.__link_up.clear()
         with self.__conn_lock:
             self.__connected = False
+        self.__tc_queue.close()
+        # Wake up callers of flush and receive, which wait for the connection.
+        with self.__tc_drained:
+            self.__tc_drained.notify_all()
+        self.__reception_signal.notify()
+
+
+def _drain_wakeup_socket(wakeup_recv: socket.socket) -> None:
+    with contextlib.suppress(BlockingIOError):
+        while wakeup_recv.recv(4096):
+            pass
+
+
+def _fail_future(future: Future | None, error: SendError) -> None:
+    if future is None:
+        return
+    # The future might have been cancelled in the meantime.
+    with contextlib.suppress(InvalidStateError):
+        future.set_exception(error)
+
+
+def _discard_tc(tc: tuple[bytes | bytearray, Future | None]) -> None:
+    _fail_future(tc[1], SendError("TC was discarded because the TC queue is full", None))
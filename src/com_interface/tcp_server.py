@@ -0,0 +1,519 @@
+"""TCP server communication interface which serves many clients from one thread."""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import logging
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable
+
+from com_interface import ComInterface, SendError
+from com_interface.framing import SpacePacketFramer
+from com_interface.hooks import HookEvent
+from com_interface.ip_utils import EthAddr
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import OverflowPolicy, ReceptionSignal
+from com_interface.stream_buf import DEFAULT_STREAM_BUF_SIZE
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from spacepackets.ccsds.spacepacket import PacketId
+
+    from com_interface.framing import Framer
+    from com_interface.hub import PacketCallback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Also stays below the IOV_MAX limit of the OS for the sendmsg call.
+_MAX_FRAMES_PER_SEND = 512
+# Queued instead of a frame to close the connection once the previous frames were sent.
+_DISCONNECT = memoryview(b"")
+
+
+class _Client:
+    """Connection to one client. Only used by the server thread."""
+
+    def __init__(self, tcp_socket: socket.socket, address: EthAddr, framer: Framer):
+        self.socket = tcp_socket
+        self.address = address
+        self.framer = framer
+        # Encoded frames which were not sent completely yet, together with the number of
+        # packets they contain. Frames of a broadcast are shared by all clients.
+        self.tx_frames: deque[tuple[memoryview, int]] = deque()
+        # The first frame was partially sent, so it must not be discarded.
+        self.partially_sent = False
+        # Selector events the socket is currently registered for.
+        self.events = selectors.EVENT_READ
+
+
+class TcpSpacepacketsServer(ComInterface):
+    """Communication interface for the server side of TCP communication. It accepts any number
+    of clients and parses the space packets, or the frames of a framer, from the stream of every
+    client.
+
+    All clients are served by one server thread which waits on a :py:mod:`selectors` loop. It is
+    started on the :py:meth:`open` call. Every client has its own reassembly buffer and its own
+    bounded send queue, so a slow client does not stall the other clients.
+
+    :py:meth:`receive` returns the packets of all clients. :py:meth:`receive_from` returns
+    them together with the address of the client. :py:meth:`send` broadcasts a packet to all
+    clients, and :py:meth:`send_to` sends it to one client. A broadcast packet is only encoded
+    once, and all clients share the encoded data.
+    """
+
+    def __init__(
+        self,
+        com_if_id: str,
+        space_packet_ids: Sequence[PacketId],
+        bind_address: EthAddr,
+        framer_factory: Callable[[], Framer] | None = None,
+        max_packets_stored: int | None = None,
+        max_clients: int | None = None,
+        max_frames_queued: int = 1024,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
+        """
+        :param space_packet_ids: Valid packet IDs for CCSDS space packets. Those will be used
+            to parse for space packets inside the TCP stream of every client.
+        :param bind_address: Address the server listens on. Port 0 lets the OS assign a port,
+            see :py:attr:`address`.
+        :param framer_factory: Creates the framer which splits the stream of a client into
+            packets and encodes the sent packets, for example
+            :py:class:`com_interface.framing.CobsFramer`. The space packet IDs are ignored if
+            a framer factory is specified.
+        :param max_packets_stored: Oldest received packets are discarded if more are stored.
+        :param max_clients: Further clients are disconnected right after they were accepted.
+            None for no limit.
+        :param max_frames_queued: Maximum number of send calls which are queued for one client.
+        :param overflow_policy: Policy which is applied if the send queue of a client is full.
+            :py:attr:`OverflowPolicy.BLOCK` is not supported, because a slow client would stall
+            all other clients.
+        :raises ValueError: The overflow policy is not supported.
+        """
+        if overflow_policy == OverflowPolicy.BLOCK:
+            raise ValueError("a blocking overflow policy would stall all clients")
+        self.com_if_id = com_if_id
+        self.space_packet_ids = space_packet_ids
+        self.bind_address = bind_address
+        if framer_factory is None:
+            framer_factory = functools.partial(SpacePacketFramer, space_packet_ids)
+        self.framer_factory = framer_factory
+        # Only used to encode the sent packets.
+        self.__encoder = self.framer_factory()
+        self.max_packets_stored = max_packets_stored
+        self.max_clients = max_clients
+        self.max_frames_queued = max_frames_queued
+        self.overflow_policy = overflow_policy
+        #: Number of sent packets which were discarded because of the overflow policy.
+        self.dropped_tx_count = 0
+        self.__listen_socket: socket.socket | None = None
+        self.__server_thread: threading.Thread | None = None
+        self.__kill_signal = threading.Event()
+        # Clients by their address, only used by the server thread.
+        self.__clients: dict[EthAddr, _Client] = {}
+        # Immutable copy of the client addresses for other threads.
+        self.__client_addresses: tuple[EthAddr, ...] = ()
+        # Encoded frames together with their target client, or None for all clients, and the
+        # number of packets they contain. Taken by the server thread.
+        self.__commands: deque[tuple[EthAddr | None, bytes | bytearray | None, int]] = deque()
+        # Received packets together with the address of their client.
+        self.__rx_queue: deque[tuple[EthAddr, bytes]] = deque(maxlen=max_packets_stored)
+        self.__reception_signal = ReceptionSignal()
+        # Reception buffer which is shared by all clients, only used by the server thread.
+        self.__recv_buf = memoryview(bytearray(DEFAULT_STREAM_BUF_SIZE))
+        # Used by the send calls to wake up the server thread, which owns the receiving side.
+        self.__wakeup_send: socket.socket | None = None
+        self._metrics = InterfaceMetrics(self.__metric_gauges)
+
+    @property
+    def id(self) -> str:
+        return self.com_if_id
+
+    def initialize(self, args: Any = None) -> None:
+        pass
+
+    def open(self, args: Any = None) -> None:
+        """Bind the listening socket and start the server thread.
+
+        :raises OSError: The address can not be bound.
+        """
+        if self.is_open():
+            return
+        listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listen_socket.bind(self.bind_address.to_tuple)
+            listen_socket.listen()
+            listen_socket.setblocking(False)
+        except OSError:
+            listen_socket.close()
+            raise
+        self.__listen_socket = listen_socket
+        self.__kill_signal.clear()
+        wakeup_recv, wakeup_send = socket.socketpair()
+        wakeup_recv.setblocking(False)
+        wakeup_send.setblocking(False)
+        self.__wakeup_send = wakeup_send
+        self.__server_thread = threading.Thread(
+            target=self.__server_task, args=(listen_socket, wakeup_recv, wakeup_send), daemon=True
+        )
+        self.__server_thread.start()
+
+    def is_open(self) -> bool:
+        return self.__listen_socket is not None
+
+    @property
+    def address(self) -> EthAddr | None:
+        """Address the server listens on, None if the interface is not open."""
+        if self.__listen_socket is None:
+            return None
+        return EthAddr.from_tuple(self.__listen_socket.getsockname()[:2])
+
+    @property
+    def clients(self) -> tuple[EthAddr, ...]:
+        """Addresses of the connected clients."""
+        return self.__client_addresses
+
+    def close(self, args: Any = None) -> None:
+        """Disconnect all clients and stop listening. Packets which were not sent until then
+        are discarded."""
+        if self.__server_thread is not None:
+            self.__kill_signal.set()
+            self.__wake_up_server_thread()
+            self.__server_thread.join()
+            self.__server_thread = None
+        if self.__listen_socket is not None:
+            self.__listen_socket.close()
+            self.__listen_socket = None
+        self.__commands.clear()
+        self.__reception_signal.notify()
+
+    def send(self, data: bytes | bytearray) -> None:
+        """Queue a packet for all connected clients.
+
+        :raises SendError: The interface is not open.
+        """
+        self.__check_open()
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        self.__put_frame(None, self.__encoder.encode(data), 1)
+
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Encode all packets into one buffer which is queued for all connected clients.
+
+        :raises SendError: See :py:meth:`send`.
+        """
+        self.__check_open()
+        packets = list(packets)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        self.__put_frame(None, self.__encoder.encode_many(packets), len(packets))
+
+    def send_to(self, client: EthAddr, data: bytes | bytearray) -> None:
+        """Queue a packet for one client.
+
+        :raises SendError: The interface is not open or the client is not connected.
+        """
+        self.__check_open()
+        if client not in self.__client_addresses:
+            raise SendError(f"client {client} is not connected", None)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        self.__put_frame(client, self.__encoder.encode(data), 1)
+
+    def disconnect(self, client: EthAddr) -> None:
+        """Close the connection to a client after the packets queued until now were sent."""
+        self.__commands.append((client, None, 0))
+        self.__wake_up_server_thread()
+
+    def receive(
+        self, parameters: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        """Return the packets of all clients, see :py:meth:`receive_from`."""
+        return [packet for _, packet in self.receive_from(max_packets, timeout)]
+
+    def receive_from(
+        self, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[tuple[EthAddr, bytes]]:
+        """Return the packets of all clients together with the address of their client, in the
+        order they were received.
+
+        :param max_packets: Maximum number of returned packets. None to return all packets.
+        :param timeout: Maximum time in seconds to wait for packets if none are stored. None to
+            wait until packets arrive or the interface is closed.
+        """
+        rx_queue = self.__rx_queue
+        if not rx_queue and timeout != 0:
+            self.__reception_signal.wait_for(lambda: bool(rx_queue) or not self.is_open(), timeout)
+        packets = self.__reception_signal.take(rx_queue, max_packets)
+        self._metrics.packets_delivered(len(packets))
+        if self._hooks is not None and packets:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, [packet for _, packet in packets])
+        return packets
+
+    def packets_available(self, parameters: Any = 0) -> int:
+        return len(self.__rx_queue)
+
+    def fileno(self) -> int:
+        return self.__reception_signal.fileno()
+
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        """Register a callback which is called by the server thread with the packets of one
+        client at a time."""
+        self._packet_callback = callback
+
+    def __check_open(self) -> None:
+        if not self.is_open():
+            raise SendError("TCP server is not open", None)
+
+    def __put_frame(self, client: EthAddr | None, frame: bytes | bytearray, count: int) -> None:
+        # The interface might have been closed after the caller checked it.
+        self.__check_open()
+        if not frame:
+            return
+        # The frame is shared by all clients, so it must not be modified by the caller.
+        self.__commands.append((client, bytes(frame), count))
+        self.__wake_up_server_thread()
+
+    def __wake_up_server_thread(self) -> None:
+        # The server thread resets the attribute when it exits, so it is only read once.
+        wakeup_send = self.__wakeup_send
+        if wakeup_send is None:
+            return
+        # The wakeup socket might be full, so the server thread will wake up anyway, or the
+        # server thread has already closed it.
+        with contextlib.suppress(OSError):
+            wakeup_send.send(b"\x00")
+
+    def __server_task(
+        self,
+        listen_socket: socket.socket,
+        wakeup_recv: socket.socket,
+        wakeup_send: socket.socket,
+    ) -> None:
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(listen_socket, selectors.EVENT_READ)
+                selector.register(wakeup_recv, selectors.EVENT_READ)
+                try:
+                    self.__event_loop(selector, listen_socket, wakeup_recv)
+                finally:
+                    for client in list(self.__clients.values()):
+                        self.__remove_client(selector, client)
+        finally:
+            if self.__wakeup_send is wakeup_send:
+                self.__wakeup_send = None
+            wakeup_send.close()
+            wakeup_recv.close()
+
+    def __event_loop(
+        self,
+        selector: selectors.BaseSelector,
+        listen_socket: socket.socket,
+        wakeup_recv: socket.socket,
+    ) -> None:
+        while not self.__kill_signal.is_set():
+            for key, mask in selector.select():
+                if key.fileobj is wakeup_recv:
+                    with contextlib.suppress(BlockingIOError):
+                        while wakeup_recv.recv(4096):
+                            pass
+                    self.__take_commands(selector)
+                elif key.fileobj is listen_socket:
+                    self.__accept_clients(selector, listen_socket)
+                else:
+                    client: _Client = key.data
+                    # The client might have been removed by a previous event.
+                    if client.address in self.__clients:
+                        self.__handle_client_event(selector, client, mask)
+            if self.__kill_signal.is_set():
+                return
+
+    def __accept_clients(
+        self, selector: selectors.BaseSelector, listen_socket: socket.socket
+    ) -> None:
+        while True:
+            try:
+                tcp_socket, address = listen_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # For example, too many open files. The next event retries.
+                _LOGGER.warning(f"Accepting a TCP client failed: {e}")
+                return
+            if self.max_clients is not None and len(self.__clients) >= self.max_clients:
+                _LOGGER.warning(f"Rejecting TCP client {address}, {self.max_clients} connected")
+                tcp_socket.close()
+                continue
+            tcp_socket.setblocking(False)
+            client = _Client(tcp_socket, EthAddr.from_tuple(address[:2]), self.framer_factory())
+            selector.register(tcp_socket, selectors.EVENT_READ, client)
+            self.__clients[client.address] = client
+            self.__client_addresses = tuple(self.__clients)
+            _LOGGER.info(f"TCP client {client.address} connected")
+
+    def __remove_client(self, selector: selectors.BaseSelector, client: _Client) -> None:
+        selector.unregister(client.socket)
+        client.socket.close()
+        del self.__clients[client.address]
+        self.__client_addresses = tuple(self.__clients)
+
+    def __handle_client_event(
+        self, selector: selectors.BaseSelector, client: _Client, mask: int
+    ) -> None:
+        try:
+            if mask & selectors.EVENT_WRITE and not self.__send_frames(client):
+                _LOGGER.info(f"TCP client {client.address} disconnected on request")
+                self.__remove_client(selector, client)
+                return
+            if mask & selectors.EVENT_READ and not self.__receive_from_client(client):
+                _LOGGER.info(f"TCP client {client.address} disconnected")
+                self.__remove_client(selector, client)
+                return
+        except OSError as e:
+            _LOGGER.warning(f"Connection to TCP client {client.address} failed: {e}")
+            self.__remove_client(selector, client)
+            return
+        self.__update_events(selector, client)
+
+    def __take_commands(self, selector: selectors.BaseSelector) -> None:
+        commands = self.__commands
+        touched: dict[EthAddr, _Client] = {}
+        while commands:
+            target, frame, count = commands.popleft()
+            if frame is None:
+                client = self.__clients.get(target)
+                if client is not None:
+                    client.tx_frames.append((_DISCONNECT, 0))
+                    touched[client.address] = client
+                continue
+            view = memoryview(frame)
+            if target is None:
+                for client in self.__clients.values():
+                    self.__queue_frame(client, view, count)
+                    touched[client.address] = client
+            else:
+                client = self.__clients.get(target)
+                if client is None:
+                    self.dropped_tx_count += count
+                    continue
+                self.__queue_frame(client, view, count)
+                touched[client.address] = client
+        for client in touched.values():
+            # The socket is usually writable, so try to send right away.
+            self.__handle_client_event(selector, client, selectors.EVENT_WRITE)
+
+    def __queue_frame(self, client: _Client, frame: memoryview, count: int) -> None:
+        tx_frames = client.tx_frames
+        if len(tx_frames) >= self.max_frames_queued:
+            if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+                self.dropped_tx_count += count
+                return
+            # A partially sent frame has to be completed, otherwise the stream is corrupted.
+            index = 1 if client.partially_sent else 0
+            if index >= len(tx_frames) or tx_frames[index][0] is _DISCONNECT:
+                self.dropped_tx_count += count
+                return
+            self.dropped_tx_count += tx_frames[index][1]
+            del tx_frames[index]
+        tx_frames.append((frame, count))
+
+    def __send_frames(self, client: _Client) -> bool:
+        """Send the queued frames of a client with a single :py:meth:`socket.socket.sendmsg`
+        call if the platform supports it.
+
+        :return: False if all frames before a requested disconnect were sent, so the connection
+            has to be closed.
+        :raises OSError: The connection failed.
+        """
+        tx_frames = client.tx_frames
+        metrics = self._metrics
+        while tx_frames:
+            if tx_frames[0][0] is _DISCONNECT:
+                return False
+            frames = []
+            for frame, _ in tx_frames:
+                if frame is _DISCONNECT or len(frames) >= _MAX_FRAMES_PER_SEND:
+                    break
+                frames.append(frame)
+            try:
+                if hasattr(client.socket, "sendmsg"):
+                    sent = client.socket.sendmsg(frames)
+                else:
+                    sent = client.socket.send(frames[0])
+            except BlockingIOError:
+                # Socket send buffer is full, wait for the next writable event.
+                return True
+            if sent == 0:
+                return True
+            metrics.tx_bytes += sent
+            while sent > 0:
+                frame, count = tx_frames[0]
+                if len(frame) <= sent:
+                    sent -= len(frame)
+                    tx_frames.popleft()
+                    metrics.tx_packets += count
+                    client.partially_sent = False
+                else:
+                    tx_frames[0] = (frame[sent:], count)
+                    client.partially_sent = True
+                    sent = 0
+        return True
+
+    def __receive_from_client(self, client: _Client) -> bool:
+        """Receive and parse the available data of a client.
+
+        :return: False if the connection was closed by the client.
+        """
+        try:
+            bytes_recvd = client.socket.recv_into(self.__recv_buf)
+        except BlockingIOError:
+            return True
+        if bytes_recvd == 0:
+            return False
+        metrics = self._metrics
+        metrics.bytes_received(bytes_recvd)
+        hooks = self._hooks
+        if hooks is not None:
+            hooks.emit(self, HookEvent.BYTES_RECEIVED, bytes(self.__recv_buf[:bytes_recvd]))
+        packets = client.framer.feed(self.__recv_buf[:bytes_recvd])
+        if not packets:
+            return True
+        metrics.packets_received(len(packets))
+        if hooks is not None:
+            hooks.emit(self, HookEvent.FRAMES_DECODED, packets)
+        if self._deliver_to_callback(packets):
+            return True
+        rx_queue = self.__rx_queue
+        if rx_queue.maxlen is not None:
+            metrics.dropped_packets += max(0, len(rx_queue) + len(packets) - rx_queue.maxlen)
+        address = client.address
+        rx_queue.extend((address, packet) for packet in packets)
+        self.__reception_signal.notify()
+        return True
+
+    @staticmethod
+    def __update_events(selector: selectors.BaseSelector, client: _Client) -> None:
+        # Only wait for the socket to become writable if there are frames to send. Otherwise,
+        # the selector would wake up permanently.
+        events = selectors.EVENT_READ
+        if client.tx_frames:
+            events |= selectors.EVENT_WRITE
+        if events != client.events:
+            selector.modify(client.socket, events, client)
+            client.events = events
+
+    def __metric_gauges(self) -> dict[str, int]:
+        # Copy the clients, the server thread might modify them.
+        clients = list(self.__clients.copy().values())
+        return {
+            "rx_queue_depth": len(self.__rx_queue),
+            "tx_queue_depth": sum(len(client.tx_frames) for client in clients),
+            "decode_errors": sum(client.framer.parsing_error_count for client in clients),
+            "clients": len(clients),
+        }
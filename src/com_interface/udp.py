@@ -2,37 +2,139 @@
 
 from __future__ import annotations
 
+import contextlib
+import io
 import logging
 import select
+import selectors
 import socket
+import struct
+import threading
+import time
 from typing import TYPE_CHECKING, Any
 
 from com_interface import ComInterface
+from com_interface._mmsg import MmsgReceiver, mmsg_available, sendmmsg, sendmmsg_to
+from com_interface.hooks import HookEvent
+from com_interface.hub import HubDriven
+from com_interface.ip_utils import EthAddr
+from com_interface.metrics import InterfaceMetrics
+from com_interface.packet_queue import BoundedPacketQueue, OverflowPolicy, ReceptionSignal
 
 if TYPE_CHECKING:
-    from com_interface.ip_utils import EthAddr
+    from collections.abc import Iterable, Sequence
+
+    from com_interface.hub import ComHub, PacketCallback
 
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_UDP_RECV_SIZE = 4096
+DEFAULT_UDP_RECV_BATCH_SIZE = 64
+
+
+class DatagramReceiver:
+    """Drains all datagrams which are available on a non-blocking socket.
 
-class UdpClient(ComInterface):
-    """Communication interface for UDP communication"""
+    On Linux, the datagrams are received in batches using the ``recvmmsg`` system call. On other
+    platforms, the datagrams are received into one reusable buffer with
+    :py:meth:`socket.socket.recvfrom_into` and only the received bytes are copied.
+    """
 
     def __init__(
         self,
-        com_if_id: str,
-        send_address: EthAddr,
-        recv_addr: None | EthAddr = None,
+        max_recv_size: int = DEFAULT_UDP_RECV_SIZE,
+        batch_size: int = DEFAULT_UDP_RECV_BATCH_SIZE,
+        use_recvmmsg: bool = True,
+        with_addresses: bool = False,
     ):
-        """Initialize a communication interface to send and receive UDP datagrams.
+        """
+        :param max_recv_size: Maximum datagram size. Larger datagrams are truncated.
+        :param batch_size: Maximum number of datagrams received with one ``recvmmsg`` call.
+        :param use_recvmmsg: Use ``recvmmsg`` if it is available.
+        :param with_addresses: Determine the sender address of every datagram.
+        """
+        self.max_recv_size = max_recv_size
+        self.with_addresses = with_addresses
+        self._mmsg_receiver = None
+        if use_recvmmsg and mmsg_available():
+            self._mmsg_receiver = MmsgReceiver(batch_size, max_recv_size, with_addresses)
+        self._buf = bytearray(max_recv_size)
+        self._view = memoryview(self._buf)
 
-        :param send_address:
-        :param recv_addr:
+    def receive(
+        self, sock: socket.socket, max_packets: int | None = None
+    ) -> list[tuple[bytearray, tuple | None]]:
+        """Receive all datagrams which are currently available on the socket.
+
+        :param max_packets: Maximum number of received datagrams. None to drain the socket.
+        :return: List of datagrams and their sender addresses. The addresses are None if the
+            receiver was created without address support.
         """
-        self.udp_socket = None
+        packets = []
+        if self._mmsg_receiver is not None:
+            while max_packets is None or len(packets) < max_packets:
+                remaining = None if max_packets is None else max_packets - len(packets)
+                batch = self._mmsg_receiver.receive(sock, remaining)
+                packets.extend(batch)
+                if len(batch) < self._mmsg_receiver.batch_size:
+                    break
+            return packets
+        with contextlib.suppress(BlockingIOError):
+            while max_packets is None or len(packets) < max_packets:
+                recv_len, sender_addr = sock.recvfrom_into(self._buf)
+                packets.append(
+                    (
+                        bytearray(self._view[:recv_len]),
+                        sender_addr if self.with_addresses else None,
+                    )
+                )
+        return packets
+
+
+class _UdpSocketComIF(ComInterface, HubDriven):
+    """Base class for the UDP interfaces, which implements the reception of datagrams.
+
+    By default, the socket is only read when a receive call is made. If threaded reception is
+    enabled, a separate thread is spun up on the :py:meth:`open` call which permanently drains
+    the socket into a :py:class:`com_interface.packet_queue.BoundedPacketQueue`. This prevents
+    datagrams from being dropped by the OS if the application does not receive often enough. If
+    the interface is driven by a :py:class:`com_interface.hub.ComHub`, the hub drains the socket
+    into the same queue instead of a separate thread.
+    """
+
+    def __init__(
+        self,
+        com_if_id: str,
+        max_recv_size: int,
+        use_mmsg: bool,
+        with_addresses: bool,
+        threaded_reception: bool,
+        max_packets_stored: int | None,
+        overflow_policy: OverflowPolicy,
+        recv_buf_size: int | None,
+    ):
+        self.udp_socket: socket.socket | None = None
         self.com_if_id = com_if_id
-        self.send_address = send_address
-        self.recv_addr = recv_addr
+        self.threaded_reception = threaded_reception
+        self.recv_buf_size = recv_buf_size
+        self._receiver = DatagramReceiver(
+            max_recv_size, use_recvmmsg=use_mmsg, with_addresses=with_addresses
+        )
+        self.use_sendmmsg = use_mmsg and mmsg_available()
+        # Received datagrams together with their source, see _tag_datagrams.
+        self._packet_queue = BoundedPacketQueue(max_packets_stored, overflow_policy)
+        self.__reception_signal = ReceptionSignal()
+        self.__reception_thread: threading.Thread | None = None
+        self.__reception_shutdown = threading.Event()
+        self.__wakeup_send: socket.socket | None = None
+        self.__hub: ComHub | None = None
+        self._metrics = InterfaceMetrics(self._metric_gauges)
+
+    @property
+    def dropped_packet_count(self) -> int:
+        """Number of packets discarded by the reception thread or the hub because of the overflow
+        policy."""
+        return self._packet_queue.dropped_count
 
     @property
     def id(self) -> str:
@@ -47,6 +149,231 @@ class UdpClient(ComInterface):
     def initialize(self, args: Any = None) -> Any:
         pass
 
+    def is_open(self) -> bool:
+        return self.udp_socket is not None
+
+    def close(self, args: Any = None) -> None:
+        if self.__hub is not None:
+            self.__hub.remove(self)
+            return
+        if self.__reception_thread is not None:
+            assert self.__wakeup_send is not None
+            self.__reception_shutdown.set()
+            self.__wakeup_send.send(b"\x00")
+            # Releases the reception thread if it is blocked by a full queue.
+            self._packet_queue.close()
+            self.__reception_thread.join()
+            self.__reception_thread = None
+            self.__wakeup_send.close()
+            self.__wakeup_send = None
+        if self.udp_socket is not None:
+            self.udp_socket.close()
+            self.udp_socket = None
+        self.__reception_signal.notify()
+
+    def packets_available(self, parameters: Any = 0) -> bool | int:
+        """Without threaded reception, this only checks whether the socket is readable. With
+        threaded reception or when driven by a hub, this returns the number of stored packets."""
+        if self.__queued_reception():
+            return len(self._packet_queue)
+        if self.udp_socket is None:
+            return False
+        ready = select.select([self.udp_socket], [], [], 0)
+        return bool(ready[0])
+
+    def fileno(self) -> int:
+        """Without threaded reception, this is the descriptor of the socket, which changes
+        when the interface is opened again.
+
+        :raises io.UnsupportedOperation: Threaded reception is disabled and the interface is
+            not open.
+        """
+        if self.__queued_reception():
+            return self.__reception_signal.fileno()
+        if self.udp_socket is None:
+            raise io.UnsupportedOperation("UDP interface is not open")
+        return self.udp_socket.fileno()
+
+    def on_packet(self, callback: PacketCallback | None) -> None:
+        """Register a callback for the packets received by the reception thread or the hub.
+
+        :raises io.UnsupportedOperation: Threaded reception is disabled and the interface is
+            not driven by a hub.
+        """
+        if callback is not None and not self.__queued_reception():
+            raise io.UnsupportedOperation("packet callbacks require threaded reception or a hub")
+        self._packet_callback = callback
+
+    def hub_attach(self, hub: ComHub | None) -> None:
+        self.__hub = hub
+
+    def hub_fileobj(self) -> socket.socket:
+        assert self.udp_socket is not None
+        return self.udp_socket
+
+    def hub_on_readable(self) -> None:
+        assert self.udp_socket is not None
+        self.__drain_socket(self.udp_socket)
+
+    def _start_reception(self) -> None:
+        """Called by :py:meth:`open` after the socket was set up."""
+        assert self.udp_socket is not None
+        if self.recv_buf_size is not None:
+            self.udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buf_size)
+        # Set non-blocking because we use select
+        self.udp_socket.setblocking(False)
+        if self.threaded_reception and self.__hub is None:
+            self.__reception_shutdown.clear()
+            self._packet_queue.open()
+            wakeup_recv, self.__wakeup_send = socket.socketpair()
+            self.__reception_thread = threading.Thread(
+                target=self.__reception_task, args=(self.udp_socket, wakeup_recv), daemon=True
+            )
+            self.__reception_thread.start()
+
+    def _receive_datagrams(
+        self, max_packets: int | None, timeout: float | None
+    ) -> list[tuple[bytes, Any]]:
+        """Return the received datagrams together with their source. Without threaded reception,
+        this waits for the socket to become readable if no datagram is available and a timeout
+        is given."""
+        if self.__queued_reception():
+            packet_queue = self._packet_queue
+            if len(packet_queue) == 0 and timeout != 0:
+                self.__reception_signal.wait_for(
+                    lambda: len(packet_queue) > 0 or not self.is_open(), timeout
+                )
+            self.__reception_signal.reset()
+            datagrams = packet_queue.pop_all(max_packets)
+            if len(packet_queue) > 0:
+                self.__reception_signal.notify()
+        else:
+            udp_socket = self.udp_socket
+            if udp_socket is None:
+                return []
+            if timeout != 0:
+                select.select([udp_socket], [], [], timeout)
+            datagrams = self.__read_socket(udp_socket, max_packets)
+        self._metrics.packets_delivered(len(datagrams))
+        if self._hooks is not None and datagrams:
+            self._hooks.emit(self, HookEvent.PACKETS_DELIVERED, [packet for packet, _ in datagrams])
+        return datagrams
+
+    def _tag_datagrams(
+        self, datagrams: list[tuple[bytearray, tuple | None]]
+    ) -> list[tuple[bytearray, Any]]:
+        """Called with every batch of datagrams read from the socket. Returns the datagrams
+        together with the source which is stored and returned by :py:meth:`_receive_datagrams`.
+        """
+        return datagrams
+
+    def _metric_gauges(self) -> dict[str, int]:
+        return {"rx_queue_depth": len(self._packet_queue)}
+
+    def __reception_task(self, udp_socket: socket.socket, wakeup_recv: socket.socket) -> None:
+        with selectors.DefaultSelector() as selector, wakeup_recv:
+            selector.register(udp_socket, selectors.EVENT_READ)
+            selector.register(wakeup_recv, selectors.EVENT_READ)
+            while not self.__reception_shutdown.is_set():
+                for key, _ in selector.select():
+                    if key.fileobj is udp_socket:
+                        self.__drain_socket(udp_socket)
+
+    def __drain_socket(self, udp_socket: socket.socket) -> None:
+        datagrams = self.__read_socket(udp_socket, None)
+        if not datagrams:
+            return
+        if self._packet_callback is not None:
+            self._deliver_to_callback([packet for packet, _ in datagrams])
+            return
+        packet_queue = self._packet_queue
+        dropped_count = packet_queue.dropped_count
+        # The hub thread serves all attached interfaces, so it does not wait for space.
+        timeout = 0.0 if self.__hub is not None else None
+        for datagram in datagrams:
+            packet_queue.put(datagram, timeout)
+        self._metrics.dropped_packets += packet_queue.dropped_count - dropped_count
+        self.__reception_signal.notify()
+
+    def __read_socket(
+        self, udp_socket: socket.socket, max_packets: int | None
+    ) -> list[tuple[bytearray, Any]]:
+        try:
+            datagrams = self._receiver.receive(udp_socket, max_packets)
+        except ConnectionResetError:
+            _LOGGER.warning("Connection reset exception occured!")
+            return []
+        if not datagrams:
+            return []
+        metrics = self._metrics
+        metrics.bytes_received(sum(len(packet) for packet, _ in datagrams))
+        metrics.packets_received(len(datagrams))
+        hooks = self._hooks
+        if hooks is not None:
+            # Every datagram contains exactly one packet.
+            for packet, _ in datagrams:
+                hooks.emit(self, HookEvent.BYTES_RECEIVED, bytes(packet))
+            hooks.emit(self, HookEvent.FRAMES_DECODED, [packet for packet, _ in datagrams])
+        return self._tag_datagrams(datagrams)
+
+    def __queued_reception(self) -> bool:
+        return self.threaded_reception or self.__hub is not None
+
+
+class UdpClient(_UdpSocketComIF):
+    """Communication interface for UDP communication.
+
+    By default, the socket is only read when :py:meth:`receive` is called. If threaded reception
+    is enabled, a separate thread is spun up on the :py:meth:`open` call which permanently drains
+    the socket into a :py:class:`com_interface.packet_queue.BoundedPacketQueue`. This prevents
+    datagrams from being dropped by the OS if the application does not call :py:meth:`receive`
+    often enough. If the interface is driven by a :py:class:`com_interface.hub.ComHub`, the hub
+    drains the socket into the same queue instead of a separate thread.
+    """
+
+    def __init__(
+        self,
+        com_if_id: str,
+        send_address: EthAddr,
+        recv_addr: None | EthAddr = None,
+        max_recv_size: int = DEFAULT_UDP_RECV_SIZE,
+        use_mmsg: bool = True,
+        threaded_reception: bool = False,
+        max_packets_stored: int | None = None,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        recv_buf_size: int | None = None,
+    ):
+        """Initialize a communication interface to send and receive UDP datagrams.
+
+        :param send_address:
+        :param recv_addr:
+        :param max_recv_size: Maximum size of received datagrams. Larger datagrams are truncated.
+        :param use_mmsg: Receive datagrams in batches with the ``recvmmsg`` system call and
+            send them with the ``sendmmsg`` system call if these are available.
+        :param threaded_reception: Drain the socket permanently with a separate reception thread.
+        :param max_packets_stored: Maximum number of packets stored by the reception thread.
+            None for no limit.
+        :param overflow_policy: Determines what happens when the reception thread receives a
+            packet while the maximum number of packets is stored. The hub can not be blocked by
+            one interface, so it discards new packets for the :py:attr:`OverflowPolicy.BLOCK`
+            policy.
+        :param recv_buf_size: Size of the socket reception buffer (``SO_RCVBUF``). The OS default
+            is used if this is None.
+        """
+        super().__init__(
+            com_if_id,
+            max_recv_size,
+            use_mmsg,
+            with_addresses=False,
+            threaded_reception=threaded_reception,
+            max_packets_stored=max_packets_stored,
+            overflow_policy=overflow_policy,
+            recv_buf_size=recv_buf_size,
+        )
+        self.send_address = send_address
+        self.recv_addr = recv_addr
+        self.__resolved_send_addr: tuple | None = None
+
     def open(self, args: Any = None) -> None:
         self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         # Bind is possible but should not be necessary, and introduces risk of port already
@@ -57,38 +384,284 @@ class UdpClient(ComInterface):
                 f"Binding UDP socket to {self.recv_addr.ip_addr} and port {self.recv_addr.port}"
             )
             self.udp_socket.bind(self.recv_addr.to_tuple)
-        # Set non-blocking because we use select
-        self.udp_socket.setblocking(False)
-
-    def is_open(self) -> bool:
-        return self.udp_socket is not None
-
-    def close(self, args: any | None = None) -> None:
-        if self.udp_socket is not None:
-            self.udp_socket.close()
+        self._start_reception()
 
     def send(self, data: bytes | bytearray) -> None:
         if self.udp_socket is None:
             return
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
         bytes_sent = self.udp_socket.sendto(data, self.send_address.to_tuple)
+        self._metrics.packets_sent(1, bytes_sent)
         if bytes_sent != len(data):
             _LOGGER.warning("Not all bytes were sent!")
 
-    def packets_available(self, parameters: Any = 0) -> bool:
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Send every packet as a separate datagram. On Linux, all datagrams are sent with the
+        ``sendmmsg`` system call."""
         if self.udp_socket is None:
-            return False
-        ready = select.select([self.udp_socket], [], [], 0)
-        return bool(ready[0])
+            return
+        if not self.use_sendmmsg:
+            super().send_many(packets)
+            return
+        if self.__resolved_send_addr is None:
+            # sendmmsg requires a numeric address.
+            self.__resolved_send_addr = socket.getaddrinfo(
+                *self.send_address.to_tuple, self.udp_socket.family, socket.SOCK_DGRAM
+            )[0][4]
+        packets = list(packets)
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        sendmmsg(self.udp_socket, packets, self.__resolved_send_addr)
+        self._metrics.packets_sent(len(packets), sum(len(packet) for packet in packets))
 
-    def receive(self, parameter: Any = 0) -> list[bytes]:
-        packet_list = []
-        if self.udp_socket is None:
-            return packet_list
+    def receive(
+        self, parameter: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        """Receives the datagrams which are available. Without threaded reception, this waits
+        for the socket to become readable if no datagram is available and a timeout is given."""
+        return [packet for packet, _ in self._receive_datagrams(max_packets, timeout)]
+
+
+class _Peer:
+    def __init__(self, address: EthAddr, last_seen: float):
+        self.address = address
+        self.last_seen = last_seen
+
+
+class UdpServer(_UdpSocketComIF):
+    """Communication interface for the server side of UDP communication, which serves many
+    peers with one socket.
+
+    Every peer which sent a datagram is tracked in a peer table and removed once it was silent
+    for longer than the peer timeout. The peer table is kept when the interface is closed.
+    :py:meth:`receive_from` returns the received packets together with the address of their
+    peer. :py:meth:`send` sends a packet to all known peers, and :py:meth:`send_to` sends it to
+    one address. The socket can also join IP multicast groups to receive the packets which are
+    distributed to them.
+
+    The socket is read like the socket of the :py:class:`UdpClient`, either by a receive call, by
+    a separate reception thread or by a :py:class:`com_interface.hub.ComHub`.
+    """
+
+    def __init__(
+        self,
+        com_if_id: str,
+        bind_address: EthAddr,
+        peer_timeout: float | None = 60.0,
+        multicast_groups: Sequence[str] = (),
+        max_recv_size: int = DEFAULT_UDP_RECV_SIZE,
+        use_mmsg: bool = True,
+        threaded_reception: bool = False,
+        max_packets_stored: int | None = None,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        recv_buf_size: int | None = None,
+    ):
+        """
+        :param bind_address: Address the socket is bound to. Port 0 lets the OS assign a port,
+            see :py:attr:`address`.
+        :param peer_timeout: Time in seconds after which a silent peer is removed from the peer
+            table. None to keep all peers.
+        :param multicast_groups: IPv4 multicast groups which are joined when the interface is
+            opened, see :py:meth:`join_group`. The socket address can then be shared by multiple
+            receivers.
+        :param max_recv_size: Maximum size of received datagrams. Larger datagrams are truncated.
+        :param use_mmsg: Receive and send datagrams in batches with the ``recvmmsg`` and
+            ``sendmmsg`` system calls if these are available.
+        :param threaded_reception: Drain the socket permanently with a separate reception thread.
+        :param max_packets_stored: Maximum number of packets stored by the reception thread.
+            None for no limit.
+        :param overflow_policy: Determines what happens when the reception thread receives a
+            packet while the maximum number of packets is stored. The hub can not be blocked by
+            one interface, so it discards new packets for the :py:attr:`OverflowPolicy.BLOCK`
+            policy.
+        :param recv_buf_size: Size of the socket reception buffer (``SO_RCVBUF``). The OS default
+            is used if this is None.
+        """
+        super().__init__(
+            com_if_id,
+            max_recv_size,
+            use_mmsg,
+            with_addresses=True,
+            threaded_reception=threaded_reception,
+            max_packets_stored=max_packets_stored,
+            overflow_policy=overflow_policy,
+            recv_buf_size=recv_buf_size,
+        )
+        self.bind_address = bind_address
+        self.peer_timeout = peer_timeout
+        # Joined multicast groups and the address of the network interface which joined them.
+        self.__groups: dict[str, str | None] = dict.fromkeys(multicast_groups)
+        # Peers by their address tuple. Written by the receiving thread, protected by the lock.
+        self.__peers: dict[tuple, _Peer] = {}
+        self.__peer_lock = threading.Lock()
+        self.__next_expiry = 0.0
+
+    def open(self, args: Any = None) -> None:
+        """Bind the socket and join the multicast groups.
+
+        :raises OSError: The address can not be bound or a group can not be joined.
+        """
+        if self.udp_socket is not None:
+            return
+        udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         try:
-            while self.packets_available() > 0:
-                data, sender_addr = self.udp_socket.recvfrom(4096)
-                packet_list.append(bytearray(data))
-            return packet_list
-        except ConnectionResetError:
-            _LOGGER.warning("Connection reset exception occured!")
-            return []
+            if self.__groups:
+                # Multiple receivers of a multicast group bind the same address.
+                udp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            udp_socket.bind(self.bind_address.to_tuple)
+            for group, interface in self.__groups.items():
+                _set_membership(udp_socket, socket.IP_ADD_MEMBERSHIP, group, interface)
+        except OSError:
+            udp_socket.close()
+            raise
+        self.udp_socket = udp_socket
+        self._start_reception()
+
+    @property
+    def address(self) -> EthAddr | None:
+        """Address the socket is bound to, None if the interface is not open."""
+        if self.udp_socket is None:
+            return None
+        return EthAddr.from_tuple(self.udp_socket.getsockname())
+
+    def join_group(self, group: str, interface: str | None = None) -> None:
+        """Join an IPv4 multicast group, so the datagrams sent to the group and the port of the
+        bound address are received. The group is joined again when the interface is reopened.
+
+        :param interface: Address of the local network interface which joins the group. None to
+            let the OS choose the interface.
+        """
+        if group in self.__groups:
+            return
+        if self.udp_socket is not None:
+            _set_membership(self.udp_socket, socket.IP_ADD_MEMBERSHIP, group, interface)
+        self.__groups[group] = interface
+
+    def leave_group(self, group: str) -> None:
+        """Leave an IPv4 multicast group which was joined before."""
+        interface = self.__groups.pop(group, None)
+        if self.udp_socket is not None:
+            _set_membership(self.udp_socket, socket.IP_DROP_MEMBERSHIP, group, interface)
+
+    @property
+    def multicast_groups(self) -> list[str]:
+        """Joined IPv4 multicast groups."""
+        return list(self.__groups)
+
+    @property
+    def peers(self) -> list[EthAddr]:
+        """Addresses of the peers which sent datagrams and did not expire yet."""
+        self.__expire_peers(force=True)
+        with self.__peer_lock:
+            return [peer.address for peer in self.__peers.values()]
+
+    def remove_peer(self, peer: EthAddr) -> None:
+        """Remove a peer from the peer table, it is added again once it sends a datagram."""
+        with self.__peer_lock:
+            self.__peers.pop(peer.to_tuple, None)
+
+    def send(self, data: bytes | bytearray) -> None:
+        """Send a packet to all peers. On Linux, all datagrams are sent with the ``sendmmsg``
+        system call."""
+        self.send_many([data])
+
+    def send_many(self, packets: Iterable[bytes | bytearray]) -> None:
+        """Send every packet as a separate datagram to all peers. Nothing is sent if there are
+        no peers."""
+        if self.udp_socket is None:
+            return
+        packets = list(packets)
+        self.__expire_peers()
+        with self.__peer_lock:
+            targets = list(self.__peers)
+        if not targets or not packets:
+            return
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, packets)
+        if self.use_sendmmsg:
+            sendmmsg_to(
+                self.udp_socket, [(packet, target) for target in targets for packet in packets]
+            )
+        else:
+            for target in targets:
+                for packet in packets:
+                    self.udp_socket.sendto(packet, target)
+        self._metrics.packets_sent(
+            len(targets) * len(packets), len(targets) * sum(len(packet) for packet in packets)
+        )
+
+    def send_to(self, peer: EthAddr, data: bytes | bytearray) -> None:
+        """Send a packet to one address, which does not have to be in the peer table. This can
+        also be a multicast group."""
+        if self.udp_socket is None:
+            return
+        if self._hooks is not None:
+            self._hooks.emit(self, HookEvent.PACKETS_SENT, [data])
+        bytes_sent = self.udp_socket.sendto(data, peer.to_tuple)
+        self._metrics.packets_sent(1, bytes_sent)
+
+    def receive(
+        self, parameter: Any = 0, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[bytes]:
+        """Return the packets of all peers, see :py:meth:`receive_from`."""
+        return [packet for packet, _ in self._receive_datagrams(max_packets, timeout)]
+
+    def receive_from(
+        self, max_packets: int | None = None, timeout: float | None = 0.0
+    ) -> list[tuple[EthAddr, bytes]]:
+        """Return the received packets together with the address of their peer. Without threaded
+        reception, this waits for the socket to become readable if no datagram is available and a
+        timeout is given.
+
+        :param max_packets: Maximum number of returned packets. None to return all packets.
+        :param timeout: Maximum time in seconds to wait for packets if none are available. None
+            to wait until packets arrive or the interface is closed.
+        """
+        return [(peer, packet) for packet, peer in self._receive_datagrams(max_packets, timeout)]
+
+    def _tag_datagrams(
+        self, datagrams: list[tuple[bytearray, tuple | None]]
+    ) -> list[tuple[bytearray, EthAddr]]:
+        """Update the peer table and tag the datagrams with the address of their peer."""
+        now = time.monotonic()
+        tagged = []
+        with self.__peer_lock:
+            peers = self.__peers
+            for packet, addr in datagrams:
+                assert addr is not None
+                peer = peers.get(addr)
+                if peer is None:
+                    peer = peers[addr] = _Peer(EthAddr.from_tuple(addr), now)
+                else:
+                    peer.last_seen = now
+                tagged.append((packet, peer.address))
+        return tagged
+
+    def _metric_gauges(self) -> dict[str, int]:
+        return {**super()._metric_gauges(), "peers": len(self.__peers)}
+
+    def __expire_peers(self, force: bool = False) -> None:
+        """Remove the silent peers. Without force, the peer table is only scanned a few times
+        per peer timeout, so sending to many peers stays cheap."""
+        if self.peer_timeout is None:
+            return
+        now = time.monotonic()
+        if not force and now < self.__next_expiry:
+            return
+        self.__next_expiry = now + self.peer_timeout / 8
+        oldest = now - self.peer_timeout
+        with self.__peer_lock:
+            expired = [addr for addr, peer in self.__peers.items() if peer.last_seen < oldest]
+            for addr in expired:
+                del self.__peers[addr]
+
+
+def _set_membership(
+    udp_socket: socket.socket, option: int, group: str, interface: str | None
+) -> None:
+    if interface is None:
+        membership = struct.pack("=4sL", socket.inet_aton(group), socket.INADDR_ANY)
+    else:
+        membership = socket.inet_aton(group) + socket.inet_aton(interface)
+    udp_socket.setsockopt(socket.IPPROTO_IP, option, membership)
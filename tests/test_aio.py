@@ -0,0 +1,161 @@
+import asyncio
+import os
+import socket
+import sys
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from cobs import cobs
+from dle_encoder import DleEncoder
+from spacepackets import PacketType
+from spacepackets.ccsds import PacketId
+from spacepackets.ecss import PusTelemetry
+
+from com_interface.aio.serial_cobs import AsyncSerialCobsComIF
+from com_interface.aio.serial_dle import AsyncSerialDleComIF
+from com_interface.aio.tcp import AsyncTcpSpacepacketsClient
+from com_interface.aio.udp import AsyncUdpClient
+from com_interface.ip_utils import EthAddr
+from com_interface.serial_base import SerialCfg
+
+try:
+    import pty
+except ImportError:
+    # pty only works on POSIX systems, the tests which need it are skipped on other systems.
+    pty = None
+
+LOCALHOST = "127.0.0.1"
+
+
+class TestAsyncUdp(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.udp_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_server.bind((LOCALHOST, 0))
+        self.udp_client = AsyncUdpClient(
+            "udp", send_address=EthAddr.from_tuple(self.udp_server.getsockname())
+        )
+        await self.udp_client.open()
+
+    async def test_send_recv(self):
+        self.assertTrue(self.udp_client.is_open())
+        self.assertEqual(self.udp_client.id, "udp")
+        data = bytes([0, 1, 2, 3])
+        await self.udp_client.send(data)
+        data_recv, sender_addr = self.udp_server.recvfrom(4096)
+        self.assertEqual(data_recv, data)
+        self.udp_server.sendto(data, sender_addr)
+        self.assertEqual(await self.udp_client.wait_packets(1.0), 1)
+        self.assertEqual(await self.udp_client.receive(), [data])
+        self.assertEqual(self.udp_client.packets_available(), 0)
+
+    async def test_async_iterator(self):
+        await self.udp_client.send(bytes([0]))
+        _, sender_addr = self.udp_server.recvfrom(4096)
+        for idx in range(3):
+            self.udp_server.sendto(bytes([idx]), sender_addr)
+        packets = []
+        async for packet in self.udp_client:
+            packets.append(packet)
+            if len(packets) == 3:
+                await self.udp_client.close()
+        self.assertEqual(packets, [bytes([0]), bytes([1]), bytes([2])])
+
+    async def asyncTearDown(self) -> None:
+        await self.udp_client.close()
+        self.udp_server.close()
+
+
+class TestAsyncTcp(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.server = await asyncio.start_server(self._echo, LOCALHOST, 0)
+        addr = self.server.sockets[0].getsockname()
+        self.tcp_client = AsyncTcpSpacepacketsClient(
+            "tcp",
+            space_packet_ids=[PacketId(apid=0x22, sec_header_flag=True, ptype=PacketType.TM)],
+            target_address=EthAddr.from_tuple(addr),
+        )
+        await self.tcp_client.open()
+
+    async def _echo(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        while True:
+            data = await reader.read(4096)
+            # A trailing 0xff byte asks the server to close the connection.
+            if not data or data.endswith(b"\xff"):
+                writer.write(data[:-1])
+                break
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    async def test_echo(self):
+        ping_reply = PusTelemetry(service=17, subservice=2, apid=0x22, timestamp=b"").pack()
+        other_packet = PusTelemetry(service=17, subservice=2, apid=0x40, timestamp=b"").pack()
+        # Split the packets to check the stream reassembly.
+        await self.tcp_client.send(ping_reply[:5])
+        await asyncio.sleep(0.05)
+        await self.tcp_client.send(ping_reply[5:] + other_packet + ping_reply)
+        packets = []
+        while len(packets) < 2:
+            self.assertGreater(await self.tcp_client.wait_packets(1.0), 0)
+            packets.extend(await self.tcp_client.receive())
+        self.assertEqual(packets, [ping_reply, ping_reply])
+
+    async def test_peer_closes_connection(self):
+        ping_reply = PusTelemetry(service=17, subservice=2, apid=0x22, timestamp=b"").pack()
+        await self.tcp_client.send(ping_reply + b"\xff")
+        # The server closes the connection after echoing the packet. The iterator still returns
+        # the stored packet and ends once the interface was closed.
+        packets = await asyncio.wait_for(self._collect(), 2.0)
+        self.assertEqual(packets, [ping_reply])
+        self.assertFalse(self.tcp_client.is_open())
+        self.assertEqual(await self.tcp_client.wait_packets(), 0)
+
+    async def _collect(self) -> list[bytes]:
+        return [packet async for packet in self.tcp_client]
+
+    async def asyncTearDown(self) -> None:
+        await self.tcp_client.close()
+        self.assertFalse(self.tcp_client.is_open())
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "pty only works on POSIX systems")
+class TestAsyncSerial(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.pty_master, self.pty_slave = pty.openpty()
+        self.ser_cfg = SerialCfg(
+            com_if_id="pseudo_ser", serial_port=os.ttyname(self.pty_slave), baud_rate=9600
+        )
+
+    async def test_cobs(self):
+        com_if = AsyncSerialCobsComIF(self.ser_cfg)
+        await com_if.open()
+        test_data = bytes([0x01, 0x00, 0x03])
+        await com_if.send(test_data)
+        encoded = os.read(self.pty_master, 64)
+        self.assertEqual(cobs.decode(encoded[1:-1]), test_data)
+        os.write(self.pty_master, encoded + encoded)
+        packets = []
+        while len(packets) < 2:
+            self.assertGreater(await com_if.wait_packets(1.0), 0)
+            packets.extend(await com_if.receive())
+        self.assertEqual(packets, [test_data, test_data])
+        await com_if.close()
+        self.assertFalse(com_if.is_open())
+
+    async def test_dle(self):
+        com_if = AsyncSerialDleComIF(self.ser_cfg, None)
+        await com_if.open()
+        test_data = bytes([0x02, 0x10, 0x03])
+        await com_if.send(test_data)
+        encoded = os.read(self.pty_master, 64)
+        self.assertEqual(encoded, DleEncoder().encode(test_data))
+        os.write(self.pty_master, encoded)
+        self.assertEqual(await com_if.wait_packets(1.0), 1)
+        self.assertEqual(await com_if.receive(), [test_data])
+        await com_if.close()
+
+    async def asyncTearDown(self) -> None:
+        os.close(self.pty_master)
+        os.close(self.pty_slave)
@@ -0,0 +1,213 @@
+import io
+import os
+import select
+import socket
+import tempfile
+import time
+from contextlib import closing
+from pathlib import Path
+from unittest import TestCase
+
+from com_interface.capture import (
+    CaptureComIF,
+    CaptureDirection,
+    CaptureFormatError,
+    CaptureReader,
+    CaptureRecord,
+    CaptureWriter,
+    ReplayComIF,
+)
+from com_interface.ip_utils import EthAddr
+from com_interface.udp import UdpClient
+
+LOCALHOST = "127.0.0.1"
+
+
+class TestCaptureFile(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "session.cap"
+
+    def test_round_trip(self):
+        with closing(CaptureWriter(self.path)) as writer:
+            writer.write(CaptureDirection.RX, "tcp", b"\x01\x02", 1000)
+            writer.write(CaptureDirection.TX, "udp", bytearray(b"\x03"), 2000)
+        # Records are appended to an existing file.
+        with closing(CaptureWriter(self.path)) as writer:
+            writer.write(CaptureDirection.RX, "tcp", b"", 3000)
+        with closing(CaptureReader(self.path)) as reader:
+            self.assertEqual(
+                list(reader),
+                [
+                    CaptureRecord(1000, CaptureDirection.RX, "tcp", b"\x01\x02"),
+                    CaptureRecord(2000, CaptureDirection.TX, "udp", b"\x03"),
+                    CaptureRecord(3000, CaptureDirection.RX, "tcp", b""),
+                ],
+            )
+
+    def test_scan(self):
+        with closing(CaptureWriter(self.path)) as writer:
+            writer.write(CaptureDirection.RX, "tcp", b"\x01\x02", 1000)
+            writer.write(CaptureDirection.TX, "udp", b"\x03", 2000)
+        with closing(CaptureReader(self.path)) as reader:
+            headers = list(reader.scan())
+            self.assertEqual(
+                [header[2:] for header in headers],
+                [(1000, CaptureDirection.RX, "tcp"), (2000, CaptureDirection.TX, "udp")],
+            )
+            # The scan can be resumed at the offset of the next record.
+            self.assertEqual(list(reader.scan(headers[0][1])), headers[1:])
+            self.assertEqual(
+                [reader.read_payload(start, end) for start, end, *_ in headers],
+                [b"\x01\x02", b"\x03"],
+            )
+
+    def test_truncated_record(self):
+        with closing(CaptureWriter(self.path)) as writer:
+            writer.write(CaptureDirection.RX, "tcp", b"\x01\x02", 1000)
+            writer.write(CaptureDirection.RX, "tcp", b"\x03\x04", 2000)
+        os.truncate(self.path, self.path.stat().st_size - 1)
+        with closing(CaptureReader(self.path)) as reader, self.assertLogs("com_interface.capture"):
+            self.assertEqual([record.payload for record in reader], [b"\x01\x02"])
+
+    def test_invalid_file(self):
+        self.path.write_bytes(b"not a capture file")
+        with self.assertRaises(CaptureFormatError):
+            CaptureReader(self.path)
+        with self.assertRaises(CaptureFormatError):
+            CaptureWriter(self.path)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+
+class TestCaptureComIF(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "session.cap"
+        self.udp_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_server.bind((LOCALHOST, 0))
+        self.writer = CaptureWriter(self.path)
+        self.com_if = CaptureComIF(
+            UdpClient("udp", send_address=EthAddr.from_tuple(self.udp_server.getsockname())),
+            self.writer,
+        )
+
+    def test_recording(self):
+        self.com_if.open()
+        self.com_if.send_many([b"\x01", b"\x02"])
+        sender_addr = None
+        for _ in range(2):
+            _, sender_addr = self.udp_server.recvfrom(4096)
+        self.udp_server.sendto(b"\x03\x04", sender_addr)
+        time.sleep(0.05)
+        self.assertEqual(self.com_if.receive(), [b"\x03\x04"])
+        self.assertEqual(self.com_if.metrics.rx_packets, 1)
+        self.com_if.close()
+        with closing(CaptureReader(self.path)) as reader:
+            records = list(reader)
+        self.assertEqual(
+            [(record.direction, record.com_if_id, record.payload) for record in records],
+            [
+                (CaptureDirection.TX, "udp", b"\x01"),
+                (CaptureDirection.TX, "udp", b"\x02"),
+                (CaptureDirection.RX, "udp", b"\x03\x04"),
+            ],
+        )
+        self.assertLessEqual(records[0].timestamp_ns, records[2].timestamp_ns)
+
+    def tearDown(self) -> None:
+        self.com_if.close()
+        self.writer.close()
+        self.udp_server.close()
+        self.tmp_dir.cleanup()
+
+
+class TestReplayComIF(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "session.cap"
+        with closing(CaptureWriter(self.path)) as writer:
+            for idx in range(10):
+                writer.write(CaptureDirection.RX, "tcp", bytes([idx]), idx * 1_000_000_000)
+                writer.write(CaptureDirection.TX, "tcp", b"\xff", idx * 1_000_000_000)
+            writer.write(CaptureDirection.RX, "udp", b"\xee", 0)
+
+    def test_fast_replay(self):
+        replay = ReplayComIF(self.path, source_id="tcp", max_packets_per_receive=4)
+        self.assertEqual(replay.receive(), [])
+        replay.open()
+        self.assertEqual(replay.packets_available(), 4)
+        self.assertEqual(replay.receive(), [bytes([idx]) for idx in range(4)])
+        self.assertEqual(replay.receive(), [bytes([idx]) for idx in range(4, 8)])
+        self.assertFalse(replay.finished)
+        self.assertEqual(replay.receive(), [b"\x08", b"\x09"])
+        self.assertTrue(replay.finished)
+        self.assertEqual(replay.receive(), [])
+        self.assertEqual(replay.metrics.delivered_packets, 10)
+        # Opening the interface again restarts the replay.
+        replay.open()
+        self.assertEqual(replay.packets_available(), 4)
+        replay.close()
+
+    def test_peek_before_receive(self):
+        # Checking for packets does not consume them or end the replay.
+        replay = ReplayComIF(self.path, source_id="tcp")
+        replay.open()
+        self.assertEqual(replay.packets_available(), 10)
+        self.assertFalse(replay.finished)
+        self.assertEqual(replay.receive(), [bytes([idx]) for idx in range(10)])
+        self.assertTrue(replay.finished)
+        replay.close()
+        paced = ReplayComIF(self.path, source_id="tcp", speed=20.0)
+        paced.open()
+        self.assertEqual(paced.packets_available(), 1)
+        self.assertEqual(paced.packets_available(), 1)
+        self.assertEqual(paced.receive(), [b"\x00"])
+        self.assertEqual(paced.packets_available(), 0)
+        paced.close()
+
+    def test_fileno(self):
+        replay = ReplayComIF(self.path, source_id="tcp", max_packets_per_receive=8)
+        replay.open()
+        self.assertEqual(select.select([replay], [], [], 0)[0], [replay])
+        self.assertEqual(len(replay.receive()), 8)
+        self.assertEqual(select.select([replay], [], [], 0)[0], [replay])
+        self.assertEqual(len(replay.receive()), 2)
+        self.assertEqual(select.select([replay], [], [], 0)[0], [])
+        replay.close()
+        with self.assertRaises(io.UnsupportedOperation):
+            ReplayComIF(self.path, speed=1.0).fileno()
+
+    def test_all_sources(self):
+        replay = ReplayComIF(self.path)
+        replay.open()
+        self.assertEqual(len(replay.receive()), 11)
+        replay.close()
+
+    def test_paced_replay(self):
+        # The packets are recorded 1 s apart, so they are replayed 50 ms apart.
+        replay = ReplayComIF(self.path, source_id="tcp", speed=20.0)
+        replay.open()
+        self.assertEqual(replay.receive(), [b"\x00"])
+        self.assertEqual(replay.packets_available(), 0)
+        time.sleep(0.125)
+        self.assertEqual(replay.receive(), [b"\x01", b"\x02"])
+        time.sleep(0.4)
+        self.assertEqual(len(replay.receive()), 7)
+        self.assertTrue(replay.finished)
+        replay.close()
+
+    def test_blocking_replay(self):
+        replay = ReplayComIF(self.path, source_id="tcp", speed=20.0)
+        replay.open()
+        self.assertEqual(replay.receive(max_packets=1), [b"\x00"])
+        start = time.perf_counter()
+        # The next packet is due 50 ms after opening the interface.
+        self.assertEqual(replay.receive(max_packets=1, timeout=1.0), [b"\x01"])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.03)
+        self.assertEqual(replay.receive(timeout=0.001), [])
+        replay.close()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
@@ -0,0 +1,104 @@
+import random
+from unittest import TestCase
+
+from cobs import cobs
+from spacepackets import PacketType
+from spacepackets.ccsds import PacketId
+from spacepackets.ecss import PusTelemetry
+
+from com_interface.framing import (
+    CobsFramer,
+    DleFramer,
+    FixedSizeFramer,
+    Framer,
+    LengthPrefixFramer,
+    SpacePacketFramer,
+)
+
+
+def feed_in_chunks(framer: Framer, data: bytes, rng: random.Random) -> list:
+    frames = []
+    idx = 0
+    while idx < len(data):
+        chunk_len = rng.randint(1, 40)
+        frames.extend(framer.feed(memoryview(data)[idx : idx + chunk_len]))
+        idx += chunk_len
+    return frames
+
+
+class TestFramers(TestCase):
+    def setUp(self) -> None:
+        self.rng = random.Random(0x1234)
+        self.payloads = [
+            bytes(self.rng.randint(0, 255) for _ in range(self.rng.randint(1, 100)))
+            for _ in range(100)
+        ]
+
+    def _test_roundtrip(self, framer: Framer, payloads: list):
+        stream = bytes(framer.encode_many(payloads))
+        self.assertEqual(stream, b"".join(bytes(framer.encode(p)) for p in payloads))
+        self.assertEqual(feed_in_chunks(framer, stream, self.rng), payloads)
+        self.assertEqual(framer.feed(stream), payloads)
+
+    def test_cobs(self):
+        framer = CobsFramer()
+        self._test_roundtrip(framer, self.payloads)
+        self.assertEqual(
+            framer.encode(bytes([1, 0, 2])), b"\x00" + cobs.encode(b"\x01\x00\x02") + b"\x00"
+        )
+        self.assertEqual(framer.parsing_error_count, 0)
+
+    def test_dle(self):
+        for escape_cr in (False, True):
+            framer = DleFramer(escape_cr=escape_cr)
+            self._test_roundtrip(framer, self.payloads)
+            self.assertEqual(framer.parsing_error_count, 0)
+            self.assertEqual(framer.dropped_frame_count, 0)
+
+    def test_space_packets(self):
+        packet_id = PacketId(apid=0x22, sec_header_flag=True, ptype=PacketType.TM)
+        framer = SpacePacketFramer([packet_id])
+        packets = [
+            PusTelemetry(
+                service=17, subservice=2, apid=0x22, timestamp=b"", source_data=payload
+            ).pack()
+            for payload in self.payloads
+        ]
+        self._test_roundtrip(framer, packets)
+        # Bytes which do not belong to a known packet are skipped. Only the first skipped range
+        # is logged as a warning, all of them are counted.
+        with self.assertLogs("com_interface.framing", "WARNING") as logs:
+            self.assertEqual(framer.feed(bytes([1, 2, 3]) + packets[0] + packets[1]), packets[:2])
+            self.assertEqual(framer.feed(bytes([4]) + packets[0]), packets[:1])
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(framer.skipped_byte_count, 4)
+        self.assertEqual(framer.parsing_error_count, 2)
+
+    def test_length_prefix(self):
+        for prefix_size in (1, 2, 4):
+            for byte_order in ("big", "little"):
+                framer = LengthPrefixFramer(prefix_size, byte_order)
+                self._test_roundtrip(framer, self.payloads)
+        framer = LengthPrefixFramer(2, "little")
+        self.assertEqual(framer.encode(b"\x01\x02\x03"), b"\x03\x00\x01\x02\x03")
+        self.assertEqual(framer.feed(b"\x00\x00"), [b""])
+        with self.assertRaises(ValueError):
+            LengthPrefixFramer(1).encode(bytes(256))
+        with self.assertRaises(ValueError):
+            LengthPrefixFramer(3)
+
+    def test_length_prefix_max_frame(self):
+        framer = LengthPrefixFramer(2, max_frame=10)
+        self.assertEqual(framer.feed(b"\x00\x20" + bytes(4)), [])
+        self.assertEqual(framer.parsing_error_count, 1)
+        self.assertEqual(framer.feed(b"\x00\x02\x05\x06"), [b"\x05\x06"])
+
+    def test_fixed_size(self):
+        framer = FixedSizeFramer(8)
+        payloads = [bytes([idx]) * 8 for idx in range(50)]
+        self._test_roundtrip(framer, payloads)
+        with self.assertRaises(ValueError):
+            framer.encode(bytes(7))
+        self.assertEqual(framer.feed(bytes(12)), [bytes(8)])
+        framer.clear()
+        self.assertEqual(framer.feed(bytes(8)), [bytes(8)])
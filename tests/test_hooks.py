@@ -0,0 +1,115 @@
+import socket
+import threading
+import time
+from unittest import TestCase
+
+from com_interface.hooks import HookDispatcher, HookEvent, QueuedHook
+from com_interface.ip_utils import EthAddr
+from com_interface.udp import UdpClient
+
+LOCALHOST = "127.0.0.1"
+
+
+class TestHookDispatcher(TestCase):
+    def setUp(self) -> None:
+        self.events = []
+        self.dispatcher = HookDispatcher()
+
+    def hook(self, com_if, event, timestamp_ns, data):
+        self.events.append((com_if, event, timestamp_ns, data))
+
+    def test_event_filter(self):
+        self.dispatcher.add(self.hook, {HookEvent.PACKETS_SENT})
+        self.dispatcher.emit(None, HookEvent.BYTES_RECEIVED, b"\x01")
+        self.dispatcher.emit(None, HookEvent.PACKETS_SENT, [b"\x02"])
+        self.assertEqual(len(self.events), 1)
+        _, event, timestamp_ns, data = self.events[0]
+        self.assertEqual(event, HookEvent.PACKETS_SENT)
+        self.assertGreater(timestamp_ns, 0)
+        self.assertEqual(data, [b"\x02"])
+
+    def test_no_events(self):
+        self.dispatcher.add(self.hook, ())
+        self.dispatcher.emit(None, HookEvent.PACKETS_SENT, [b"\x02"])
+        self.assertEqual(self.events, [])
+
+    def test_remove(self):
+        self.dispatcher.add(self.hook)
+        self.assertEqual(len(self.dispatcher), 1)
+        self.assertTrue(self.dispatcher.remove(self.hook))
+        self.assertFalse(self.dispatcher.remove(self.hook))
+        self.dispatcher.emit(None, HookEvent.PACKETS_SENT, [])
+        self.assertEqual(self.events, [])
+
+    def test_failing_hook_is_logged(self):
+        def failing_hook(com_if, event, timestamp_ns, data):
+            raise ValueError("hook failure")
+
+        self.dispatcher.add(failing_hook)
+        self.dispatcher.add(self.hook)
+        with self.assertLogs("com_interface.hooks", "ERROR"):
+            self.dispatcher.emit(None, HookEvent.PACKETS_SENT, [])
+        # The following hooks are still called.
+        self.assertEqual(len(self.events), 1)
+
+
+class TestQueuedHook(TestCase):
+    def test_worker_thread(self):
+        calls = []
+        release = threading.Event()
+
+        def slow_hook(com_if, event, timestamp_ns, data):
+            release.wait(1.0)
+            calls.append((threading.current_thread(), data))
+
+        queued_hook = QueuedHook(slow_hook, maxsize=2)
+        # The first event is taken by the worker, the next two are queued.
+        queued_hook(None, HookEvent.PACKETS_SENT, 0, 0)
+        time.sleep(0.05)
+        for idx in range(1, 5):
+            queued_hook(None, HookEvent.PACKETS_SENT, 0, idx)
+        self.assertEqual(queued_hook.dropped_count, 2)
+        release.set()
+        queued_hook.close(1.0)
+        self.assertEqual([data for _, data in calls], [0, 1, 2])
+        self.assertNotEqual(calls[0][0], threading.current_thread())
+
+
+class TestUdpHooks(TestCase):
+    def setUp(self) -> None:
+        self.udp_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_server.bind((LOCALHOST, 0))
+        self.udp_client = UdpClient(
+            "udp", send_address=EthAddr.from_tuple(self.udp_server.getsockname())
+        )
+        self.events = []
+
+    def hook(self, com_if, event, timestamp_ns, data):
+        self.events.append((com_if, event, data))
+
+    def test_event_sequence(self):
+        self.assertIsNone(self.udp_client._hooks)
+        self.udp_client.add_hook(self.hook)
+        self.udp_client.open()
+        self.udp_client.send(b"\x01\x02")
+        _, sender_addr = self.udp_server.recvfrom(4096)
+        self.udp_server.sendto(b"\x03", sender_addr)
+        time.sleep(0.05)
+        self.assertEqual(self.udp_client.receive(), [b"\x03"])
+        self.assertEqual(
+            self.events,
+            [
+                (self.udp_client, HookEvent.PACKETS_SENT, [b"\x01\x02"]),
+                (self.udp_client, HookEvent.BYTES_RECEIVED, b"\x03"),
+                (self.udp_client, HookEvent.FRAMES_DECODED, [b"\x03"]),
+                (self.udp_client, HookEvent.PACKETS_DELIVERED, [b"\x03"]),
+            ],
+        )
+        self.assertTrue(self.udp_client.remove_hook(self.hook))
+        self.assertIsNone(self.udp_client._hooks)
+        self.udp_client.send(b"\x04")
+        self.assertEqual(len(self.events), 4)
+
+    def tearDown(self) -> None:
+        self.udp_client.close()
+        self.udp_server.close()
@@ -0,0 +1,183 @@
+import os
+import socket
+import sys
+import threading
+import unittest
+from unittest import TestCase
+
+from cobs import cobs
+from spacepackets import PacketType
+from spacepackets.ccsds import PacketId
+from spacepackets.ecss import PusTelemetry
+
+from com_interface.hub import ComHub
+from com_interface.ip_utils import EthAddr
+from com_interface.serial_base import SerialCfg
+from com_interface.serial_cobs import SerialCobsComIF
+from com_interface.tcp import TcpConnectionCfg, TcpSpacepacketsClient
+from com_interface.udp import UdpClient
+
+try:
+    import pty
+except ImportError:
+    # pty only works on POSIX systems, the tests which need it are skipped on other systems.
+    pty = None
+
+LOCALHOST = "127.0.0.1"
+
+
+class PacketCollector:
+    def __init__(self):
+        self.packets = []
+        self.__cond = threading.Condition()
+
+    def __call__(self, com_if, packets):
+        with self.__cond:
+            self.packets.extend((com_if.id, packet) for packet in packets)
+            self.__cond.notify_all()
+
+    def wait_for(self, num_packets: int, timeout: float = 1.0) -> list:
+        with self.__cond:
+            self.__cond.wait_for(lambda: len(self.packets) >= num_packets, timeout)
+            return list(self.packets)
+
+
+class TestComHub(TestCase):
+    def setUp(self) -> None:
+        self.collector = PacketCollector()
+        self.hub = ComHub(self.collector)
+        self.udp_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_server.bind((LOCALHOST, 0))
+        self.udp_server.settimeout(1.0)
+        self.tcp_server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp_server.bind((LOCALHOST, 0))
+        self.tcp_server.listen()
+
+    def _udp_client(self, com_if_id: str) -> UdpClient:
+        return UdpClient(com_if_id, send_address=EthAddr.from_tuple(self.udp_server.getsockname()))
+
+    def test_merged_callback(self):
+        self.hub.start()
+        udp_clients = [self._udp_client(f"udp_{idx}") for idx in range(3)]
+        sender_addrs = []
+        for udp_client in udp_clients:
+            self.hub.add(udp_client)
+            self.assertTrue(udp_client.is_open())
+            udp_client.send(bytes([0]))
+            sender_addrs.append(self.udp_server.recvfrom(4096)[1])
+        self.assertEqual(self.hub.interfaces, udp_clients)
+        for idx, sender_addr in enumerate(sender_addrs):
+            self.udp_server.sendto(bytes([idx, 1]), sender_addr)
+            self.udp_server.sendto(bytes([idx, 2]), sender_addr)
+        received = self.collector.wait_for(6)
+        self.assertEqual(len(received), 6)
+        for idx in range(3):
+            self.assertEqual(
+                [packet for com_if_id, packet in received if com_if_id == f"udp_{idx}"],
+                [bytes([idx, 1]), bytes([idx, 2])],
+            )
+        # Remove one interface at runtime, the others keep working.
+        udp_clients[0].close()
+        self.assertFalse(udp_clients[0].is_open())
+        self.assertEqual(self.hub.interfaces, udp_clients[1:])
+        self.udp_server.sendto(bytes([2, 3]), sender_addrs[2])
+        self.assertEqual(self.collector.wait_for(7)[-1], ("udp_2", bytes([2, 3])))
+        # A removed interface can be used in standalone mode again.
+        udp_clients[0].open()
+        udp_clients[0].send(bytes([4]))
+        self.assertEqual(self.udp_server.recv(4096), bytes([4]))
+        udp_clients[0].close()
+
+    def test_tcp_client(self):
+        packet_id = PacketId(apid=0x22, sec_header_flag=True, ptype=PacketType.TM)
+        tcp_client = TcpSpacepacketsClient(
+            "tcp",
+            space_packet_ids=[packet_id],
+            inner_thread_delay=0.1,
+            target_address=EthAddr.from_tuple(self.tcp_server.getsockname()),
+        )
+        per_if_collector = PacketCollector()
+        self.hub.start()
+        self.hub.add(tcp_client, per_if_collector)
+        conn_sock, _ = self.tcp_server.accept()
+        conn_sock.settimeout(1.0)
+        tm = PusTelemetry(service=17, subservice=2, apid=0x22, timestamp=b"").pack()
+        conn_sock.sendall(tm + tm[:4])
+        conn_sock.sendall(tm[4:])
+        self.assertEqual(per_if_collector.wait_for(2), [("tcp", tm), ("tcp", tm)])
+        self.assertEqual(self.collector.packets, [])
+        # Sending wakes up the hub, which sends the queued TCs.
+        tcs = [bytes([idx]) * 100 for idx in range(50)]
+        tcp_client.send(tcs[0])
+        tcp_client.send_many(tcs[1:])
+        expected = b"".join(tcs)
+        received = bytearray()
+        while len(received) < len(expected):
+            received.extend(conn_sock.recv(65536))
+        self.assertEqual(received, expected)
+        # The interface is removed from the hub when the server closes the connection.
+        conn_sock.close()
+        for _ in range(100):
+            if not self.hub.interfaces:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(self.hub.interfaces, [])
+        self.assertFalse(tcp_client.is_open())
+
+    def test_tcp_connect_timeout(self):
+        # The backlog of the server is full, so further connection attempts time out.
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind((LOCALHOST, 0))
+        server.listen(0)
+        pending = socket.create_connection(server.getsockname())
+        tcp_client = TcpSpacepacketsClient(
+            "tcp",
+            space_packet_ids=[],
+            inner_thread_delay=0.1,
+            target_address=EthAddr.from_tuple(server.getsockname()),
+            connection_cfg=TcpConnectionCfg(connect_timeout=0.1),
+        )
+        try:
+            with self.assertRaises(OSError):
+                self.hub.add(tcp_client)
+            self.assertFalse(tcp_client.is_open())
+            self.assertFalse(tcp_client.is_connected())
+            self.assertEqual(self.hub.interfaces, [])
+        finally:
+            pending.close()
+            server.close()
+
+    @unittest.skipIf(sys.platform.startswith("win"), "pty only works on POSIX systems")
+    def test_serial_cobs_run_once(self):
+        pty_master, slave = pty.openpty()
+        ser_cfg = SerialCfg(com_if_id="cobs", serial_port=os.ttyname(slave), baud_rate=9600)
+        cobs_if = SerialCobsComIF(ser_cfg)
+        # Without any callback, the packets are kept by the interface.
+        self.hub.callback = None
+        self.hub.add(cobs_if)
+        os.write(pty_master, b"\x00" + cobs.encode(bytes([1, 0, 2])) + b"\x00")
+        for _ in range(10):
+            self.hub.run_once(0.1)
+            if cobs_if.packets_available() > 0:
+                break
+        self.assertEqual(cobs_if.receive(), [bytes([1, 0, 2])])
+        cobs_if.send(bytes([3, 4]))
+        self.assertEqual(os.read(pty_master, 16), b"\x00" + cobs.encode(bytes([3, 4])) + b"\x00")
+        self.hub.remove(cobs_if)
+        self.assertFalse(cobs_if.is_open())
+        os.close(pty_master)
+        os.close(slave)
+
+    def test_invalid_add(self):
+        udp_client = self._udp_client("udp")
+        udp_client.open()
+        with self.assertRaises(ValueError):
+            self.hub.add(udp_client)
+        udp_client.close()
+        with self.assertRaises(TypeError):
+            self.hub.add(object())
+
+    def tearDown(self) -> None:
+        self.hub.close()
+        self.udp_server.close()
+        self.tcp_server.close()
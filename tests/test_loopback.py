@@ -0,0 +1,137 @@
+import io
+import selectors
+import threading
+import time
+from unittest import TestCase
+
+from com_interface import SendError
+from com_interface.framing import CobsFramer
+from com_interface.loopback import LinkProfile, LoopbackComIF, create_loopback_pair
+
+
+class TestLoopback(TestCase):
+    def test_loopback(self):
+        loopback = LoopbackComIF()
+        with self.assertRaises(SendError):
+            loopback.send(b"\x01")
+        loopback.open()
+        loopback.send(bytearray(b"\x01"))
+        loopback.send_many([b"\x02", b"\x03"])
+        self.assertEqual(loopback.packets_available(), 3)
+        self.assertEqual(loopback.receive(), [b"\x01", b"\x02", b"\x03"])
+        self.assertEqual(loopback.receive(), [])
+        snapshot = loopback.metrics.snapshot()
+        self.assertEqual(snapshot["tx_packets"], 3)
+        self.assertEqual(snapshot["rx_packets"], 3)
+        self.assertEqual(snapshot["delivered_packets"], 3)
+
+    def test_pair(self):
+        first, second = create_loopback_pair()
+        first.open()
+        second.open()
+        first.send(b"\x01")
+        second.send(b"\x02")
+        self.assertEqual(first.receive(), [b"\x02"])
+        self.assertEqual(second.receive(), [b"\x01"])
+
+    def test_framing(self):
+        first, second = create_loopback_pair(framer_factory=CobsFramer)
+        first.open()
+        second.open()
+        first.send_many([b"\x00\x01", b"\x02"])
+        first.send(b"\x03")
+        self.assertEqual(second.packets_available(), 2)
+        self.assertEqual(second.receive(), [b"\x00\x01", b"\x02", b"\x03"])
+        self.assertEqual(second.metrics.rx_packets, 3)
+        self.assertGreater(second.metrics.rx_bytes, 4)
+
+    def test_blocking_receive(self):
+        first, second = create_loopback_pair(framer_factory=CobsFramer)
+        first.open()
+        second.open()
+        self.assertEqual(second.receive(timeout=0.01), [])
+        timer = threading.Timer(0.05, first.send_many, ([b"\x01", b"\x02", b"\x03"],))
+        timer.start()
+        start = time.perf_counter()
+        self.assertEqual(second.receive(max_packets=2, timeout=2.0), [b"\x01", b"\x02"])
+        self.assertLess(time.perf_counter() - start, 1.0)
+        timer.join()
+        self.assertEqual(second.packets_available(), 1)
+        self.assertEqual(second.receive(timeout=None), [b"\x03"])
+        # Closing the interface wakes up a waiting call.
+        threading.Timer(0.05, second.close).start()
+        self.assertEqual(second.receive(timeout=None), [])
+        with self.assertRaises(io.UnsupportedOperation):
+            second.on_packet(print)
+
+    def test_fileno(self):
+        first, second = create_loopback_pair()
+        first.open()
+        second.open()
+        with selectors.DefaultSelector() as selector:
+            selector.register(first, selectors.EVENT_READ)
+            selector.register(second, selectors.EVENT_READ)
+            self.assertEqual(selector.select(0), [])
+            second.send(b"\x01")
+            self.assertEqual([key.fileobj for key, _ in selector.select(1.0)], [first])
+            self.assertEqual(first.receive(), [b"\x01"])
+            self.assertEqual(selector.select(0), [])
+            second.close()
+            self.assertEqual([key.fileobj for key, _ in selector.select(1.0)], [second])
+        with self.assertRaises(io.UnsupportedOperation):
+            LoopbackComIF(link=LinkProfile(latency=0.05)).fileno()
+
+    def test_max_packets_stored(self):
+        loopback = LoopbackComIF(max_packets_stored=2)
+        loopback.open()
+        loopback.send_many([b"\x01", b"\x02", b"\x03"])
+        self.assertEqual(loopback.receive(), [b"\x02", b"\x03"])
+        self.assertEqual(loopback.metrics.dropped_packets, 1)
+
+
+class TestLinkProfile(TestCase):
+    def test_latency(self):
+        loopback = LoopbackComIF(link=LinkProfile(latency=0.05))
+        loopback.open()
+        loopback.send(b"\x01")
+        self.assertEqual(loopback.packets_available(), 0)
+        self.assertEqual(loopback.receive(), [])
+        time.sleep(0.07)
+        self.assertEqual(loopback.packets_available(), 1)
+        self.assertEqual(loopback.receive(), [b"\x01"])
+
+    def test_bandwidth(self):
+        # Every packet needs 40 ms to be transmitted.
+        loopback = LoopbackComIF(link=LinkProfile(bandwidth=100.0))
+        loopback.open()
+        loopback.send_many([bytes(4), bytes(4), bytes(4)])
+        time.sleep(0.06)
+        self.assertEqual(len(loopback.receive()), 1)
+        time.sleep(0.08)
+        self.assertEqual(len(loopback.receive()), 2)
+
+    def test_blocking_receive(self):
+        loopback = LoopbackComIF(link=LinkProfile(latency=0.05))
+        loopback.open()
+        loopback.send(b"\x01")
+        start = time.perf_counter()
+        self.assertEqual(loopback.receive(timeout=1.0), [b"\x01"])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_reproducible_loss_and_jitter(self):
+        def run() -> list[bytes]:
+            loopback = LoopbackComIF(link=LinkProfile(jitter=0.001, loss=0.5, seed=7))
+            loopback.open()
+            loopback.send_many(bytes([idx]) for idx in range(100))
+            time.sleep(0.01)
+            packets = loopback.receive()
+            self.assertEqual(loopback.lost_count + len(packets), 100)
+            return packets
+
+        packets = run()
+        self.assertGreater(len(packets), 20)
+        self.assertLess(len(packets), 80)
+        # The jitter does not reorder the packets.
+        self.assertEqual(packets, sorted(packets))
+        self.assertEqual(run(), packets)
@@ -0,0 +1,126 @@
+import gc
+import math
+import socket
+import time
+from unittest import TestCase
+
+from com_interface.ip_utils import EthAddr
+from com_interface.metrics import InterfaceMetrics, LatencyHistogram
+from com_interface.packet_queue import OverflowPolicy
+from com_interface.udp import UdpClient
+
+LOCALHOST = "127.0.0.1"
+
+
+class TestLatencyHistogram(TestCase):
+    def test_buckets(self):
+        histogram = LatencyHistogram()
+        self.assertTrue(math.isnan(histogram.percentile(0.5)))
+        for latency_ns in (500, 1000, 1999, 2000, 10**15):
+            histogram.record(latency_ns)
+        self.assertEqual(histogram.buckets[:3], [1, 2, 1])
+        self.assertEqual(histogram.buckets[-1], 1)
+        self.assertEqual(histogram.percentile(0.2), 1.0)
+        self.assertEqual(histogram.percentile(0.6), 2.0)
+        self.assertEqual(histogram.percentile(1.0), math.inf)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 5)
+        self.assertEqual(len(snapshot["buckets"]), LatencyHistogram.NUM_BUCKETS)
+        histogram.reset()
+        self.assertEqual(histogram.snapshot()["buckets"], [])
+
+
+class TestInterfaceMetrics(TestCase):
+    def test_delivery_latency_sampling(self):
+        metrics = InterfaceMetrics(sample_interval=4)
+        metrics.packets_received(3)
+        metrics.packets_received(3)
+        metrics.packets_received(10)
+        self.assertEqual(metrics.rx_packets, 16)
+        # Packets 0, 4 and 8 are sampled, the last batch only gets a single timestamp.
+        metrics.packets_delivered(4)
+        self.assertEqual(metrics.delivery_latency.count, 1)
+        metrics.packets_delivered(12)
+        self.assertEqual(metrics.delivery_latency.count, 3)
+        metrics.packets_received(1)
+        metrics.dropped_packets += 1
+        metrics.packets_delivered(1)
+        self.assertEqual(metrics.delivery_latency.count, 4)
+        self.assertEqual(metrics.delivered_packets, 17)
+
+    def test_disabled_sampling(self):
+        metrics = InterfaceMetrics(sample_interval=0)
+        metrics.packets_received(100)
+        metrics.packets_delivered(100)
+        self.assertEqual(metrics.delivery_latency.count, 0)
+
+    def test_snapshot(self):
+        metrics = InterfaceMetrics(lambda: {"rx_queue_depth": 5})
+        metrics.bytes_received(100)
+        metrics.packets_received(2)
+        metrics.packets_sent(3, 30)
+        time.sleep(0.01)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["rx_packets"], 2)
+        self.assertEqual(snapshot["rx_bytes"], 100)
+        self.assertEqual(snapshot["tx_packets"], 3)
+        self.assertEqual(snapshot["tx_bytes"], 30)
+        self.assertEqual(snapshot["rx_queue_depth"], 5)
+        self.assertEqual(snapshot["decode_errors"], 0)
+        self.assertGreater(snapshot["rx_byte_rate"], 0.0)
+        # The rates are relative to the previous snapshot.
+        self.assertEqual(metrics.snapshot()["rx_byte_rate"], 0.0)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["rx_packets"], 0)
+
+    def test_gauges_do_not_keep_interface_alive(self):
+        udp_client = UdpClient("udp", send_address=EthAddr(LOCALHOST, 7777))
+        metrics = udp_client.metrics
+        self.assertEqual(metrics.snapshot()["rx_queue_depth"], 0)
+        del udp_client
+        gc.collect()
+        self.assertEqual(metrics.snapshot()["rx_queue_depth"], 0)
+
+
+class TestUdpMetrics(TestCase):
+    def setUp(self) -> None:
+        self.udp_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_server.bind((LOCALHOST, 0))
+        self.udp_client = UdpClient(
+            "udp",
+            send_address=EthAddr.from_tuple(self.udp_server.getsockname()),
+            threaded_reception=True,
+            max_packets_stored=4,
+            overflow_policy=OverflowPolicy.DROP_OLDEST,
+        )
+
+    def test_counters(self):
+        self.udp_client.open()
+        self.udp_client.send(bytes(10))
+        self.udp_client.send_many([bytes(5), bytes(5)])
+        sender_addr = None
+        for _ in range(3):
+            _, sender_addr = self.udp_server.recvfrom(4096)
+        for idx in range(6):
+            self.udp_server.sendto(bytes([idx]) * 8, sender_addr)
+        for _ in range(100):
+            if self.udp_client.metrics.dropped_packets == 2:
+                break
+            time.sleep(0.01)
+        snapshot = self.udp_client.metrics.snapshot()
+        self.assertEqual(snapshot["tx_packets"], 3)
+        self.assertEqual(snapshot["tx_bytes"], 20)
+        self.assertEqual(snapshot["rx_packets"], 6)
+        self.assertEqual(snapshot["rx_bytes"], 48)
+        self.assertEqual(snapshot["dropped_packets"], 2)
+        self.assertEqual(snapshot["rx_queue_depth"], 4)
+        self.assertEqual(len(self.udp_client.receive()), 4)
+        snapshot = self.udp_client.metrics.snapshot()
+        self.assertEqual(snapshot["delivered_packets"], 4)
+        self.assertEqual(snapshot["rx_queue_depth"], 0)
+        # Datagrams which are received in one batch share one latency sample.
+        self.assertGreaterEqual(snapshot["delivery_latency"]["count"], 1)
+
+    def tearDown(self) -> None:
+        self.udp_client.close()
+        self.udp_server.close()
@@ -0,0 +1,95 @@
+import select
+import threading
+import time
+from collections import deque
+from unittest import TestCase
+
+from com_interface.packet_queue import BoundedPacketQueue, OverflowPolicy, ReceptionSignal
+
+
+class TestBoundedPacketQueue(TestCase):
+    def test_unbounded(self):
+        packet_queue = BoundedPacketQueue()
+        self.assertEqual(packet_queue.put_many(bytes([idx]) for idx in range(100)), 100)
+        self.assertEqual(len(packet_queue), 100)
+        self.assertEqual(packet_queue.pop_all(10), [bytes([idx]) for idx in range(10)])
+        self.assertEqual(len(packet_queue.pop_all()), 90)
+        self.assertEqual(packet_queue.dropped_count, 0)
+
+    def test_drop_newest(self):
+        packet_queue = BoundedPacketQueue(2, OverflowPolicy.DROP_NEWEST)
+        self.assertTrue(packet_queue.put(b"\x01"))
+        self.assertTrue(packet_queue.put(b"\x02"))
+        self.assertFalse(packet_queue.put(b"\x03"))
+        self.assertEqual(packet_queue.pop_all(), [b"\x01", b"\x02"])
+        self.assertEqual(packet_queue.dropped_count, 1)
+
+    def test_on_discard(self):
+        discarded = []
+        packet_queue = BoundedPacketQueue(1, OverflowPolicy.DROP_OLDEST, discarded.append)
+        packet_queue.put(b"\x01")
+        packet_queue.put(b"\x02")
+        packet_queue.overflow_policy = OverflowPolicy.DROP_NEWEST
+        packet_queue.put(b"\x03")
+        packet_queue.overflow_policy = OverflowPolicy.BLOCK
+        packet_queue.put(b"\x04", timeout=0.01)
+        self.assertEqual(discarded, [b"\x01", b"\x03", b"\x04"])
+        self.assertEqual(packet_queue.dropped_count, 3)
+        self.assertEqual(packet_queue.pop_all(), [b"\x02"])
+
+    def test_block(self):
+        packet_queue = BoundedPacketQueue(1, OverflowPolicy.BLOCK)
+        packet_queue.put(b"\x01")
+        self.assertFalse(packet_queue.put(b"\x02", timeout=0.01))
+        self.assertEqual(packet_queue.dropped_count, 1)
+
+        def consumer():
+            time.sleep(0.05)
+            packet_queue.pop_all()
+
+        consumer_thread = threading.Thread(target=consumer)
+        consumer_thread.start()
+        self.assertTrue(packet_queue.put(b"\x03", timeout=1.0))
+        consumer_thread.join()
+        self.assertEqual(packet_queue.pop_all(), [b"\x03"])
+
+
+class TestReceptionSignal(TestCase):
+    def _readable(self, signal: ReceptionSignal) -> bool:
+        return bool(select.select([signal.fileno()], [], [], 0)[0])
+
+    def test_notify_during_reset(self):
+        signal = ReceptionSignal()
+        packets = deque()
+        signal.fileno()
+        read_fd = signal._read_fd
+
+        def store_and_read_fd():
+            # The reception thread stores a packet while the consumer resets the signal.
+            packets.append(b"\x01")
+            signal.notify()
+            read_fd()
+
+        signal.notify()
+        signal._read_fd = store_and_read_fd
+        self.assertEqual(signal.take(packets), [b"\x01"])
+        signal._read_fd = read_fd
+        self.assertFalse(self._readable(signal))
+        packets.append(b"\x02")
+        signal.notify()
+        self.assertTrue(self._readable(signal))
+        self.assertEqual(signal.take(packets), [b"\x02"])
+
+    def test_fileno(self):
+        signal = ReceptionSignal()
+        packets = deque([b"\x01", b"\x02"])
+        # Packets stored before the descriptor was created are signalled as well.
+        signal.notify()
+        self.assertTrue(self._readable(signal))
+        signal.notify()
+        self.assertEqual(signal.take(packets, 1), [b"\x01"])
+        self.assertTrue(self._readable(signal))
+        self.assertEqual(signal.take(packets), [b"\x02"])
+        self.assertFalse(self._readable(signal))
+        self.assertEqual(signal.take(packets), [])
+        self.assertFalse(self._readable(signal))
@@ -1,9 +1,13 @@
 import os
+import random
 import sys
 import time
 import unittest
 from unittest import TestCase
 
+from cobs import cobs
+
+from com_interface.framing import cobs_max_encoded_len, decode_into, encode_into
 from com_interface.serial_base import SerialCfg
 from com_interface.serial_cobs import SerialCobsComIF
 
@@ -29,6 +33,8 @@ class TestSerialCobsInterface(TestCase):
         self._cobs_if.clear()
         self._test_send()
         self._cobs_if.clear()
+        self._test_send_many()
+        self._cobs_if.clear()
         self._test_recv()
         self._cobs_if.clear()
         self._test_recv_consecutive()
@@ -48,6 +54,16 @@ class TestSerialCobsInterface(TestCase):
         test_data_read_back = cobs.decode(encoded_packet[1:-1])
         self.assertEqual(test_data_read_back, test_data)
 
+    def _test_send_many(self):
+        packets = [bytes([0x01, 0x00, 0x03]), bytes([0x04, 0x05])]
+        expected = bytearray()
+        for packet in packets:
+            expected.append(0)
+            expected.extend(cobs.encode(packet))
+            expected.append(0)
+        self._cobs_if.send_many(packets)
+        self.assertEqual(os.read(self._pty_master, len(expected)), expected)
+
     def _test_recv(self):
         from cobs import cobs
 
@@ -94,3 +110,121 @@ class TestSerialCobsInterface(TestCase):
 
     def tearDown(self) -> None:
         self._cobs_if.close()
+
+
+class TestCobsParser(TestCase):
+    def setUp(self) -> None:
+        self.cobs = cobs
+        ser_cfg = SerialCfg(com_if_id="cobs_parser", serial_port="", baud_rate=9600)
+        self._cobs_if = SerialCobsComIF(ser_cfg)
+
+    def _feed(self, data: bytes):
+        # Called by the reception thread for every read.
+        self._cobs_if._handle_received_bytes(data)
+
+    def test_large_backlog(self):
+        frames = [bytes([i % 256, 0, (i + 1) % 256]) * 20 for i in range(5000)]
+        stream = bytearray()
+        for frame in frames:
+            stream.append(0)
+            stream.extend(self.cobs.encode(frame))
+            stream.append(0)
+        self._feed(bytes(stream))
+        self.assertEqual(self._cobs_if.packets_available(), len(frames))
+        self.assertEqual(self._cobs_if.receive(), frames)
+        self.assertEqual(self._cobs_if.parsing_error_count, 0)
+
+    def test_frame_split_across_reads(self):
+        test_data = bytes([0x01, 0x00, 0x02, 0x03])
+        encoded = bytearray([0])
+        encoded.extend(self.cobs.encode(test_data))
+        encoded.append(0)
+        for byte in encoded[:-1]:
+            self._feed(bytes([byte]))
+            self.assertEqual(self._cobs_if.packets_available(), 0)
+        self._feed(encoded[-1:])
+        self.assertEqual(self._cobs_if.receive(), [test_data])
+
+    def test_shared_delimiter_and_garbage(self):
+        test_data = bytes([0x02, 0x03, 0x04])
+        test_data_2 = bytes([0x04, 0x02, 0x01])
+        stream = bytearray([0x05, 0x06, 0x00])
+        stream.extend(self.cobs.encode(test_data))
+        stream.append(0)
+        stream.extend(self.cobs.encode(test_data_2))
+        stream.append(0)
+        self._feed(bytes(stream))
+        self.assertEqual(self._cobs_if.receive(), [test_data, test_data_2])
+
+    def test_max_packets_and_callback(self):
+        frames = [bytes([idx]) for idx in range(1, 6)]
+        stream = bytearray()
+        for frame in frames:
+            stream.append(0)
+            stream.extend(self.cobs.encode(frame))
+            stream.append(0)
+        self._feed(bytes(stream))
+        self.assertEqual(self._cobs_if.receive(max_packets=3), frames[:3])
+        self.assertEqual(self._cobs_if.receive(max_packets=3), frames[3:])
+        received = []
+        self._cobs_if.on_packet(lambda _, packets: received.extend(packets))
+        self._feed(bytes(stream))
+        self.assertEqual(received, frames)
+        self.assertEqual(self._cobs_if.packets_available(), 0)
+
+    def test_decode_error(self):
+        self._feed(bytes([0x00, 0x05, 0x01, 0x00]))
+        self.assertEqual(self._cobs_if.receive(), [])
+        self.assertEqual(self._cobs_if.parsing_error_count, 1)
+
+
+class TestCobsCodec(TestCase):
+    def _test_data(self) -> list[bytes]:
+        rng = random.Random(0x42)
+        data = [
+            b"",
+            bytes(1),
+            bytes(300),
+            bytes([0x01, 0x00, 0x03]),
+        ]
+        # Lengths around the maximum block size, with and without trailing zeros.
+        for length in (253, 254, 255, 508, 509, 1000):
+            data.append(bytes(rng.randint(1, 255) for _ in range(length)))
+            data.append(bytes(rng.randint(1, 255) for _ in range(length)) + bytes(1))
+        data.extend(
+            bytes(rng.choice((0, rng.randint(1, 255))) for _ in range(rng.randint(0, 600)))
+            for _ in range(200)
+        )
+        return data
+
+    def test_encode_into(self):
+        for data in self._test_data():
+            out = bytearray(cobs_max_encoded_len(len(data)) + 4)
+            frame_len = encode_into(data, out, 2)
+            self.assertEqual(out[2 : 2 + frame_len], b"\x00" + cobs.encode(data) + b"\x00")
+            self.assertEqual(SerialCobsComIF.encode_data(data), out[2 : 2 + frame_len])
+
+    def test_decode_into(self):
+        out = bytearray(2048)
+        for use_speedups in (False, True):
+            for data in self._test_data():
+                encoded = b"\x00" + cobs.encode(data) + b"\x00"
+                decoded_len = decode_into(encoded, out, 1, len(encoded) - 1, 3, use_speedups)
+                self.assertEqual(decoded_len, len(data))
+                self.assertEqual(out[3 : 3 + decoded_len], data)
+
+    def test_buffer_too_small(self):
+        with self.assertRaises(ValueError):
+            encode_into(bytes(10), bytearray(12))
+        for use_speedups in (False, True):
+            with self.assertRaises(ValueError):
+                decode_into(bytes([0x03, 0x01, 0x02]), bytearray(2), use_speedups=use_speedups)
+            with self.assertRaises(ValueError):
+                decode_into(bytes([0x02, 0x01]), bytearray(3), offset=2, use_speedups=use_speedups)
+
+    def test_decode_invalid(self):
+        out = bytearray(16)
+        for use_speedups in (False, True):
+            for invalid in (bytes([0x05, 0x01]), bytes([0x03, 0x00, 0x01]), bytes([0x01, 0x00])):
+                with self.assertRaises(cobs.DecodeError):
+                    decode_into(invalid, out, use_speedups=use_speedups)
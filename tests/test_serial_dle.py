@@ -1,10 +1,14 @@
 import os
+import random
 import sys
 import time
 import unittest
 from typing import Optional
 from unittest import TestCase
 
+from dle_encoder.dle_encoder import DleEncoder
+
+from com_interface.framing import DleFrameParser
 from com_interface.serial_base import SerialCfg
 from com_interface.serial_dle import SerialDleComIF
 
@@ -65,3 +69,41 @@ class TestSerialDleInterface(TestCase):
     @classmethod
     def tearDownClass(cls) -> None:
         cls._DLE_IF.close()
+
+
+class TestDleParser(TestCase):
+    def setUp(self) -> None:
+        self.encoder = DleEncoder()
+        self.parser = DleFrameParser(max_frame=64)
+
+    def test_many_frames_in_chunks(self):
+        rng = random.Random(0)
+        frames = [rng.randbytes(rng.randint(1, 30)) for _ in range(500)]
+        stream = bytearray()
+        for frame in frames:
+            stream.extend(self.encoder.encode(frame))
+        idx = 0
+        packets = []
+        while idx < len(stream):
+            chunk_len = rng.randint(1, 100)
+            self.parser.feed(stream[idx : idx + chunk_len])
+            packets.extend(self.parser.parse())
+            idx += chunk_len
+        self.assertEqual(packets, frames)
+        self.assertEqual(self.parser.parsing_error_count, 0)
+        self.assertEqual(self.parser.dropped_frame_count, 0)
+
+    def test_invalid_frames(self):
+        test_data = bytes([0x02, 0x03, 0x10, 0x04])
+        stream = bytearray([0x05, 0x06])
+        # Start marker without end marker
+        stream.extend([0x02, 0x01])
+        stream.extend(self.encoder.encode(test_data))
+        # Invalid escape sequence
+        stream.extend([0x02, 0x10, 0x01, 0x03])
+        # Frame which is too large
+        stream.extend(self.encoder.encode(bytes(70)))
+        self.parser.feed(stream)
+        self.assertEqual(self.parser.parse(), [test_data])
+        self.assertEqual(self.parser.parsing_error_count, 1)
+        self.assertEqual(self.parser.dropped_frame_count, 2)
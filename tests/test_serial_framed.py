@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import unittest
+from unittest import TestCase
+
+from com_interface.framing import LengthPrefixFramer
+from com_interface.serial_base import SerialCfg
+from com_interface.serial_framed import SerialFramedComIF
+
+try:
+    import pty
+except ImportError:
+    # pty only works on POSIX systems, the tests which need it are skipped on other systems.
+    pty = None
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "pty only works on POSIX systems")
+class TestSerialFramedInterface(TestCase):
+    def setUp(self) -> None:
+        self._pty_master, slave = pty.openpty()
+        ser_cfg = SerialCfg(
+            com_if_id="pseudo_ser_framed",
+            serial_port=os.ttyname(slave),
+            baud_rate=9600,
+        )
+        self._framed_if = SerialFramedComIF(ser_cfg, LengthPrefixFramer(2))
+        self._framed_if.open()
+
+    def test_send(self):
+        self._framed_if.send(bytes([1, 2, 3]))
+        self._framed_if.send_many([bytes([4]), bytes([5, 6])])
+        expected = b"\x00\x03\x01\x02\x03\x00\x01\x04\x00\x02\x05\x06"
+        # Both write calls might not be read at once.
+        received = bytearray()
+        while len(received) < len(expected):
+            received.extend(os.read(self._pty_master, len(expected) - len(received)))
+        self.assertEqual(received, expected)
+
+    def test_recv(self):
+        os.write(self._pty_master, b"\x00\x02\x01\x02\x00\x03\x03")
+        time.sleep(0.05)
+        os.write(self._pty_master, b"\x04\x05")
+        for _ in range(20):
+            if self._framed_if.packets_available() == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self._framed_if.receive(), [bytes([1, 2]), bytes([3, 4, 5])])
+
+    def tearDown(self) -> None:
+        self._framed_if.close()
+        os.close(self._pty_master)
@@ -0,0 +1,105 @@
+import threading
+import time
+from unittest import TestCase
+
+from com_interface import SendError
+from com_interface.loopback import LoopbackComIF, create_loopback_pair
+from com_interface.shm import SharedMemoryBus, SharedMemoryReaderComIF
+
+
+class TestSharedMemoryBus(TestCase):
+    def setUp(self) -> None:
+        self.ground, self.satellite = create_loopback_pair()
+        self.satellite.open()
+        self.bus = SharedMemoryBus(
+            self.ground, slot_count=4, max_packet_size=16, tc_channels=2, tc_slot_count=2
+        )
+        self.bus.open()
+        self.readers = [
+            SharedMemoryReaderComIF(self.bus.name, f"reader_{idx}", tc_channel=idx)
+            for idx in range(2)
+        ]
+        for reader in self.readers:
+            reader.open()
+
+    def test_fan_out(self):
+        self.satellite.send_many([b"\x01", b"\x02\x03"])
+        self.bus.run_once()
+        self.assertEqual(self.bus.published_count, 2)
+        for reader in self.readers:
+            self.assertEqual(reader.packets_available(), 2)
+            self.assertEqual(reader.receive(max_packets=1), [b"\x01"])
+        self.assertEqual(self.readers[0].receive(), [b"\x02\x03"])
+        self.assertEqual(self.readers[0].receive(), [])
+        self.assertEqual(self.readers[1].receive(), [b"\x02\x03"])
+        self.assertEqual(self.readers[1].metrics.delivered_packets, 2)
+        # Packets which do not fit into a slot are dropped.
+        self.bus.publish([bytes(17)])
+        self.assertEqual(self.bus.dropped_count, 1)
+        self.assertEqual(self.readers[0].receive(), [])
+
+    def test_overrun(self):
+        self.bus.publish(bytes([idx]) for idx in range(3))
+        self.assertEqual(self.readers[0].receive(), [bytes([idx]) for idx in range(3)])
+        self.bus.publish(bytes([idx]) for idx in range(3, 10))
+        # The reader skips the overwritten packets and the slot which is written next.
+        self.assertEqual(self.readers[0].packets_available(), 3)
+        self.assertEqual(self.readers[0].receive(), [bytes([idx]) for idx in range(7, 10)])
+        self.assertEqual(self.readers[0].metrics.dropped_packets, 4)
+        self.assertEqual(self.readers[1].receive(), [bytes([idx]) for idx in range(7, 10)])
+        self.assertEqual(self.readers[1].metrics.dropped_packets, 7)
+
+    def test_telecommands(self):
+        self.readers[0].send(b"\x01")
+        self.readers[1].send(b"\x02")
+        self.readers[0].send(b"\x03")
+        with self.assertRaises(SendError):
+            self.readers[0].send(b"\x04")
+        with self.assertRaises(SendError):
+            self.readers[1].send(bytes(17))
+        self.bus.run_once()
+        self.assertEqual(self.satellite.receive(), [b"\x01", b"\x03", b"\x02"])
+        # The slots can be reused once the TCs were forwarded.
+        self.readers[0].send(b"\x04")
+        self.bus.run_once()
+        self.assertEqual(self.satellite.receive(), [b"\x04"])
+        reader = SharedMemoryReaderComIF(self.bus.name)
+        reader.open()
+        with self.assertRaises(SendError):
+            reader.send(b"\x01")
+        reader.close()
+        with self.assertRaises(ValueError):
+            SharedMemoryReaderComIF(self.bus.name, tc_channel=2).open()
+
+    def test_bus_thread(self):
+        self.bus.tc_poll_interval = 0.01
+        self.bus.start()
+        timer = threading.Timer(0.05, self.satellite.send, (b"\x01",))
+        timer.start()
+        start = time.perf_counter()
+        self.assertEqual(self.readers[0].receive(timeout=1.0), [b"\x01"])
+        self.assertLess(time.perf_counter() - start, 0.5)
+        timer.join()
+        self.readers[1].send(b"\x02")
+        self.assertEqual(self.satellite.receive(timeout=1.0), [b"\x02"])
+        # Closing the bus wakes up waiting readers.
+        timer = threading.Timer(0.05, self.bus.close)
+        timer.start()
+        self.assertEqual(self.readers[0].receive(timeout=None), [])
+        self.assertTrue(self.readers[0].bus_closed)
+        # The readers wake up before the close call returned.
+        timer.join()
+        self.assertFalse(self.ground.is_open())
+
+    def test_missing_segment(self):
+        other = SharedMemoryBus(LoopbackComIF())
+        other.open()
+        name = other.name
+        other.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedMemoryReaderComIF(name).open()
+
+    def tearDown(self) -> None:
+        for reader in self.readers:
+            reader.close()
+        self.bus.close()
@@ -0,0 +1,76 @@
+import random
+import unittest
+from unittest import TestCase
+
+from cobs import cobs
+from dle_encoder import DleEncoder
+
+from com_interface.framing import SPEEDUPS_AVAILABLE, CobsFrameParser, DleFrameParser
+
+
+def random_payload(rng: random.Random) -> bytes:
+    return bytes(rng.randint(0, 255) for _ in range(rng.randint(0, 300)))
+
+
+def mutate(rng: random.Random, frame: bytes, special: bytes) -> bytes:
+    """Randomly truncate a frame, corrupt it or insert garbage and special characters."""
+    choice = rng.randint(0, 9)
+    if choice == 0 and len(frame) > 1:
+        return frame[: rng.randint(1, len(frame) - 1)]
+    if choice == 1 and len(frame) > 0:
+        idx = rng.randint(0, len(frame) - 1)
+        return frame[:idx] + bytes([rng.randint(0, 255)]) + frame[idx + 1 :]
+    if choice == 2:
+        return bytes(rng.choice(special + bytes([rng.randint(0, 255)])) for _ in range(20))
+    return frame
+
+
+@unittest.skipUnless(SPEEDUPS_AVAILABLE, "C accelerator not available")
+class TestSpeedupsDifferential(TestCase):
+    """Feeds identical random streams to the pure Python and to the accelerated parsers, which
+    must produce byte-identical results."""
+
+    def _compare(self, rng: random.Random, parsers: tuple, stream: bytes):
+        idx = 0
+        while idx < len(stream):
+            chunk = stream[idx : idx + rng.randint(1, 600)]
+            idx += len(chunk)
+            results = []
+            for parser in parsers:
+                parser.feed(chunk)
+                results.append(parser.parse())
+            self.assertEqual(results[0], results[1])
+            self.assertEqual(
+                [type(frame) for frame in results[0]], [type(frame) for frame in results[1]]
+            )
+            for attr in ("_buf", "_frame_start", "_scan_idx", "parsing_error_count"):
+                self.assertEqual(getattr(parsers[0], attr), getattr(parsers[1], attr), attr)
+
+    def test_cobs(self):
+        rng = random.Random(0xC0B5)
+        for _ in range(30):
+            parsers = (CobsFrameParser(use_speedups=False), CobsFrameParser())
+            self.assertFalse(parsers[0].use_speedups)
+            self.assertTrue(parsers[1].use_speedups)
+            stream = bytearray()
+            for _ in range(100):
+                frame = b"\x00" + cobs.encode(random_payload(rng)) + b"\x00"
+                stream.extend(mutate(rng, frame, b"\x00\x01\xff"))
+            self._compare(rng, parsers, bytes(stream))
+
+    def test_dle(self):
+        rng = random.Random(0xD1E)
+        for _ in range(30):
+            escape_cr = rng.choice((False, True))
+            max_frame = rng.choice((None, 64, 400))
+            parsers = (
+                DleFrameParser(escape_cr, max_frame, use_speedups=False),
+                DleFrameParser(escape_cr, max_frame),
+            )
+            encoder = DleEncoder(escape_cr=escape_cr)
+            stream = bytearray()
+            for _ in range(100):
+                frame = encoder.encode(random_payload(rng), add_stx_etx=True)
+                stream.extend(mutate(rng, bytes(frame), b"\x02\x03\x10\x0d\x42\x43\x4d"))
+            self._compare(rng, parsers, bytes(stream))
+            self.assertEqual(parsers[0].dropped_frame_count, parsers[1].dropped_frame_count)
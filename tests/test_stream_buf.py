@@ -0,0 +1,39 @@
+import socket
+from unittest import TestCase
+
+from com_interface.stream_buf import StreamBuffer
+
+
+class TestStreamBuffer(TestCase):
+    def test_compaction(self):
+        buf = StreamBuffer(16, min_free=4)
+        buf.write(bytes(range(12)))
+        buf.consume(10)
+        # Not enough space at the end, the tail is moved to the start of the buffer.
+        buf.write(bytes(range(12, 20)))
+        self.assertEqual(buf.capacity, 16)
+        self.assertEqual(bytes(buf.view()), bytes(range(10, 20)))
+
+    def test_growth(self):
+        buf = StreamBuffer(16, min_free=4)
+        buf.write(bytes(range(12)))
+        buf.write(bytes(range(12, 40)))
+        self.assertGreaterEqual(buf.capacity, 40)
+        self.assertEqual(bytes(buf.view()), bytes(range(40)))
+        buf.consume(40)
+        self.assertEqual(len(buf), 0)
+
+    def test_recv_into(self):
+        sock_a, sock_b = socket.socketpair()
+        with sock_a, sock_b:
+            buf = StreamBuffer(16, min_free=8)
+            sock_a.sendall(bytes(range(6)))
+            self.assertEqual(buf.recv_into(sock_b), 6)
+            buf.consume(4)
+            sock_a.sendall(bytes(range(6, 20)))
+            received = 0
+            while received < 14:
+                received += buf.recv_into(sock_b)
+            self.assertEqual(bytes(buf.view()), bytes(range(4, 20)))
+            sock_a.close()
+            self.assertEqual(buf.recv_into(sock_b), 0)
@@ -1,4 +1,7 @@
+import contextlib
+import select
 import socket
+import struct
 import threading
 import time
 from collections import deque
@@ -9,8 +12,16 @@ from spacepackets import PacketType
 from spacepackets.ccsds import PacketId
 from spacepackets.ecss import PusTelecommand, PusTelemetry
 
+from com_interface import SendError
+from com_interface.framing import CobsFramer
 from com_interface.ip_utils import EthAddr
-from com_interface.tcp import TcpSpacepacketsClient
+from com_interface.packet_queue import OverflowPolicy
+from com_interface.tcp import (
+    ReconnectPolicy,
+    TcpCommunicationType,
+    TcpConnectionCfg,
+    TcpSpacepacketsClient,
+)
 
 LOCALHOST = "127.0.0.1"
 
@@ -52,6 +63,335 @@ class TestTcpIf(TestCase):
         self._test_recv_with_invalid_packet()
         self._test_close_client()
 
+    def test_send_does_not_wait_for_polling_period(self):
+        tcp_client = TcpSpacepacketsClient(
+            "tcp_slow_polling",
+            space_packet_ids=[self.expected_packet_id],
+            target_address=EthAddr.from_tuple(self.addr),
+            inner_thread_delay=5.0,
+        )
+        tcp_client.open()
+        conn_sock, _ = self.tcp_server.accept()
+        conn_sock.settimeout(1.0)
+        start = time.perf_counter()
+        tcp_client.send(self.base_data)
+        self.assertEqual(conn_sock.recv(4096), self.base_data)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        # A large number of queued TCs must all arrive in order.
+        expected = bytearray()
+        for idx in range(1000):
+            tcp_client.send(bytes([idx % 256]) * 10)
+            expected.extend(bytes([idx % 256]) * 10)
+        received = bytearray()
+        while len(received) < len(expected):
+            received.extend(conn_sock.recv(65536))
+        self.assertEqual(received, expected)
+        packets = [bytes([idx]) * 5 for idx in range(100)]
+        tcp_client.send_many(packets)
+        expected = b"".join(packets)
+        received = bytearray()
+        while len(received) < len(expected):
+            received.extend(conn_sock.recv(65536))
+        self.assertEqual(received, expected)
+        start = time.perf_counter()
+        tcp_client.close()
+        self.assertLess(time.perf_counter() - start, 1.0)
+        conn_sock.close()
+
+    def test_cobs_framing(self):
+        tcp_client = TcpSpacepacketsClient(
+            "tcp_cobs",
+            space_packet_ids=[],
+            target_address=EthAddr.from_tuple(self.addr),
+            inner_thread_delay=0.05,
+            framer=CobsFramer(),
+        )
+        self.assertEqual(tcp_client.com_type, TcpCommunicationType.FRAMED)
+        tcp_client.open()
+        tcp_server = threading.Thread(target=self.tcp_echo_server_thread, daemon=True)
+        tcp_server.start()
+        packets = [bytes([0, 1, 2]), bytes([3, 0]), bytes(300)]
+        tcp_client.send(packets[0])
+        tcp_client.send_many(packets[1:])
+        received = []
+        for _ in range(50):
+            received.extend(tcp_client.receive())
+            if len(received) == len(packets):
+                break
+            time.sleep(0.01)
+        self.assertEqual(received, packets)
+        snapshot = tcp_client.metrics.snapshot()
+        encoded_len = len(CobsFramer().encode_many(packets))
+        self.assertEqual(snapshot["tx_packets"], 3)
+        self.assertEqual(snapshot["tx_bytes"], encoded_len)
+        self.assertEqual(snapshot["rx_packets"], 3)
+        self.assertEqual(snapshot["rx_bytes"], encoded_len)
+        self.assertEqual(snapshot["delivered_packets"], 3)
+        self.assertEqual(snapshot["decode_errors"], 0)
+        self.assertEqual(snapshot["tx_queue_depth"], 0)
+        self.assertEqual(snapshot["delivery_latency"]["count"], 1)
+        tcp_client.close()
+
+    def test_blocking_receive(self):
+        self._open()
+        tcp_server = threading.Thread(target=self.tcp_echo_server_thread, daemon=True)
+        tcp_server.start()
+        self.assertEqual(self.tcp_client.receive(timeout=0.01), [])
+        self.tcp_client.send_many([self.ping_reply.pack()] * 3)
+        self.assertEqual(
+            self.tcp_client.receive(max_packets=2, timeout=1.0), [self.ping_reply.pack()] * 2
+        )
+        packets = self.tcp_client.receive(timeout=1.0)
+        if not packets:
+            packets = self.tcp_client.receive(timeout=1.0)
+        self.assertEqual(packets, [self.ping_reply.pack()])
+        received = deque()
+        self.tcp_client.on_packet(lambda _, packets: received.extend(packets))
+        self.tcp_client.send(self.ping_reply.pack())
+        for _ in range(100):
+            if received:
+                break
+            time.sleep(0.01)
+        self.assertEqual(list(received), [self.ping_reply.pack()])
+        self.assertEqual(self.tcp_client.packets_available(), 0)
+
+    def test_fileno(self):
+        self._open()
+        tcp_server = threading.Thread(target=self.tcp_echo_server_thread, daemon=True)
+        tcp_server.start()
+        self.assertEqual(select.select([self.tcp_client], [], [], 0)[0], [])
+        self.tcp_client.send(self.ping_reply.pack())
+        self.assertEqual(select.select([self.tcp_client], [], [], 1.0)[0], [self.tcp_client])
+        self.assertEqual(self.tcp_client.receive(), [self.ping_reply.pack()])
+        self.assertEqual(select.select([self.tcp_client], [], [], 0)[0], [])
+
+    def test_submit_and_flush(self):
+        self.tcp_client.open()
+        conn_sock, _ = self.tcp_server.accept()
+        conn_sock.settimeout(1.0)
+        future = self.tcp_client.submit(self.base_data)
+        self.assertIsNone(future.result(1.0))
+        self.assertEqual(conn_sock.recv(4096), self.base_data)
+        self.tcp_client.send_many([self.base_data] * 100)
+        self.assertTrue(self.tcp_client.flush(1.0))
+        self.assertEqual(self.tcp_client.tx_queue_depth, 0)
+        received = bytearray()
+        while len(received) < 400:
+            received.extend(conn_sock.recv(4096))
+        self.tcp_client.close()
+        conn_sock.close()
+
+    def _bounded_client(self, tc_overflow_policy: OverflowPolicy) -> TcpSpacepacketsClient:
+        return TcpSpacepacketsClient(
+            "tcp_bounded",
+            space_packet_ids=[self.expected_packet_id],
+            target_address=EthAddr.from_tuple(self.addr),
+            inner_thread_delay=0.05,
+            max_tcs_queued=2,
+            tc_overflow_policy=tc_overflow_policy,
+            send_timeout=0.05,
+        )
+
+    def test_blocking_tc_queue(self):
+        tcp_client = self._bounded_client(OverflowPolicy.BLOCK)
+        tcp_client.open()
+        # The server never reads, so the socket buffers fill up.
+        conn_sock, _ = self.tcp_server.accept()
+        large_tc = bytes(1024 * 1024)
+        with self.assertRaises(SendError):
+            for _ in range(200):
+                tcp_client.send(large_tc)
+        self.assertLessEqual(tcp_client.tx_queue_depth, 4)
+        self.assertEqual(tcp_client.dropped_tc_count, 1)
+        self.assertFalse(tcp_client.flush(0.05))
+        future = tcp_client.submit(large_tc)
+        start = time.perf_counter()
+        tcp_client.close(drain_timeout=0.1)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        # The TC was either discarded or not sent before the interface was closed.
+        self.assertIsInstance(future.exception(0), SendError)
+        self.assertEqual(tcp_client.tx_queue_depth, 0)
+        conn_sock.close()
+
+    def test_blocked_send_after_close(self):
+        tcp_client = self._bounded_client(OverflowPolicy.BLOCK)
+        tcp_client.send_timeout = None
+        with self.assertRaises(SendError):
+            tcp_client.send(self.base_data)
+        tcp_client.open()
+        conn_sock, _ = self.tcp_server.accept()
+        large_tc = bytes(1024 * 1024)
+        errors = []
+
+        def fill_tc_queue():
+            try:
+                while True:
+                    tcp_client.send(large_tc)
+            except SendError as e:
+                errors.append(e)
+
+        sender = threading.Thread(target=fill_tc_queue, daemon=True)
+        sender.start()
+        # The server never reads, so the sender is blocked by the full TC queue until the
+        # interface is closed.
+        sender.join(0.2)
+        self.assertTrue(sender.is_alive())
+        tcp_client.close()
+        sender.join(1.0)
+        self.assertFalse(sender.is_alive())
+        self.assertEqual(len(errors), 1)
+        with self.assertRaises(SendError):
+            tcp_client.send(large_tc)
+        self.assertIsInstance(tcp_client.submit(large_tc).exception(0), SendError)
+        conn_sock.close()
+
+    def test_dropping_tc_queue(self):
+        tcp_client = self._bounded_client(OverflowPolicy.DROP_NEWEST)
+        tcp_client.open()
+        conn_sock, _ = self.tcp_server.accept()
+        large_tc = bytes(1024 * 1024)
+        futures = [tcp_client.submit(large_tc) for _ in range(100)]
+        dropped_tc_count = tcp_client.dropped_tc_count
+        self.assertGreater(dropped_tc_count, 0)
+        self.assertIsInstance(futures[-1].exception(0), SendError)
+        tcp_client.close()
+        # Unsent TCs are discarded when the interface is closed.
+        failed = [future for future in futures if future.exception(0) is not None]
+        self.assertGreater(len(failed), dropped_tc_count)
+        self.assertTrue(all(isinstance(future.exception(), SendError) for future in failed))
+        conn_sock.close()
+
+    def _listening_socket(self) -> socket.socket:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind((LOCALHOST, 0))
+        server.listen()
+        return server
+
+    def test_connect_failure_closes_interface(self):
+        unused_server = self._listening_socket()
+        address = EthAddr.from_tuple(unused_server.getsockname())
+        unused_server.close()
+        tcp_client = TcpSpacepacketsClient(
+            "tcp_refused",
+            space_packet_ids=[self.expected_packet_id],
+            target_address=address,
+            inner_thread_delay=0.05,
+        )
+        # The connection is established in the background.
+        tcp_client.open()
+        future = tcp_client.submit(self.base_data)
+        self.assertFalse(tcp_client.wait_connected(0.2))
+        self.assertFalse(tcp_client.is_open())
+        # The queued TC fails once the client gives up.
+        self.assertIsInstance(future.exception(0), SendError)
+        with self.assertRaises(SendError):
+            tcp_client.flush(0.1)
+        tcp_client.close()
+        self.assertEqual(tcp_client.tx_queue_depth, 0)
+
+    def test_connection_reset_fails_unsent_tcs(self):
+        tcp_client = TcpSpacepacketsClient(
+            "tcp_reset",
+            space_packet_ids=[self.expected_packet_id],
+            target_address=EthAddr.from_tuple(self.addr),
+            inner_thread_delay=0.05,
+        )
+        tcp_client.open()
+        # The server never reads, so the socket buffers fill up and the TCs stay pending.
+        conn_sock, _ = self.tcp_server.accept()
+        large_tc = bytes(1024 * 1024)
+        futures = [tcp_client.submit(large_tc) for _ in range(20)]
+        # Reset the connection instead of closing it gracefully.
+        conn_sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        conn_sock.close()
+        # The futures fail once the TCP thread gives up, without closing the interface.
+        self.assertIsInstance(futures[-1].exception(2.0), SendError)
+        self.assertFalse(tcp_client.is_open())
+        with self.assertRaises(SendError):
+            tcp_client.flush(1.0)
+        for future in futures:
+            self.assertTrue(future.done())
+        self.assertEqual(tcp_client.tx_queue_depth, 0)
+        tcp_client.close()
+
+    def test_reconnect(self):
+        tcp_client = TcpSpacepacketsClient(
+            "tcp_reconnect",
+            space_packet_ids=[self.expected_packet_id],
+            target_address=EthAddr.from_tuple(self.addr),
+            inner_thread_delay=0.05,
+            connection_cfg=TcpConnectionCfg(
+                reconnect=ReconnectPolicy(initial_delay=0.01, max_delay=0.05)
+            ),
+        )
+        tcp_client.open()
+        conn_sock, _ = self.tcp_server.accept()
+        self.assertTrue(tcp_client.wait_connected(1.0))
+        # A TC which was completely written to the connection is not sent again after the
+        # connection was lost.
+        written_tc = bytes([4, 5, 6, 7])
+        self.assertIsNone(tcp_client.submit(written_tc).result(1.0))
+        conn_sock.settimeout(1.0)
+        self.assertEqual(conn_sock.recv(4096), written_tc)
+        conn_sock.close()
+        # The TCs sent while the connection is down are kept for the next connection.
+        futures = [tcp_client.submit(self.base_data) for _ in range(50)]
+        self.tcp_server.settimeout(2.0)
+        conn_sock, _ = self.tcp_server.accept()
+        self.assertTrue(tcp_client.wait_connected(1.0))
+        self.assertTrue(tcp_client.is_open())
+        tcp_client.send(self.base_data)
+        self.assertTrue(tcp_client.flush(1.0))
+        conn_sock.settimeout(1.0)
+        received = bytearray()
+        with contextlib.suppress(socket.timeout):
+            while len(received) < 51 * len(self.base_data):
+                received.extend(conn_sock.recv(4096))
+        # TCs which were written to the lost connection before the loss was detected are lost,
+        # their futures completed anyway.
+        self.assertGreaterEqual(len(received), len(self.base_data))
+        self.assertEqual(received, self.base_data * (len(received) // len(self.base_data)))
+        self.assertTrue(all(future.exception(0) is None for future in futures))
+        self.assertGreaterEqual(tcp_client.metrics.reconnects, 1)
+        tcp_client.close()
+        conn_sock.close()
+
+    def test_failover(self):
+        standby_server = self._listening_socket()
+        standby_server.settimeout(2.0)
+        self.tcp_server.settimeout(2.0)
+        tcp_client = TcpSpacepacketsClient(
+            "tcp_failover",
+            space_packet_ids=[self.expected_packet_id],
+            target_address=EthAddr.from_tuple(self.addr),
+            inner_thread_delay=0.05,
+            connection_cfg=TcpConnectionCfg(
+                reconnect=ReconnectPolicy(initial_delay=0.01),
+                failover_addresses=[EthAddr.from_tuple(standby_server.getsockname())],
+                preconnect=True,
+            ),
+        )
+        tcp_client.open()
+        primary_sock, _ = self.tcp_server.accept()
+        standby_sock, _ = standby_server.accept()
+        self.assertTrue(tcp_client.wait_connected(1.0))
+        self.assertEqual(tcp_client.connected_address, EthAddr.from_tuple(self.addr))
+        # Stop the primary server, so the primary address can not be reconnected.
+        self.tcp_server.close()
+        primary_sock.close()
+        standby_address = EthAddr.from_tuple(standby_server.getsockname())
+        for _ in range(100):
+            if tcp_client.connected_address == standby_address:
+                break
+            time.sleep(0.01)
+        self.assertEqual(tcp_client.connected_address, standby_address)
+        tcp_client.send(self.base_data)
+        standby_sock.settimeout(1.0)
+        self.assertEqual(standby_sock.recv(4096), self.base_data)
+        tcp_client.close()
+        standby_sock.close()
+        standby_server.close()
+
     def tcp_echo_server_thread(self):
         (conn_sock, addr_info) = self.tcp_server.accept()
         while True:
@@ -96,12 +436,12 @@ class TestTcpIf(TestCase):
         self.tcp_client.send(self.ping_cmd.pack())
         self.tcp_client.send(self.ping_reply.pack())
         time.sleep(0.2)
-        # Assert both packets arrived at the server
-        self.assertEqual(len(self.server_received_packets), 2)
-        packet_0 = self.server_received_packets.pop()
-        self.assertEqual(packet_0, self.ping_cmd.pack())
-        packet_1 = self.server_received_packets.pop()
-        self.assertEqual(packet_1, self.ping_reply.pack())
+        # Assert both packets arrived at the server. Both TCs might be sent in one batch,
+        # so the received stream is compared.
+        received_stream = bytearray()
+        while self.server_received_packets:
+            received_stream.extend(self.server_received_packets.pop())
+        self.assertEqual(received_stream, self.ping_cmd.pack() + self.ping_reply.pack())
 
         # Now assert that a ping reply was sent back to the client if a ping command was sent
         self.assertEqual(self.tcp_client.packets_available(), 1)
@@ -116,3 +456,13 @@ class TestTcpIf(TestCase):
     def tearDown(self) -> None:
         self.tcp_server.close()
         self.tcp_client.close()
+
+
+class TestReconnectPolicy(TestCase):
+    def test_delay(self):
+        policy = ReconnectPolicy(initial_delay=0.1, max_delay=1.0, multiplier=2.0, jitter=0.0)
+        self.assertEqual([policy.delay(attempt) for attempt in range(3)], [0.1, 0.2, 0.4])
+        self.assertEqual(policy.delay(10_000), 1.0)
+        policy.jitter = 0.5
+        for _ in range(100):
+            self.assertTrue(0.05 <= policy.delay(0) <= 0.15)
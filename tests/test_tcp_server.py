@@ -0,0 +1,172 @@
+import contextlib
+import select
+import socket
+import time
+from unittest import TestCase
+
+from spacepackets import PacketType
+from spacepackets.ccsds import PacketId
+from spacepackets.ecss import PusTelecommand
+
+from com_interface import SendError
+from com_interface.framing import CobsFramer
+from com_interface.ip_utils import EthAddr
+from com_interface.packet_queue import OverflowPolicy
+from com_interface.tcp_server import TcpSpacepacketsServer
+
+LOCALHOST = "127.0.0.1"
+
+
+class TestTcpServer(TestCase):
+    def setUp(self) -> None:
+        self.packet_id = PacketId(apid=0x22, sec_header_flag=True, ptype=PacketType.TC)
+        self.server = TcpSpacepacketsServer(
+            "tcp_server", [self.packet_id], EthAddr(LOCALHOST, 0), max_packets_stored=100
+        )
+        self.server.open()
+        self.sockets: list[socket.socket] = []
+
+    def _connect(self, count: int) -> list[socket.socket]:
+        sockets = []
+        for _ in range(count):
+            sock = socket.create_connection(self.server.address.to_tuple)
+            sock.settimeout(1.0)
+            sockets.append(sock)
+        self.sockets.extend(sockets)
+        self._wait_for(lambda: len(self.server.clients) == len(self.sockets))
+        return sockets
+
+    def _wait_for(self, condition) -> None:
+        for _ in range(100):
+            if condition():
+                return
+            time.sleep(0.01)
+        self.fail("condition was not met")
+
+    def _recv_exactly(self, sock: socket.socket, num_bytes: int) -> bytes:
+        data = bytearray()
+        while len(data) < num_bytes:
+            data.extend(sock.recv(num_bytes - len(data)))
+        return bytes(data)
+
+    def test_reassembly(self):
+        first, second = self._connect(2)
+        tcs = [
+            PusTelecommand(service=17, subservice=1, apid=0x22, seq_count=idx).pack()
+            for idx in range(4)
+        ]
+        # The packets of both clients are split across multiple segments.
+        first.sendall(tcs[0][:5])
+        second.sendall(tcs[1] + tcs[2][:3])
+        time.sleep(0.05)
+        first.sendall(tcs[0][5:])
+        second.sendall(tcs[2][3:])
+        received = []
+        for _ in range(100):
+            received.extend(self.server.receive_from(timeout=1.0))
+            if len(received) == 3:
+                break
+        first_addr = EthAddr.from_tuple(first.getsockname())
+        second_addr = EthAddr.from_tuple(second.getsockname())
+        self.assertCountEqual(
+            received, [(first_addr, tcs[0]), (second_addr, tcs[1]), (second_addr, tcs[2])]
+        )
+        second.sendall(tcs[3])
+        self.assertEqual(self.server.receive(timeout=1.0), [tcs[3]])
+        self.assertEqual(self.server.metrics.rx_packets, 4)
+
+    def test_broadcast_and_routing(self):
+        clients = self._connect(3)
+        self.server.send(b"\x01\x02")
+        self.server.send_many([b"\x03", b"\x04"])
+        for sock in clients:
+            self.assertEqual(self._recv_exactly(sock, 4), b"\x01\x02\x03\x04")
+        target = EthAddr.from_tuple(clients[1].getsockname())
+        self.server.send_to(target, b"\x05")
+        self.assertEqual(clients[1].recv(16), b"\x05")
+        self.assertEqual(select.select([clients[0], clients[2]], [], [], 0.05)[0], [])
+        with self.assertRaises(SendError):
+            self.server.send_to(EthAddr(LOCALHOST, 1), b"\x05")
+        self._wait_for(lambda: self.server.metrics.tx_packets == 10)
+
+    def test_disconnect(self):
+        first, second = self._connect(2)
+        first_addr = EthAddr.from_tuple(first.getsockname())
+        self.server.send_to(first_addr, b"\x01")
+        with self.assertLogs("com_interface.tcp_server", "INFO") as logs:
+            self.server.disconnect(first_addr)
+            self.assertEqual(first.recv(16), b"\x01")
+            self.assertEqual(first.recv(16), b"")
+        # A requested disconnect is not a connection failure.
+        self.assertEqual([record.levelname for record in logs.records], ["INFO"])
+        self.assertIn("disconnected on request", logs.output[0])
+        second.close()
+        self._wait_for(lambda: self.server.clients == ())
+
+    def test_slow_client(self):
+        for policy in (OverflowPolicy.DROP_OLDEST, OverflowPolicy.DROP_NEWEST):
+            self._test_slow_client(policy)
+
+    def _test_slow_client(self, policy: OverflowPolicy):
+        server = TcpSpacepacketsServer(
+            "tcp_server_slow",
+            [],
+            EthAddr(LOCALHOST, 0),
+            framer_factory=CobsFramer,
+            max_frames_queued=4,
+            overflow_policy=policy,
+        )
+        server.open()
+        try:
+            slow = socket.create_connection(server.address.to_tuple)
+            fast = socket.create_connection(server.address.to_tuple)
+            self.sockets.extend([slow, fast])
+            fast.settimeout(1.0)
+            self._wait_for(lambda: len(server.clients) == 2)
+            # The slow client does not read, so its send queue overflows. The fast client
+            # still receives every packet.
+            packet = bytes(range(1, 200)) * 50
+            frame_len = len(CobsFramer().encode(packet))
+            for _ in range(500):
+                server.send(packet)
+                self.assertEqual(len(self._recv_exactly(fast, frame_len)), frame_len)
+            self.assertGreater(server.dropped_tx_count, 0)
+            # Packets are only dropped as a whole, so the stream of the slow client stays intact.
+            framer = CobsFramer()
+            slow.settimeout(0.2)
+            frames = []
+            with contextlib.suppress(socket.timeout):
+                while data := slow.recv(65536):
+                    frames.extend(framer.feed(data))
+            self.assertGreater(len(frames), 0)
+            self.assertLess(len(frames), 500)
+            self.assertTrue(all(frame == packet for frame in frames))
+            self.assertEqual(framer.parsing_error_count, 0)
+        finally:
+            server.close()
+
+    def test_close(self):
+        (sock,) = self._connect(1)
+        self.server.close()
+        self.assertEqual(sock.recv(16), b"")
+        self.assertEqual(self.server.clients, ())
+        self.assertEqual(self.server.receive(timeout=None), [])
+        # Packets which are rejected are not traced as sent.
+        events = []
+        self.server.add_hook(lambda _com_if, event, _timestamp_ns, _data: events.append(event))
+        with self.assertRaises(SendError):
+            self.server.send(b"\x01")
+        with self.assertRaises(SendError):
+            self.server.send_many([b"\x01"])
+        with self.assertRaises(SendError):
+            self.server.send_to(EthAddr(LOCALHOST, 1), b"\x01")
+        self.assertEqual(events, [])
+        with self.assertRaises(ValueError):
+            TcpSpacepacketsServer(
+                "tcp_server", [], EthAddr(LOCALHOST, 0), overflow_policy=OverflowPolicy.BLOCK
+            )
+
+    def tearDown(self) -> None:
+        self.server.close()
+        for sock in self.sockets:
+            sock.close()
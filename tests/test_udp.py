@@ -1,11 +1,15 @@
+import io
 import select
 import socket
+import threading
 import time
 from typing import Any
 from unittest import TestCase
 
+from com_interface.hub import ComHub
 from com_interface.ip_utils import EthAddr
-from com_interface.udp import UdpClient
+from com_interface.packet_queue import OverflowPolicy
+from com_interface.udp import UdpClient, UdpServer
 
 LOCALHOST = "127.0.0.1"
 
@@ -37,6 +41,174 @@ class TestUdpIf(TestCase):
         self.assertEqual(len(data_recv), 1)
         self.assertEqual(data_recv[0], data)
 
+    def test_recv_burst(self):
+        for use_mmsg in (True, False):
+            udp_client = UdpClient(
+                "udp_burst",
+                send_address=EthAddr.from_tuple(self.addr),
+                max_recv_size=256,
+                use_mmsg=use_mmsg,
+            )
+            udp_client.open()
+            udp_client.send(bytes([0]))
+            _, sender_addr = self.udp_server.recvfrom(4096)
+            packets = [bytes([idx % 256]) * (idx % 50 + 1) for idx in range(100)]
+            for packet in packets:
+                self.udp_server.sendto(packet, sender_addr)
+            received = []
+            for _ in range(20):
+                received.extend(udp_client.receive())
+                if len(received) == len(packets):
+                    break
+                time.sleep(0.01)
+            self.assertEqual(len(received), len(packets))
+            self.assertEqual(received, packets)
+            udp_client.close()
+
+    def test_threaded_reception(self):
+        udp_client = UdpClient(
+            "udp_threaded",
+            send_address=EthAddr.from_tuple(self.addr),
+            threaded_reception=True,
+            max_packets_stored=5,
+            overflow_policy=OverflowPolicy.DROP_NEWEST,
+            recv_buf_size=65536,
+        )
+        udp_client.open()
+        udp_client.send(bytes([0]))
+        _, sender_addr = self.udp_server.recvfrom(4096)
+        for idx in range(8):
+            self.udp_server.sendto(bytes([idx]), sender_addr)
+        for _ in range(50):
+            if udp_client.dropped_packet_count == 3:
+                break
+            time.sleep(0.01)
+        self.assertEqual(udp_client.packets_available(), 5)
+        self.assertEqual(udp_client.dropped_packet_count, 3)
+        self.assertEqual(udp_client.receive(), [bytes([idx]) for idx in range(5)])
+        udp_client.close()
+        self.assertFalse(udp_client.is_open())
+
+    def test_close_with_full_queue(self):
+        udp_client = UdpClient(
+            "udp_blocking",
+            send_address=EthAddr.from_tuple(self.addr),
+            threaded_reception=True,
+            max_packets_stored=2,
+            overflow_policy=OverflowPolicy.BLOCK,
+        )
+        udp_client.open()
+        udp_client.send(bytes([0]))
+        _, sender_addr = self.udp_server.recvfrom(4096)
+        for idx in range(10):
+            self.udp_server.sendto(bytes([idx]), sender_addr)
+        for _ in range(50):
+            if udp_client.packets_available() == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(udp_client.packets_available(), 2)
+        closer = threading.Thread(target=udp_client.close, daemon=True)
+        closer.start()
+        closer.join(1.0)
+        self.assertFalse(closer.is_alive())
+        self.assertFalse(udp_client.is_open())
+
+    def test_hub_full_queue(self):
+        hub = ComHub()
+        udp_client = UdpClient(
+            "udp_hub",
+            send_address=EthAddr.from_tuple(self.addr),
+            max_packets_stored=2,
+            overflow_policy=OverflowPolicy.BLOCK,
+        )
+        hub.add(udp_client)
+        udp_client.send(bytes([0]))
+        _, sender_addr = self.udp_server.recvfrom(4096)
+        for idx in range(5):
+            self.udp_server.sendto(bytes([idx]), sender_addr)
+        for _ in range(50):
+            hub.run_once(0.01)
+            if udp_client.dropped_packet_count == 3:
+                break
+        self.assertEqual(udp_client.dropped_packet_count, 3)
+        self.assertEqual(udp_client.receive(), [bytes([0]), bytes([1])])
+        udp_client.close()
+        hub.close()
+
+    def test_blocking_receive(self):
+        self._open()
+        sender_addr = self._simple_send(bytes([0]))
+        self.assertEqual(self.udp_client.receive(timeout=0.01), [])
+        timer = threading.Timer(0.05, self.udp_server.sendto, (bytes([1]), sender_addr))
+        timer.start()
+        self.assertEqual(self.udp_client.receive(timeout=1.0), [bytes([1])])
+        timer.join()
+        for idx in range(3):
+            self.udp_server.sendto(bytes([idx]), sender_addr)
+        time.sleep(0.05)
+        self.assertEqual(self.udp_client.receive(max_packets=2), [bytes([0]), bytes([1])])
+        self.assertEqual(self.udp_client.receive(), [bytes([2])])
+        with self.assertRaises(io.UnsupportedOperation):
+            self.udp_client.on_packet(print)
+
+    def test_fileno(self):
+        with self.assertRaises(io.UnsupportedOperation):
+            self.udp_client.fileno()
+        self._open()
+        self.assertEqual(self.udp_client.fileno(), self.udp_client.udp_socket.fileno())
+        udp_client = UdpClient(
+            "udp_threaded", send_address=EthAddr.from_tuple(self.addr), threaded_reception=True
+        )
+        udp_client.open()
+        udp_client.send(bytes([0]))
+        _, sender_addr = self.udp_server.recvfrom(4096)
+        self.assertEqual(select.select([udp_client], [], [], 0)[0], [])
+        self.udp_server.sendto(bytes([1]), sender_addr)
+        self.assertEqual(select.select([udp_client], [], [], 1.0)[0], [udp_client])
+        self.assertEqual(udp_client.receive(), [bytes([1])])
+        self.assertEqual(select.select([udp_client], [], [], 0)[0], [])
+        udp_client.close()
+
+    def test_packet_callback(self):
+        udp_client = UdpClient(
+            "udp_callback", send_address=EthAddr.from_tuple(self.addr), threaded_reception=True
+        )
+        received = []
+        arrived = threading.Event()
+
+        def on_packet(com_if, packets):
+            self.assertIs(com_if, udp_client)
+            received.extend(packets)
+            if len(received) == 3:
+                arrived.set()
+
+        udp_client.on_packet(on_packet)
+        udp_client.open()
+        udp_client.send(bytes([0]))
+        _, sender_addr = self.udp_server.recvfrom(4096)
+        for idx in range(3):
+            self.udp_server.sendto(bytes([idx]), sender_addr)
+        self.assertTrue(arrived.wait(1.0))
+        self.assertEqual(received, [bytes([idx]) for idx in range(3)])
+        self.assertEqual(udp_client.packets_available(), 0)
+        self.assertEqual(udp_client.metrics.delivered_packets, 3)
+        udp_client.close()
+
+    def test_send_many(self):
+        for use_mmsg in (True, False):
+            udp_client = UdpClient(
+                "udp_send_many", send_address=EthAddr.from_tuple(self.addr), use_mmsg=use_mmsg
+            )
+            udp_client.open()
+            packets = [bytes([idx]) * (idx + 1) for idx in range(20)]
+            packets.append(bytearray([0xFF, 0xFE]))
+            udp_client.send_many(packets)
+            for packet in packets:
+                ready = select.select([self.udp_server], [], [], 0.1)
+                self.assertTrue(ready[0])
+                self.assertEqual(self.udp_server.recvfrom(4096)[0], packet)
+            udp_client.close()
+
     def _simple_send(self, data: bytes) -> Any:
         self.udp_client.send(data)
         ready = select.select([self.udp_server], [], [], 0.1)
@@ -52,3 +224,105 @@ class TestUdpIf(TestCase):
     def tearDown(self) -> None:
         self.udp_client.close()
         self.udp_server.close()
+
+
+class TestUdpServer(TestCase):
+    def setUp(self) -> None:
+        self.server = UdpServer("udp_server", EthAddr(LOCALHOST, 0), peer_timeout=0.2)
+        self.server.open()
+        self.peers = []
+        for _ in range(3):
+            peer = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            peer.bind((LOCALHOST, 0))
+            peer.settimeout(1.0)
+            self.peers.append(peer)
+
+    def _peer_addr(self, idx: int) -> EthAddr:
+        return EthAddr.from_tuple(self.peers[idx].getsockname())
+
+    def test_demultiplexing(self):
+        for threaded_reception in (False, True):
+            server = UdpServer(
+                "udp_server_demux", EthAddr(LOCALHOST, 0), threaded_reception=threaded_reception
+            )
+            server.open()
+            for idx, peer in enumerate(self.peers):
+                peer.sendto(bytes([idx, 0]), server.address.to_tuple)
+                peer.sendto(bytes([idx, 1]), server.address.to_tuple)
+            received = []
+            for _ in range(100):
+                received.extend(server.receive_from(timeout=1.0))
+                if len(received) == 6:
+                    break
+            self.assertEqual(
+                [packet for addr, packet in received if addr == self._peer_addr(1)],
+                [b"\x01\x00", b"\x01\x01"],
+            )
+            self.assertCountEqual(server.peers, [self._peer_addr(idx) for idx in range(3)])
+            self.assertEqual(server.metrics.rx_packets, 6)
+            server.close()
+
+    def test_reply_and_broadcast(self):
+        for use_mmsg in (True, False):
+            server = UdpServer("udp_server_reply", EthAddr(LOCALHOST, 0), use_mmsg=use_mmsg)
+            server.open()
+            for peer in self.peers:
+                peer.sendto(b"\x00", server.address.to_tuple)
+            for _ in range(100):
+                server.receive(timeout=0.01)
+                if len(server.peers) == 3:
+                    break
+            server.send_to(self._peer_addr(1), b"\x01")
+            self.assertEqual(self.peers[1].recv(16), b"\x01")
+            server.send_many([b"\x02", b"\x03\x04"])
+            for peer in self.peers:
+                self.assertEqual(peer.recv(16), b"\x02")
+                self.assertEqual(peer.recv(16), b"\x03\x04")
+            self.assertEqual(server.metrics.tx_packets, 7)
+            server.close()
+
+    def test_peer_expiry(self):
+        self.peers[0].sendto(b"\x00", self.server.address.to_tuple)
+        self.assertEqual(self.server.receive(timeout=1.0), [b"\x00"])
+        self.assertEqual(self.server.peers, [self._peer_addr(0)])
+        time.sleep(0.25)
+        self.assertEqual(self.server.peers, [])
+        # Expired peers are no longer served by a broadcast, and nothing is traced as sent.
+        events = []
+        self.server.add_hook(lambda _com_if, event, _timestamp_ns, _data: events.append(event))
+        self.server.send(b"\x01")
+        self.assertEqual(select.select([self.peers[0]], [], [], 0.05)[0], [])
+        self.assertEqual(events, [])
+        self.assertEqual(self.server.metrics.tx_packets, 0)
+        self.peers[0].sendto(b"\x02", self.server.address.to_tuple)
+        self.assertEqual(self.server.receive_from(timeout=1.0), [(self._peer_addr(0), b"\x02")])
+        self.server.remove_peer(self._peer_addr(0))
+        self.assertEqual(self.server.peers, [])
+
+    def test_multicast(self):
+        group = "239.255.12.34"
+        server = UdpServer("udp_server_mcast", EthAddr("", 0))
+        server.open()
+        try:
+            server.join_group(group, LOCALHOST)
+        except OSError as e:
+            server.close()
+            self.skipTest(f"multicast is not supported: {e}")
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(LOCALHOST))
+        try:
+            sender.sendto(b"\x01", (group, server.address.port))
+            self.assertEqual(server.receive(timeout=1.0), [b"\x01"])
+            server.leave_group(group)
+            self.assertEqual(server.multicast_groups, [])
+            sender.sendto(b"\x02", (group, server.address.port))
+            self.assertEqual(server.receive(timeout=0.1), [])
+        finally:
+            sender.close()
+            server.close()
+
+    def tearDown(self) -> None:
+        self.server.close()
+        for peer in self.peers:
+            peer.close()